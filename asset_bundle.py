@@ -0,0 +1,119 @@
+import struct
+import time
+
+MAGIC = b"WBAB"
+VERSION = 1
+
+# magic, version, reserved, icon count
+HEADER_FORMAT = "<4sBBH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# NUL-padded name, width, height, offset of the raster from the file start
+ENTRY_FORMAT = "<24sHHI"
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+NAME_SIZE = 24
+
+_WHITESPACE = b" \t\r\n"
+
+
+def _read_token(data, pos):
+    # PBM header tokens are separated by whitespace; '#' starts a comment
+    # that runs to the end of the line.
+    length = len(data)
+    while pos < length:
+        ch = data[pos]
+        if ch == ord("#"):
+            while pos < length and data[pos] not in b"\r\n":
+                pos += 1
+        elif ch in _WHITESPACE:
+            pos += 1
+        else:
+            break
+    start = pos
+    while pos < length and data[pos] not in b" \t\r\n#":
+        pos += 1
+    return bytes(data[start:pos]), pos
+
+
+def parse_pbm(data):
+    magic, pos = _read_token(data, 0)
+    if magic != b"P4":
+        raise ValueError("not a binary PBM (P4) image")
+    width, pos = _read_token(data, pos)
+    height, pos = _read_token(data, pos)
+    width = int(width)
+    height = int(height)
+    # Exactly one whitespace byte separates the header from the raster.
+    pos += 1
+    size = raster_size(width, height)
+    if len(data) - pos < size:
+        raise ValueError("truncated PBM raster")
+    return width, height, pos, size
+
+
+def raster_size(width, height):
+    return ((width + 7) // 8) * height
+
+
+def build_bundle(icons):
+    # icons: iterable of (name, width, height, raster bytes) in MONO_HLSB.
+    icons = list(icons)
+    offset = HEADER_SIZE + ENTRY_SIZE * len(icons)
+    table = bytearray()
+    rasters = bytearray()
+    for name, width, height, raster in icons:
+        encoded = name.encode()
+        if len(encoded) > NAME_SIZE:
+            raise ValueError(f"icon name too long: {name}")
+        if len(raster) != raster_size(width, height):
+            raise ValueError(f"raster size mismatch for {name}")
+        table += struct.pack(ENTRY_FORMAT, encoded, width, height, offset)
+        rasters += raster
+        offset += len(raster)
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, len(icons))
+    return bytes(header + table + rasters)
+
+
+def read_index(data):
+    magic, version, _, count = struct.unpack_from(HEADER_FORMAT, data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("unknown asset bundle format")
+    index = {}
+    for position in range(count):
+        name, width, height, offset = struct.unpack_from(
+            ENTRY_FORMAT, data, HEADER_SIZE + position * ENTRY_SIZE
+        )
+        end = name.find(b"\x00")
+        if end >= 0:
+            name = name[:end]
+        if offset + raster_size(width, height) > len(data):
+            raise ValueError("asset bundle is truncated")
+        index[name.decode()] = (width, height, offset)
+    return index
+
+
+class AssetBundle:
+    # The whole bundle is read into one bytearray with a single open; icons
+    # are memoryview slices into it, so a lookup costs no I/O or copy.
+
+    def __init__(self, path):
+        started = time.ticks_us()
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(0)
+            self.data = bytearray(size)
+            f.readinto(self.data)
+        self.view = memoryview(self.data)
+        self.index = read_index(self.data)
+        self.load_us = time.ticks_diff(time.ticks_us(), started)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def get(self, name):
+        width, height, offset = self.index[name]
+        return width, height, self.view[offset : offset + raster_size(width, height)]
@@ -0,0 +1,155 @@
+import time
+
+import framebuf
+
+import log
+from asset_bundle import AssetBundle, parse_pbm
+from config import ASSET_BUNDLE_FILE, ASSET_CACHE_BUDGET_BYTES, ASSET_DIR
+
+# FrameBuffer object and bookkeeping kept per cached bitmap, on top of the
+# pixel data itself.
+BITMAP_OVERHEAD_BYTES = 64
+
+stats = {"hits": 0, "misses": 0, "evictions": 0, "errors": 0, "load_us": 0}
+load_times_us = {}
+_log = log.get("Assets")
+
+
+class Bitmap:
+    def __init__(self, name, width, height, data, owns_data=True):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.data = data
+        self.owns_data = owns_data
+        self.fbuf = framebuf.FrameBuffer(data, width, height, framebuf.MONO_HLSB)
+
+    def size_bytes(self):
+        # Bundle-backed bitmaps are views into memory that stays resident
+        # anyway; only the per-icon overhead counts against the budget.
+        if not self.owns_data:
+            return BITMAP_OVERHEAD_BYTES
+        return len(self.data) + BITMAP_OVERHEAD_BYTES
+
+
+def load_pbm(name, directory=ASSET_DIR):
+    with open(f"{directory}/{name}.pbm", "rb") as f:
+        data = f.read()
+    width, height, offset, size = parse_pbm(data)
+    return Bitmap(name, width, height, bytearray(data[offset : offset + size]))
+
+
+def open_bundle(path=ASSET_BUNDLE_FILE):
+    try:
+        bundle = AssetBundle(path)
+    except OSError:
+        return None
+    except Exception as e:
+        _log.warning("Ignoring asset bundle %s: %s", path, e)
+        return None
+    _log.info(
+        "Loaded bundle with %d icons in %d us", len(bundle.index), bundle.load_us
+    )
+    return bundle
+
+
+bundle = open_bundle()
+
+
+def load_asset(name):
+    # Prefer the packed bundle; fall back to loose PBM files for icons that
+    # are not in it (or when no bundle has been built).
+    started = time.ticks_us()
+    if bundle is not None and name in bundle:
+        width, height, data = bundle.get(name)
+        bitmap = Bitmap(name, width, height, data, owns_data=False)
+    else:
+        bitmap = load_pbm(name)
+    elapsed = time.ticks_diff(time.ticks_us(), started)
+    load_times_us[name] = elapsed
+    stats["load_us"] += elapsed
+    return bitmap
+
+
+class AssetCache:
+    # LRU cache of decoded bitmaps under a byte budget. Recency is kept in a
+    # plain list; with a couple of dozen icons that is cheaper than anything
+    # cleverer.
+
+    def __init__(self, budget_bytes, loader=load_asset):
+        self.budget_bytes = budget_bytes
+        self.loader = loader
+        self._bitmaps = {}
+        self._order = []
+        self.used_bytes = 0
+
+    def __contains__(self, name):
+        return name in self._bitmaps
+
+    def get(self, name):
+        bitmap = self._bitmaps.get(name)
+        if bitmap is not None:
+            stats["hits"] += 1
+            if self._order[-1] != name:
+                self._order.remove(name)
+                self._order.append(name)
+            return bitmap
+
+        stats["misses"] += 1
+        try:
+            bitmap = self.loader(name)
+        except Exception as e:
+            stats["errors"] += 1
+            _log.error("Error loading bitmap '%s': %s", name, e)
+            return None
+        self._insert(bitmap)
+        return bitmap
+
+    def _insert(self, bitmap):
+        size = bitmap.size_bytes()
+        if size > self.budget_bytes:
+            return
+        while self._order and self.used_bytes + size > self.budget_bytes:
+            self._evict(self._order[0])
+        self._bitmaps[bitmap.name] = bitmap
+        self._order.append(bitmap.name)
+        self.used_bytes += size
+
+    def _evict(self, name):
+        bitmap = self._bitmaps.pop(name)
+        self._order.remove(name)
+        self.used_bytes -= bitmap.size_bytes()
+        stats["evictions"] += 1
+
+    def preload(self, names):
+        for name in names:
+            self.get(name)
+
+    def clear(self):
+        self._bitmaps = {}
+        self._order = []
+        self.used_bytes = 0
+
+
+cache = AssetCache(ASSET_CACHE_BUDGET_BYTES)
+
+
+def get(name):
+    return cache.get(name)
+
+
+def preload(names):
+    cache.preload(names)
+
+
+def print_stats():
+    print(
+        f"[Assets] hits={stats['hits']} misses={stats['misses']} "
+        f"evictions={stats['evictions']} errors={stats['errors']} "
+        f"used={cache.used_bytes}/{cache.budget_bytes} bytes "
+        f"load={stats['load_us']}us"
+    )
+    if bundle is not None:
+        print(f"[Assets] bundle startup={bundle.load_us}us size={len(bundle.data)}")
+    for name, elapsed in load_times_us.items():
+        print(f"[Assets] {name}: {elapsed}us")
@@ -0,0 +1,175 @@
+import gc
+import json
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import buses
+import display
+import heap
+import local_sensors
+import time_service
+import weather_change
+from config import (I2C_BUSES, SENSOR_SAMPLE_INTERVAL, TENDENCY_BUCKET_SECONDS,
+                    TENDENCY_WINDOW_SECONDS)
+
+# Runs the display, sensor and change-detection entry points on whatever
+# hardware is there: the device itself, or the simulator on a PC
+# (tools/bench.py drives both). Results go to stdout as one line starting
+# with RESULT_MARKER so they survive a serial capture full of other output.
+RESULT_MARKER = "BENCH-RESULT "
+DEFAULT_ITERATIONS = 20
+
+
+def _bus_counters():
+    counters = {}
+    for name, _, _, _ in I2C_BUSES:
+        stats = buses.get(name).stats
+        counters[name] = (stats["bytes"], stats["transactions"])
+    return counters
+
+
+def _sensor_reads():
+    return sum(stats["count"] for stats in local_sensors.bus_stats.values())
+
+
+def _heap_start():
+    # Through heap, so its idle-collection baseline starts here too.
+    heap.collect()
+    if tracemalloc is not None:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+    return gc.mem_alloc()
+
+
+def _heap_peak(start):
+    # On MicroPython nothing is freed between collections, so the heap in
+    # use right after the call is its peak; CPython reports the peak itself.
+    if tracemalloc is not None:
+        return tracemalloc.get_traced_memory()[1] - start
+    return gc.mem_alloc() - start
+
+
+def measure(name, func, iterations, setup=None):
+    # Every iteration starts from a collected heap, so the allocation figure
+    # is per call and the timings do not include someone else's garbage.
+    durations = []
+    peak = 0
+    # Collections the code under test triggered itself, e.g. heap.maybe_collect().
+    collections = 0
+    buses_before = _bus_counters()
+    reads_before = _sensor_reads()
+    for index in range(iterations):
+        args = setup(index) if setup is not None else ()
+        start_heap = _heap_start()
+        collections_before = heap.stats["collections"]
+        started = time.ticks_us()
+        func(*args)
+        durations.append(time.ticks_diff(time.ticks_us(), started))
+        collections += heap.stats["collections"] - collections_before
+        peak = max(peak, _heap_peak(start_heap))
+
+    durations.sort()
+    buses_after = _bus_counters()
+    result = {
+        "iterations": iterations,
+        "min_us": durations[0],
+        "median_us": durations[len(durations) // 2],
+        "mean_us": sum(durations) // len(durations),
+        "max_us": durations[-1],
+        "peak_heap_bytes": peak,
+        "collections": collections,
+        "sensor_reads": (_sensor_reads() - reads_before) / iterations,
+    }
+    for bus, (nbytes, transactions) in buses_after.items():
+        before = buses_before[bus]
+        result[f"{bus}_bytes"] = (nbytes - before[0]) / iterations
+        result[f"{bus}_transactions"] = (transactions - before[1]) / iterations
+    print(
+        f"[Bench] {name}: median={result['median_us']}us "
+        f"max={result['max_us']}us heap={peak} bytes"
+    )
+    return result
+
+
+def _reading_args(index):
+    # A different value every time, so each frame really goes to the panel.
+    return display.temp_in_icon, "In", f"{18 + index % 10}C"
+
+
+def _clock_args(index):
+    return (time_service.localtime(),)
+
+
+def _warm_history():
+    # Three hours of flat history, so every benchmarked change check runs
+    # the full tendency comparison.
+    now = time.time()
+    records = []
+    for age in range(TENDENCY_WINDOW_SECONDS, 0, -TENDENCY_BUCKET_SECONDS):
+        records.append((now - age, 5.0, 22.0, 45.0, 1013.0))
+    weather_change.warm_start(records)
+    return now
+
+
+def _snapshot_args(now):
+    def args(index):
+        # A fresh snapshot per call; the same one again would hit the cache.
+        timestamp = now + index * SENSOR_SAMPLE_INTERVAL
+        pressure_hPa = 1013.0 - index * 0.05
+        return (
+            local_sensors.SensorSnapshot(
+                timestamp,
+                5.0,
+                (5.0,),
+                22.0 + index * 0.02,
+                45.0,
+                pressure_hPa,
+                local_sensors.hpa_to_mmhg(pressure_hPa),
+            ),
+        )
+
+    return args
+
+
+def run(iterations=DEFAULT_ITERATIONS):
+    time_service.sync()
+    results = {}
+    results["display_reading"] = measure(
+        "display_reading", display.display_reading, iterations, _reading_args
+    )
+    results["display_clock"] = measure(
+        "display_clock", display.display_clock, iterations, _clock_args
+    )
+    results["display_moon"] = measure("display_moon", display.display_moon, iterations)
+    now = _warm_history()
+    results["check_weather_change"] = measure(
+        "check_weather_change",
+        weather_change.check_weather_change,
+        iterations,
+        _snapshot_args(now),
+    )
+    results["get_latest_observation"] = measure(
+        "get_latest_observation", local_sensors.get_latest_observation, iterations
+    )
+    return {
+        "implementation": sys.implementation.name,
+        "platform": sys.platform,
+        "version": ".".join(str(part) for part in sys.implementation.version[:3]),
+        "heap_free_bytes": gc.mem_free(),
+        "cases": results,
+    }
+
+
+def main(iterations=DEFAULT_ITERATIONS):
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    print(RESULT_MARKER + json.dumps(run(iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import time
+
+from machine import I2C, Pin, SoftI2C
+
+import log
+from config import I2C_BUSES, I2C_PREFER_HARDWARE
+
+_buses = {}
+_by_pins = {}
+_hardware_in_use = {}
+_log = log.get("Buses")
+
+
+def hardware_id(scl, sda):
+    # On the RP2040 every GPIO can carry one I2C signal: even pins are SDA,
+    # odd pins SCL, and the controller is I2C0/I2C1 alternating every two
+    # pins (GP0/1 -> I2C0, GP2/3 -> I2C1, GP4/5 -> I2C0, ...).
+    if sda % 2 != 0 or scl % 2 != 1:
+        return None
+    sda_id = (sda // 2) % 2
+    if (scl // 2) % 2 != sda_id:
+        return None
+    return sda_id
+
+
+class TimedI2C:
+    # Thin proxy around I2C/SoftI2C that times every bus transaction so
+    # frame pushes and sensor reads can be compared across buses.
+
+    def __init__(self, name, i2c, kind, freq):
+        self.name = name
+        self.i2c = i2c
+        self.kind = kind
+        self.freq = freq
+        self.stats = {
+            "transactions": 0,
+            "bytes": 0,
+            "errors": 0,
+            "total_us": 0,
+            "max_us": 0,
+        }
+
+    def _timed(self, nbytes, func, *args, **kwargs):
+        stats = self.stats
+        started = time.ticks_us()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.ticks_diff(time.ticks_us(), started)
+            stats["transactions"] += 1
+            stats["bytes"] += nbytes
+            stats["total_us"] += elapsed
+            if elapsed > stats["max_us"]:
+                stats["max_us"] = elapsed
+
+    def writeto(self, addr, buf, stop=True):
+        return self._timed(len(buf), self.i2c.writeto, addr, buf, stop)
+
+    def writevto(self, addr, vector, stop=True):
+        nbytes = sum(len(buf) for buf in vector)
+        return self._timed(nbytes, self.i2c.writevto, addr, vector, stop)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        return self._timed(nbytes, self.i2c.readfrom, addr, nbytes, stop)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        return self._timed(len(buf), self.i2c.readfrom_into, addr, buf, stop)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        return self._timed(
+            len(buf), self.i2c.writeto_mem, addr, memaddr, buf, addrsize=addrsize
+        )
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        return self._timed(
+            nbytes, self.i2c.readfrom_mem, addr, memaddr, nbytes, addrsize=addrsize
+        )
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        return self._timed(
+            len(buf),
+            self.i2c.readfrom_mem_into,
+            addr,
+            memaddr,
+            buf,
+            addrsize=addrsize,
+        )
+
+    def scan(self):
+        return self._timed(0, self.i2c.scan)
+
+    def __getattr__(self, name):
+        return getattr(self.i2c, name)
+
+
+def _create(name, scl, sda, freq):
+    existing = _by_pins.get((scl, sda))
+    if existing is not None:
+        _buses[name] = existing
+        return existing
+
+    bus_id = hardware_id(scl, sda) if I2C_PREFER_HARDWARE else None
+    i2c = None
+    if bus_id is not None and bus_id not in _hardware_in_use:
+        try:
+            i2c = I2C(bus_id, scl=Pin(scl), sda=Pin(sda), freq=freq)
+            kind = f"I2C{bus_id}"
+            _hardware_in_use[bus_id] = name
+        except Exception as e:
+            _log.warning("Hardware I2C%d unavailable for '%s': %s", bus_id, name, e)
+            i2c = None
+    if i2c is None:
+        i2c = SoftI2C(scl=Pin(scl), sda=Pin(sda), freq=freq)
+        kind = "SoftI2C"
+
+    bus = TimedI2C(name, i2c, kind, freq)
+    _buses[name] = bus
+    _by_pins[(scl, sda)] = bus
+    _log.info("%s: %s on SCL=%d SDA=%d at %d Hz", name, kind, scl, sda, freq)
+    return bus
+
+
+def _init():
+    # Create buses in config order so the busiest ones claim the hardware
+    # controllers first.
+    for name, scl, sda, freq in I2C_BUSES:
+        if name not in _buses:
+            _create(name, scl, sda, freq)
+
+
+def get(name):
+    if not _buses:
+        _init()
+    return _buses[name]
+
+
+def print_stats():
+    reported = []
+    for bus in _buses.values():
+        if bus in reported:
+            continue
+        reported.append(bus)
+        stats = bus.stats
+        average = (
+            stats["total_us"] // stats["transactions"] if stats["transactions"] else 0
+        )
+        print(
+            f"[Buses] {bus.name} ({bus.kind} {bus.freq} Hz): "
+            f"transactions={stats['transactions']} bytes={stats['bytes']} "
+            f"errors={stats['errors']} avg={average}us max={stats['max_us']}us"
+        )
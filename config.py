@@ -1,20 +1,60 @@
-from machine import Pin, SoftI2C
-
-I2C_SH1106_PINS = (Pin(16), Pin(17))
+# (SDA, SCL)
+I2C_SH1106_PINS = (16, 17)
 SH1106_WIDTH = 128
 SH1106_HEIGHT = 64
 SH1106_CONTRAST = 255
 SH1106_FLIP = True
 
+ASSET_DIR = "/images"
+ASSET_BUNDLE_FILE = "/assets.bin"
+ASSET_CACHE_BUDGET_BYTES = 4096
+ASSET_PRELOAD = ("temp_out", "temp_in", "hum", "pres", "pressure_comfort")
+LUNAR_TABLE_FILE = "/moon.bin"
+GLYPH_CACHE_BUDGET_BYTES = 3072
+LARGE_GLYPH_CHARS = "0123456789+-:%CN/A"
+SMALL_GLYPH_CHARS = "0123456789+-/3ABTP"
+
 WEATHER_CHECK_INTERVAL = 10
 DISPLAY_UPDATE_INTERVAL = 5
 
-WIFI_RETRY_ATTEMPTS = 5
-WIFI_RETRY_DELAY = 5
+WIFI_CREDENTIALS_FILE = "credentials.txt"
+WIFI_CONNECT_TIMEOUT_MS = 15_000
+# Reconnect delays double from BASE up to MAX, half of each randomised.
+WIFI_BACKOFF_BASE_MS = 2_000
+WIFI_BACKOFF_MAX_MS = 5 * 60 * 1000
+WIFI_LINK_CHECK_MS = 5_000
+WIFI_STARTUP_WAIT_MS = 30_000
+# Power the radio down between batches of network jobs. Jobs due within
+# the batch window of each other share one wake-up.
+NETWORK_POWER_SAVE = True
+NETWORK_BATCH_WINDOW_SECONDS = 10 * 60
+NETWORK_RETRY_SECONDS = 60
+# getaddrinfo() blocks the event loop with no timeout of its own, so
+# resolved addresses are reused for this long.
+DNS_CACHE_SECONDS = 6 * 60 * 60
 NTP_SYNC_INTERVAL_SECONDS = 7 * 24 * 60 * 60
 CLOCK_DISPLAY_DURATION_SECONDS = 10
-FORECAST_DISPLAY_DURATION_SECONDS = 10
+FORECAST_DISPLAY_DURATION_SECONDS = 7
+MOON_DISPLAY_DURATION_SECONDS = 5
+SENSOR_SAMPLE_INTERVAL = 5
+OBSERVATION_TTL_SECONDS = 10
+TIME_RESYNC_SECONDS = 3600
+
 
+TENDENCY_WINDOW_SECONDS = 3 * 60 * 60
+TENDENCY_BUCKET_SECONDS = 5 * 60
+TENDENCY_MIN_SPAN_SECONDS = 30 * 60
+# (notable, significant) change over the tendency window.
+# Pressure: 1.6 hPa/3 h and 3.6 hPa/3 h barometric tendency bands, in mmHg.
+PRESSURE_CHANGE_THRESHOLDS = (1.2, 2.7)
+TEMP_CHANGE_THRESHOLDS = (3, 5)
+HUM_CHANGE_THRESHOLDS = (10, 15)
+
+OBSLOG_DIR = "/log"
+OBSLOG_SEGMENTS = 8
+OBSLOG_RECORDS_PER_SEGMENT = 512
+OBSLOG_FLUSH_EVERY = 6
+OBSLOG_INTERVAL_SECONDS = 5 * 60
 
 COMFORT_PRESSURE = 760
 PRESSURE_TOLERANCE = 5
@@ -22,12 +62,59 @@ WEATHER_CHECK_INTERVAL = 2
 DISPLAY_UPDATE_INTERVAL = 5
 BLINK_INTERVAL_MS = 100
 
+# heap.maybe_collect() collects at idle points (right after a frame is
+# pushed) once this much has been allocated since the last collection, or
+# when free memory is under the low-water mark. gc.threshold() is the
+# backstop: past it MicroPython collects wherever it happens to be.
+HEAP_IDLE_COLLECT_BYTES = 8 * 1024
+HEAP_GC_THRESHOLD_BYTES = 24 * 1024
+HEAP_LOW_WATER_BYTES = 48 * 1024
+# Bytes a single run of a task may allocate before it is reported.
+HEAP_DEFAULT_BUDGET_BYTES = 4096
+HEAP_TASK_BUDGETS = {
+    "sensors": 2048,
+    "weather": 1024,
+    "led": 256,
+    "ntp": 8192,
+    "forecast": 24 * 1024,
+    "telemetry": 4096,
+    "display_reading": 2048,
+    "display_clock": 1024,
+    "display_moon": 2048,
+    "display_forecast": 2048,
+}
+
+# Logging levels are "debug", "info", "warning", "error" and "off".
+# LOG_LEVELS overrides LOG_LEVEL per module tag, e.g. {"Wi-Fi": "debug"}.
+LOG_LEVEL = "info"
+LOG_LEVELS = {}
+# Messages at or above this level are also kept in RAM for log.dump(), even
+# when their module does not print them.
+LOG_RING_LEVEL = "info"
+LOG_RING_SIZE = 64
+# Any one message beyond this many times per window is dropped and counted.
+LOG_RATE_LIMIT_COUNT = 3
+LOG_RATE_LIMIT_WINDOW_MS = 60 * 1000
 
-RTC_I2C = SoftI2C(scl=Pin(19), sda=Pin(18))
+RTC_SCL = 19
+RTC_SDA = 18
 
 BME280_SCL = 5
 BME280_SDA = 4
 
+# Buses are created in this order; each one takes the RP2040 hardware
+# controller for its pins if that controller is still free, otherwise it
+# falls back to SoftI2C. Buses on the same pins are shared.
+I2C_PREFER_HARDWARE = True
+I2C_DISPLAY_FREQ = 400_000
+I2C_SENSOR_FREQ = 400_000
+# (name, SCL, SDA, frequency)
+I2C_BUSES = (
+    ("display", I2C_SH1106_PINS[1], I2C_SH1106_PINS[0], I2C_DISPLAY_FREQ),
+    ("rtc", RTC_SCL, RTC_SDA, I2C_SENSOR_FREQ),
+    ("bme280", BME280_SCL, BME280_SDA, I2C_SENSOR_FREQ),
+)
+
 DS18X20_PIN = 15
 TEMP_MIN = 20  # °C
 TEMP_MAX = 27  # °C
@@ -37,14 +124,67 @@ PRESSURE_MIN = 1007  # hPa
 PRESSURE_MAX = 1029  # hPa
 
 NTP_SERVER = "pool.ntp.org"
-LVIV_TIMEZONE_OFFSET_SECONDS_STANDARD = 2 * 3600
-LVIV_TIMEZONE_OFFSET_SECONDS_DST = 3 * 3600
+# Queried together on every sync; the reply with the shortest round trip wins.
+NTP_SERVERS = ("0.pool.ntp.org", "1.pool.ntp.org", "2.pool.ntp.org", NTP_SERVER)
+NTP_TIMEOUT_MS = 1500
+NTP_STATE_FILE = "/ntp_state.json"
+# Written once the DS3231 holds UTC. Older firmware kept it on local time;
+# without this file the RTC is read as local time and converted at boot.
+RTC_UTC_MARKER_FILE = "/rtc_utc"
+# The sync interval adapts to the measured RTC drift so the clock stays
+# within NTP_MAX_ERROR_MS; NTP_SYNC_INTERVAL_SECONDS is used until then.
+NTP_MAX_ERROR_MS = 1000
+NTP_MIN_INTERVAL_SECONDS = 6 * 60 * 60
+NTP_MAX_INTERVAL_SECONDS = 30 * 24 * 60 * 60
+NTP_MIN_DRIFT_SPAN_SECONDS = 12 * 60 * 60
+# A DS3231 is good to a few ppm; a bigger correction is a step, not drift.
+NTP_MAX_DRIFT_PPM = 100
+NTP_RETRY_SECONDS = 15 * 60
+# Zone name from tz.ZONES or a POSIX TZ string.
+TIMEZONE = "Europe/Lviv"
 
 # -----------------------------------------------------------------
 
 WEATHER_API_URL = "https://api.open-meteo.com/v1/dwd-icon"
 WIFI_RETRY_LIMIT = 30
 FORECAST_INTERVAL = 3600
+FORECAST_RETRY_SECONDS = 5 * 60
+FORECAST_TIMEOUT_SECONDS = 10
+# A 3-day, 5-variable forecast is well under 1 KB.
+FORECAST_MAX_RESPONSE_BYTES = 4096
+FORECAST_DAYS = 3
+FORECAST_DAILY_VARIABLES = (
+    "weather_code",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "precipitation_sum",
+    "wind_speed_10m_max",
+)
+FORECAST_CACHE_FILE = "/forecast_cache.json"
+LATITUDE = 49.8383
+LONGITUDE = 24.0232
+
+# -----------------------------------------------------------------
+
+# Telemetry: one observation per TELEMETRY_SAMPLE_SECONDS, sent in batches
+# of TELEMETRY_BATCH_SIZE to "<prefix>/<unique id>/observations" with QoS 1.
+# Each publish also sends the samples of a batch still filling up. Up to
+# TELEMETRY_QUEUE_LENGTH batches wait while the network is down; past that
+# the oldest is dropped.
+TELEMETRY_ENABLED = True
+TELEMETRY_TOPIC_PREFIX = "weatherbox"
+TELEMETRY_SAMPLE_SECONDS = 60
+TELEMETRY_BATCH_SIZE = 10
+TELEMETRY_QUEUE_LENGTH = 24
+TELEMETRY_INTERVAL_SECONDS = 10 * 60
+MQTT_BROKER = "mqtt.local"
+MQTT_PORT = 1883
+MQTT_USER = None
+MQTT_PASSWORD = None
+# Without NETWORK_POWER_SAVE the broker connection stays open between
+# publishes; longer than the publish interval, so it outlives the idle time.
+MQTT_KEEPALIVE_SECONDS = 30 * 60
+MQTT_TIMEOUT_MS = 3000
 
 # -----------------------------------------------------------------
 
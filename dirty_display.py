@@ -0,0 +1,130 @@
+_SET_PAGE_ADDRESS = 0xB0
+_LOW_COLUMN_ADDRESS = 0x00
+_HIGH_COLUMN_ADDRESS = 0x10
+
+# The SH1106 has 132 columns of RAM; the 128 visible ones start at column 2.
+COLUMN_OFFSET = 2
+
+# Control byte plus command byte for each of the three addressing commands,
+# plus the control byte that precedes a data burst.
+_PAGE_SETUP_BYTES = 3 * 2 + 1
+
+
+class DirtyRegionDisplay:
+    # Keeps a shadow copy of the last frame sent to the panel. show() compares
+    # the driver's framebuffer against it and only transmits the column span
+    # of each page that changed.
+
+    def __init__(self, oled, width, height):
+        self.oled = oled
+        self.width = width
+        self.pages = height // 8
+        self.shadow = bytearray(width * self.pages)
+        self.valid = False
+        self.stats = {
+            "frames": 0,
+            "full_frames": 0,
+            "skipped_frames": 0,
+            "pages_sent": 0,
+            "bytes_sent": 0,
+            "last_bytes": 0,
+        }
+        self._direct = (
+            hasattr(oled, "write_cmd")
+            and hasattr(oled, "write_data")
+            and self._framebuffer() is not None
+            and not getattr(oled, "rotate90", False)
+        )
+
+    def _framebuffer(self):
+        buf = getattr(self.oled, "displaybuf", None)
+        if buf is None:
+            buf = getattr(self.oled, "buffer", None)
+        return buf
+
+    def invalidate(self):
+        # Call after anything else pushed a frame (flip/contrast with update,
+        # a driver-level show()) so the next show() resends everything.
+        self.valid = False
+
+    def _changed_span(self, buf, start, end):
+        shadow = self.shadow
+        first = start
+        while first < end and buf[first] == shadow[first]:
+            first += 1
+        if first == end:
+            return None
+        last = end - 1
+        while buf[last] == shadow[last]:
+            last -= 1
+        return first - start, last + 1 - start
+
+    def _send(self, page, column_start, column_end, view):
+        oled = self.oled
+        column = column_start + COLUMN_OFFSET
+        oled.write_cmd(_SET_PAGE_ADDRESS | page)
+        oled.write_cmd(_LOW_COLUMN_ADDRESS | (column & 0x0F))
+        oled.write_cmd(_HIGH_COLUMN_ADDRESS | (column >> 4))
+        offset = page * self.width
+        oled.write_data(view[offset + column_start : offset + column_end])
+        return column_end - column_start + _PAGE_SETUP_BYTES
+
+    def show(self):
+        stats = self.stats
+        stats["frames"] += 1
+
+        if not self._direct:
+            self.oled.show()
+            sent = self.width * self.pages + self.pages * _PAGE_SETUP_BYTES
+            stats["full_frames"] += 1
+            stats["pages_sent"] += self.pages
+            stats["bytes_sent"] += sent
+            stats["last_bytes"] = sent
+            return sent
+
+        buf = self._framebuffer()
+        view = memoryview(buf)
+        width = self.width
+        full = not self.valid
+        sent = 0
+        pages_sent = 0
+
+        for page in range(self.pages):
+            start = page * width
+            end = start + width
+            if full:
+                span = (0, width)
+            else:
+                if buf[start:end] == self.shadow[start:end]:
+                    continue
+                span = self._changed_span(buf, start, end)
+                if span is None:
+                    continue
+            sent += self._send(page, span[0], span[1], view)
+            pages_sent += 1
+            self.shadow[start + span[0] : start + span[1]] = view[
+                start + span[0] : start + span[1]
+            ]
+
+        if hasattr(self.oled, "pages_to_update"):
+            self.oled.pages_to_update = 0
+
+        self.valid = True
+        if full:
+            stats["full_frames"] += 1
+        elif not pages_sent:
+            stats["skipped_frames"] += 1
+        stats["pages_sent"] += pages_sent
+        stats["bytes_sent"] += sent
+        stats["last_bytes"] = sent
+        return sent
+
+    def print_stats(self):
+        stats = self.stats
+        average = stats["bytes_sent"] // stats["frames"] if stats["frames"] else 0
+        print(
+            f"[Display] frames={stats['frames']} full={stats['full_frames']} "
+            f"skipped={stats['skipped_frames']} pages={stats['pages_sent']} "
+            f"bytes={stats['bytes_sent']} avg={average}/frame "
+            f"last={stats['last_bytes']}"
+        )
@@ -1,30 +1,43 @@
-import gc
 import time
 
-import framebuf
 import sh1106
-import writer
-from machine import PWM, Pin, SoftI2C
-
-from config import (BLUE_LED_PIN, COMFORT_PRESSURE, GREEN_LED_PIN,
-                    I2C_SH1106_PINS, PRESSURE_TOLERANCE, RED_LED_PIN,
-                    SH1106_CONTRAST, SH1106_FLIP, SH1106_HEIGHT, SH1106_WIDTH)
+from machine import PWM, Pin
+
+import assets
+import buses
+import heap
+import log
+from config import (ASSET_PRELOAD, BLUE_LED_PIN, COMFORT_PRESSURE,
+                    GLYPH_CACHE_BUDGET_BYTES, GREEN_LED_PIN,
+                    LARGE_GLYPH_CHARS, PRESSURE_TOLERANCE, RED_LED_PIN,
+                    SH1106_CONTRAST, SH1106_FLIP, SH1106_HEIGHT,
+                    SH1106_WIDTH, SMALL_GLYPH_CHARS)
+from dirty_display import DirtyRegionDisplay
 from fonts import agave, smallfont
-from local_sensors import get_latest_observation
+from glyphs import GlyphCache
 from moon import moon_info
 
+_log = log.get("Display")
+
 try:
-    i2c = SoftI2C(scl=Pin(I2C_SH1106_PINS[1]), sda=Pin(I2C_SH1106_PINS[0]))
+    i2c = buses.get("display")
     oled = sh1106.SH1106_I2C(SH1106_WIDTH, SH1106_HEIGHT, i2c, addr=0x3C)
     oled.contrast(SH1106_CONTRAST)
     oled.flip(SH1106_FLIP)
-    font_writer = writer.Writer(oled, agave)
-    small_font_writer = writer.Writer(oled, smallfont)
+    # Built once here and shared by every page, including the forecast.
+    font_writer = GlyphCache(agave, LARGE_GLYPH_CHARS, GLYPH_CACHE_BUDGET_BYTES)
+    small_font_writer = GlyphCache(
+        smallfont,
+        SMALL_GLYPH_CHARS,
+        GLYPH_CACHE_BUDGET_BYTES - font_writer.used_bytes,
+    )
+    screen = DirtyRegionDisplay(oled, SH1106_WIDTH, SH1106_HEIGHT)
 except Exception as e:
-    print(f"Error initializing display: {e}")
+    _log.error("Error initializing display: %s", e)
     oled = None
     font_writer = None
     small_font_writer = None
+    screen = None
 
 try:
     red_led = PWM(Pin(RED_LED_PIN))
@@ -44,7 +57,7 @@ try:
 
     set_led_color(0, 0.2, 0)
 except Exception as e:
-    print(f"Error initializing LEDs: {e}")
+    _log.error("Error initializing LEDs: %s", e)
     red_led = None
     green_led = None
     blue_led = None
@@ -53,17 +66,25 @@ except Exception as e:
         pass
 
 
+def show_frame():
+    if screen is not None:
+        return screen.show()
+    oled.show()
+
+
+def print_display_stats():
+    if screen is not None:
+        screen.print_stats()
+    if font_writer is not None:
+        font_writer.print_stats("large")
+        small_font_writer.print_stats("small")
+
+
 def load_bitmap(filename):
-    try:
-        with open(f"/images/{filename}.pbm", "rb") as f:
-            for _ in range(3):
-                f.readline()
-            return bytearray(f.read())
-    except Exception as e:
-        print(f"Error loading bitmap '{filename}': {e}")
-        return None
+    return assets.get(filename)
 
 
+assets.preload(ASSET_PRELOAD)
 temp_out_icon = load_bitmap("temp_out")
 temp_in_icon = load_bitmap("temp_in")
 hum_icon = load_bitmap("hum")
@@ -72,154 +93,127 @@ press_icon = load_bitmap("pres")
 
 def display_reading(icon, label, value):
     if oled is None or font_writer is None:
-        print("Display not initialized, skipping display_reading.")
+        _log.warning("Display not initialized, skipping display_reading.")
         return
     try:
         oled.fill(0)
-        oled.flip(SH1106_FLIP)
-        oled.contrast(SH1106_CONTRAST)
 
         if icon:
-            fbuf = framebuf.FrameBuffer(icon, 25, 25, framebuf.MONO_HLSB)
-            start_x = (SH1106_WIDTH - 25) // 2
+            start_x = (SH1106_WIDTH - icon.width) // 2
             start_y = 0
-            oled.blit(fbuf, start_x, start_y)
+            oled.blit(icon.fbuf, start_x, start_y)
 
-        font_writer.set_textpos(35, 30)
-        font_writer.printstring(f"{value}")
+        font_writer.render(oled, f"{value}", 35, 30)
 
-        oled.show()
-        gc.collect()
-        time.sleep(5)
+        show_frame()
+        heap.maybe_collect()
 
     except Exception as e:
-        print(f"Error displaying {label}: {e}")
+        _log.error("Error displaying %s: %s", label, e)
 
 
 def display_change(weather_change_info, icon):
     if oled is None or small_font_writer is None:
-        print("Display not initialized, skipping display_change.")
+        _log.warning("Display not initialized, skipping display_change.")
         return
     try:
         oled.fill(0)
 
         if icon:
-            fbuf = framebuf.FrameBuffer(icon, 25, 25, framebuf.MONO_HLSB)
-            start_x = (SH1106_WIDTH - 25) // 2
+            start_x = (SH1106_WIDTH - icon.width) // 2
             start_y = 0
-            oled.blit(fbuf, start_x, start_y)
+            oled.blit(icon.fbuf, start_x, start_y)
 
-        small_font_writer.set_textpos(5, 50)
-        small_font_writer.printstring(weather_change_info)
+        small_font_writer.render(oled, weather_change_info, 5, 50)
 
-        oled.show()
+        show_frame()
     except Exception as e:
-        print(f"Error displaying weather change: {e}")
+        _log.error("Error displaying weather change: %s", e)
 
 
 def load_moon_bitmap(filename):
-    try:
-        with open(f"/images/{filename}.pbm", "rb") as f:
-            f.readline()
-            f.readline()
-            f.readline()
-            return bytearray(f.read())
-    except Exception as e:
-        print(f"Error loading bitmap '{filename}': {e}")
-        return None
-
-
-phase_name, moon_day_number = moon_info()
-moon_icon = load_moon_bitmap(phase_name)
+    return assets.get(filename)
 
 
 def display_moon():
-    if moon_icon is None:
-        print("Error: No bitmap data to display.")
-        return
-
-    if not isinstance(moon_icon, (bytes, bytearray)):
-        print("Error: Invalid bitmap data type.")
+    if oled is None or small_font_writer is None:
+        _log.warning("Display not initialized, skipping display_moon.")
         return
-
     try:
-        fbuf = framebuf.FrameBuffer(moon_icon, 55, 55, framebuf.MONO_HLSB)
         phase_name, moon_day_number = moon_info()
     except Exception as e:
-        print(f"Error creating FrameBuffer: {e}")
+        _log.error("Error computing moon phase: %s", e)
+        return
+
+    moon_icon = load_moon_bitmap(phase_name)
+    if moon_icon is None:
+        _log.error("No bitmap data to display.")
+        return
+
+    if not isinstance(moon_icon, assets.Bitmap):
+        _log.error("Invalid bitmap data type.")
         return
 
     oled.fill(0)
-    font_writer = writer.Writer(oled, smallfont)
-    font_writer.set_textpos(45, 1)
-    font_writer.printstring(f"{moon_day_number}/29")
-    start_x = (128 - 55) // 2
+    small_font_writer.render(oled, f"{moon_day_number}/29", 45, 1)
+    start_x = (SH1106_WIDTH - moon_icon.width) // 2
     start_y = (64 - 39) // 2
-    oled.blit(fbuf, start_x, start_y)
-    oled.show()
-    gc.collect()
+    oled.blit(moon_icon.fbuf, start_x, start_y)
+    show_frame()
+    heap.maybe_collect()
 
 
-def display_main_loop():
-    if oled is None:
-        print("Display not initialized, skipping display_main_loop.")
-        return
-    try:
-        weather = get_latest_observation()
-        if not weather:
-            print("No observation data to display.")
-            return
-
-        outside_temp = weather.get("outside_temp_C", "N/A")
-        inside_temp = weather.get("inside_temp_C", "N/A")
-        humidity = weather.get("humidity_%", "N/A")
-        pressure = weather.get("pressure_mmHg", "N/A")
-
-        display_reading(temp_out_icon, "Out", f"{outside_temp}")
-        display_reading(temp_in_icon, "In", f"{inside_temp}")
-        display_reading(hum_icon, "Humidity", f"{humidity}")
-
-        try:
-            current_pressure = (
-                float(pressure.replace(" mmHg", ""))
-                if " mmHg" in pressure
-                else float(pressure)
-            )
-            if not (
-                COMFORT_PRESSURE - PRESSURE_TOLERANCE
-                <= current_pressure
-                <= COMFORT_PRESSURE + PRESSURE_TOLERANCE
-            ):
-                comfort_icon = load_bitmap("pressure_comfort")
-                if comfort_icon:
-                    display_reading(comfort_icon, "Pressure", f"{pressure}")
-                else:
-                    display_reading(press_icon, "Pressure", f"{pressure}")
-            else:
-                display_reading(press_icon, "Pressure", f"{pressure}")
-
-        except ValueError:
-            display_reading(press_icon, "Pressure", f"{pressure}")
-
-        except Exception as e:
-            print("Failed to update display:", e)
+def observation_pages(weather):
+    if not weather:
+        _log.info("No observation data to display.")
+        return []
+
+    outside_temp = weather.get("outside_temp_C", "N/A")
+    inside_temp = weather.get("inside_temp_C", "N/A")
+    humidity = weather.get("humidity_%", "N/A")
+    pressure = weather.get("pressure_mmHg", "N/A")
+
+    pages = [
+        (temp_out_icon, "Out", f"{outside_temp}"),
+        (temp_in_icon, "In", f"{inside_temp}"),
+        (hum_icon, "Humidity", f"{humidity}"),
+    ]
 
+    pressure_icon = press_icon
+    try:
+        current_pressure = (
+            float(pressure.replace(" mmHg", ""))
+            if " mmHg" in pressure
+            else float(pressure)
+        )
+        if not (
+            COMFORT_PRESSURE - PRESSURE_TOLERANCE
+            <= current_pressure
+            <= COMFORT_PRESSURE + PRESSURE_TOLERANCE
+        ):
+            comfort_icon = load_bitmap("pressure_comfort")
+            if comfort_icon:
+                pressure_icon = comfort_icon
+    except ValueError:
+        pass
     except Exception as e:
-        print(f"Error displaying weather: {e}")
+        _log.error("Failed to check pressure comfort: %s", e)
+
+    pages.append((pressure_icon, "Pressure", f"{pressure}"))
+    return pages
 
 
 def display_clock(t):
     if oled is None or font_writer is None:
-        print("Display not initialized, skipping display_clock.")
+        _log.warning("Display not initialized, skipping display_clock.")
         return
     try:
         oled.fill(0)
-        font_writer.set_textpos(15, 25)
         time_str = "{:02d}:{:02d}".format(t[3], t[4])
-        font_writer.printstring(time_str)
-        oled.show()
+        font_writer.render(oled, time_str, 15, 25)
+        show_frame()
     except Exception as e:
-        print(f"Error displaying clock: {e}")
+        _log.error("Error displaying clock: %s", e)
 
 
 def trigger_led_change():
@@ -1,13 +1,25 @@
-import gc
+import errno
 import json
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
 
-import framebuf
 import urequests
-import writer
 
-from config import SH1106_HEIGHT, SH1106_WIDTH
-from display import display_reading, oled
-from fonts import smallfont
+import assets
+import heap
+import json_stream
+import log
+import tz
+from config import (FORECAST_CACHE_FILE, FORECAST_DAILY_VARIABLES,
+                    FORECAST_DAYS, FORECAST_INTERVAL,
+                    FORECAST_MAX_RESPONSE_BYTES, FORECAST_RETRY_SECONDS,
+                    FORECAST_TIMEOUT_SECONDS, LATITUDE, LONGITUDE,
+                    SH1106_HEIGHT, SH1106_WIDTH, TIMEZONE)
+from display import display_reading, oled, show_frame, small_font_writer
 
 weather_codes_to_icons = {
     0: "sun",
@@ -72,40 +84,244 @@ weather_codes_to_description = {
 }
 
 
-def get_tomorrow_weather_code():
-    latitude = 49.8383
-    longitude = 24.0232
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&daily=weather_code&forecast_days=2&timezone=Europe%2FKyiv"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&daily={variables}&forecast_days={days}&timezone={timezone}"
 
-    try:
-        response = urequests.get(url)
-        if response.status_code == 200:
-            weather_data = response.json()
-            response.close()
-            if (
-                "daily" in weather_data
-                and "weather_code" in weather_data["daily"]
-                and len(weather_data["daily"]["weather_code"]) > 1
-            ):
-                tomorrow_weather_code = weather_data["daily"]["weather_code"][1]
-                return tomorrow_weather_code
-            else:
-                print("Error: Could not find tomorrow's weather code in the response.")
-                return None
+
+def api_timezone(name=TIMEZONE):
+    # Open-Meteo takes IANA names. A raw POSIX TZ string has none, so it gets
+    # GMT days instead, and date_key() follows.
+    if name in tz.ZONES:
+        return tz.IANA_NAMES.get(name, name)
+    return "GMT"
+
+
+# The zone the API splits its daily rows in.
+FORECAST_TIMEZONE = api_timezone()
+_forecast_zone = tz.get_zone(FORECAST_TIMEZONE)
+
+forecast_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "errors": 0}
+_forecast_cache = None
+_log = log.get("Forecast")
+_last_refresh_attempt = None
+# How often the body is polled while the server has nothing more to send.
+READ_POLL_MS = 50
+# Kept between fetches so every download reuses the same block.
+_body_buffer = None
+
+
+def location_key(latitude, longitude):
+    return f"{latitude:.4f},{longitude:.4f}"
+
+
+def date_key(timestamp):
+    # Days as the API splits them, in FORECAST_TIMEZONE; timestamps are UTC.
+    year, month, day = time.localtime(_forecast_zone.to_local(timestamp))[:3]
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+async def _read_body(raw, deadline):
+    # Reads the body off the socket without holding the event loop: each
+    # chunk is followed by a yield, and an empty socket by a sleep. Returns
+    # a view of the body, or None if it does not fit.
+    global _body_buffer
+    if _body_buffer is None:
+        _body_buffer = bytearray(FORECAST_MAX_RESPONSE_BYTES)
+    view = memoryview(_body_buffer)
+    raw.setblocking(False)
+    length = 0
+    while True:
+        if length == len(view):
+            return None
+        try:
+            n = raw.readinto(view[length:])
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+            n = None
+        if n == 0:
+            return view[:length]
+        if n is None:
+            if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                raise OSError(errno.ETIMEDOUT, "response timed out")
+            await asyncio.sleep(READ_POLL_MS / 1000)
         else:
-            print(
-                f"Error: Open-Meteo API request failed with status code: {response.status_code}"
+            length += n
+            await asyncio.sleep(0)
+
+
+async def fetch_daily_forecast(
+    latitude, longitude, days=FORECAST_DAYS, variables=FORECAST_DAILY_VARIABLES
+):
+    url = FORECAST_URL.format(
+        latitude=latitude,
+        longitude=longitude,
+        variables=",".join(variables),
+        days=days,
+        timezone=FORECAST_TIMEZONE.replace("/", "%2F"),
+    )
+
+    response = None
+    deadline = time.ticks_add(time.ticks_ms(), FORECAST_TIMEOUT_SECONDS * 1000)
+    try:
+        # urequests holds the loop until the headers are in; the body is
+        # read cooperatively.
+        response = urequests.get(url, timeout=FORECAST_TIMEOUT_SECONDS)
+        if response.status_code != 200:
+            _log.error(
+                "Open-Meteo API request failed with status code: %s",
+                response.status_code,
             )
             return None
-    except urequests.exceptions.OSError as e:
-        print(f"Error making HTTP request (check network): {e}")
+        body = await _read_body(response.raw, deadline)
+        if body is None:
+            _log.error(
+                "Response larger than %d bytes, discarded.",
+                FORECAST_MAX_RESPONSE_BYTES,
+            )
+            return None
+        # Pull only the requested daily columns out of the body instead of
+        # building the whole response tree with json.loads().
+        paths = [("daily", "time")] + [("daily", variable) for variable in variables]
+        values = json_stream.extract(body, paths)
+        dates = values.get(("daily", "time"))
+        columns = [values.get(("daily", variable)) for variable in variables]
+        if not dates or any(
+            column is None or len(column) != len(dates) for column in columns
+        ):
+            _log.error("Could not find daily forecast values in the response.")
+            return None
+        return {
+            date: [column[index] for column in columns]
+            for index, date in enumerate(dates)
+        }
+    except OSError as e:
+        _log.error("Error making HTTP request (check network): %s", e)
         return None
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON response: {e}")
+    except ValueError as e:
+        _log.error("Error decoding JSON response: %s", e)
         return None
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        _log.error("An unexpected error occurred: %s", e)
+        return None
+    finally:
+        if response is not None:
+            response.close()
+
+
+async def fetch_daily_weather_codes(latitude, longitude, days=FORECAST_DAYS):
+    daily = await fetch_daily_forecast(latitude, longitude, days, ("weather_code",))
+    if daily is None:
         return None
+    return {date: row[0] for date, row in daily.items()}
+
+
+async def get_tomorrow_weather_code(latitude=LATITUDE, longitude=LONGITUDE):
+    daily_codes = await fetch_daily_weather_codes(latitude, longitude)
+    if not daily_codes:
+        return None
+    tomorrow_weather_code = daily_codes.get(date_key(time.time() + 86400))
+    if tomorrow_weather_code is None:
+        _log.error("Could not find tomorrow's weather code in the response.")
+    return tomorrow_weather_code
+
+
+def _load_forecast_cache():
+    global _forecast_cache
+    if _forecast_cache is None:
+        try:
+            with open(FORECAST_CACHE_FILE, "r") as f:
+                _forecast_cache = json.load(f)
+        except (OSError, ValueError):
+            _forecast_cache = {}
+    return _forecast_cache
+
+
+def _save_forecast_cache():
+    try:
+        with open(FORECAST_CACHE_FILE, "w") as f:
+            json.dump(_forecast_cache, f)
+    except OSError as e:
+        _log.error("Error saving forecast cache: %s", e)
+
+
+def forecast_age(latitude=LATITUDE, longitude=LONGITUDE):
+    entry = _load_forecast_cache().get(location_key(latitude, longitude))
+    if entry is None:
+        return None
+    return time.time() - entry["fetched"]
+
+
+def forecast_is_stale(latitude=LATITUDE, longitude=LONGITUDE):
+    age = forecast_age(latitude, longitude)
+    return age is None or age < 0 or age >= FORECAST_INTERVAL
+
+
+def next_refresh_delay(latitude=LATITUDE, longitude=LONGITUDE):
+    # Seconds until refresh_forecast() would fetch again, so a caller that
+    # has to wake the radio for it can sleep until then.
+    age = forecast_age(latitude, longitude)
+    if age is None or age < 0 or age >= FORECAST_INTERVAL:
+        return FORECAST_RETRY_SECONDS
+    return max(FORECAST_INTERVAL - age, FORECAST_RETRY_SECONDS)
+
+
+def get_cached_daily_forecast(
+    timestamp=None, latitude=LATITUDE, longitude=LONGITUDE
+):
+    # Never touches the network: serves the last good forecast, even if it
+    # is past its TTL, as long as it still covers the requested day.
+    if timestamp is None:
+        timestamp = time.time() + 86400
+    entry = _load_forecast_cache().get(location_key(latitude, longitude))
+    row = None
+    if entry is not None and "variables" in entry:
+        row = entry["days"].get(date_key(timestamp))
+    if row is None:
+        forecast_stats["misses"] += 1
+        return None
+    if forecast_is_stale(latitude, longitude):
+        forecast_stats["stale_hits"] += 1
+    else:
+        forecast_stats["hits"] += 1
+    return dict(zip(entry["variables"], row))
+
+
+def get_cached_tomorrow_weather_code(latitude=LATITUDE, longitude=LONGITUDE):
+    day = get_cached_daily_forecast(None, latitude, longitude)
+    if day is None:
+        return None
+    return day.get("weather_code")
+
+
+async def refresh_forecast(latitude=LATITUDE, longitude=LONGITUDE, force=False):
+    global _last_refresh_attempt
+    if not force and not forecast_is_stale(latitude, longitude):
+        return False
+    now = time.time()
+    if (
+        not force
+        and _last_refresh_attempt is not None
+        and 0 <= now - _last_refresh_attempt < FORECAST_RETRY_SECONDS
+    ):
+        return False
+    _last_refresh_attempt = now
+
+    forecast_stats["fetches"] += 1
+    daily = await fetch_daily_forecast(latitude, longitude)
+    if not daily:
+        forecast_stats["errors"] += 1
+        _log.warning("Refresh failed, keeping cached forecast.")
+        return False
+
+    cache = _load_forecast_cache()
+    cache[location_key(latitude, longitude)] = {
+        "fetched": now,
+        "variables": list(FORECAST_DAILY_VARIABLES),
+        "days": daily,
+    }
+    _save_forecast_cache()
+    _log.info("Cached forecast for %d days.", len(daily))
+    return True
 
 
 def get_weather_icon(weather_code):
@@ -117,38 +333,22 @@ def get_weather_description(weather_code):
 
 
 def load_forecast_bitmap(filename):
-    try:
-        with open(f"/images/{filename}.pbm", "rb") as f:
-            f.readline()
-            f.readline()
-            f.readline()
-            return bytearray(f.read())
-    except Exception as e:
-        print(f"Error loading bitmap '{filename}': {e}")
-        return None
+    return assets.get(filename)
 
 
 def display_forecast(bitmap_data):
     if bitmap_data is None:
-        print("Error: No bitmap data to display.")
+        _log.error("No bitmap data to display.")
         return
 
-    if not isinstance(bitmap_data, (bytes, bytearray)):
-        print("Error: Invalid bitmap data type.")
-        return
-
-    try:
-        fbuf = framebuf.FrameBuffer(bitmap_data, 55, 55, framebuf.MONO_HLSB)
-    except Exception as e:
-        print(f"Error creating FrameBuffer: {e}")
+    if not isinstance(bitmap_data, assets.Bitmap):
+        _log.error("Invalid bitmap data type.")
         return
 
     oled.fill(0)
-    font_writer = writer.Writer(oled, smallfont)
-    font_writer.set_textpos(41, 1)
-    font_writer.printstring("3ABTPA")
-    start_x = (128 - 55) // 2
+    small_font_writer.render(oled, "3ABTPA", 41, 1)
+    start_x = (SH1106_WIDTH - bitmap_data.width) // 2
     start_y = (64 - 39) // 2
-    oled.blit(fbuf, start_x, start_y)
-    oled.show()
-    gc.collect()
+    oled.blit(bitmap_data.fbuf, start_x, start_y)
+    show_frame()
+    heap.maybe_collect()
@@ -0,0 +1,67 @@
+import framebuf
+
+import log
+
+# FrameBuffer object and dict slot kept per cached glyph, on top of the
+# pixel data itself.
+GLYPH_OVERHEAD_BYTES = 32
+
+_log = log.get("Glyphs")
+
+
+class GlyphCache:
+    # Ready-to-blit FrameBuffers for the characters the UI actually draws.
+    # Rendering a cached string is one blit per character; anything outside
+    # the cache is decoded from the font on the fly, like writer.Writer does.
+
+    def __init__(self, font, chars, budget_bytes):
+        self.font = font
+        self.height = font.height()
+        self.map = framebuf.MONO_HLSB if font.hmap() else framebuf.MONO_VLSB
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.glyphs = {}
+        self.stats = {"hits": 0, "misses": 0}
+        for ch in chars:
+            if ch in self.glyphs:
+                continue
+            fbuf, width, size = self._build(ch)
+            if self.used_bytes + size > budget_bytes:
+                _log.warning("Budget exhausted, not caching %r", ch)
+                continue
+            self.glyphs[ch] = (fbuf, width)
+            self.used_bytes += size
+
+    def _build(self, ch):
+        glyph, height, width = self.font.get_ch(ch)
+        buf = bytearray(glyph)
+        fbuf = framebuf.FrameBuffer(buf, width, height, self.map)
+        return fbuf, width, len(buf) + GLYPH_OVERHEAD_BYTES
+
+    def render(self, device, text, x, y):
+        glyphs = self.glyphs
+        for ch in text:
+            entry = glyphs.get(ch)
+            if entry is None:
+                self.stats["misses"] += 1
+                fbuf, width, _ = self._build(ch)
+            else:
+                self.stats["hits"] += 1
+                fbuf, width = entry
+            device.blit(fbuf, x, y)
+            x += width
+        return x
+
+    def text_width(self, text):
+        width = 0
+        for ch in text:
+            entry = self.glyphs.get(ch)
+            width += entry[1] if entry is not None else self.font.get_ch(ch)[2]
+        return width
+
+    def print_stats(self, label):
+        print(
+            f"[Glyphs] {label}: cached={len(self.glyphs)} "
+            f"used={self.used_bytes}/{self.budget_bytes} bytes "
+            f"hits={self.stats['hits']} misses={self.stats['misses']}"
+        )
@@ -0,0 +1,169 @@
+import gc
+import time
+
+import log
+from config import (HEAP_DEFAULT_BUDGET_BYTES, HEAP_GC_THRESHOLD_BYTES,
+                    HEAP_IDLE_COLLECT_BYTES, HEAP_LOW_WATER_BYTES,
+                    HEAP_TASK_BUDGETS)
+
+# Resolution of the largest-free-block probe.
+PROBE_STEP_BYTES = 64
+
+stats = {
+    "collections": 0,
+    "collect_us": 0,
+    "max_collect_us": 0,
+    "peak_alloc": 0,
+    "min_free": None,
+    "min_largest_free": None,
+}
+task_stats = {}
+# Heap in use right after the last collection.
+_baseline = [0]
+_log = log.get("Heap")
+
+
+def _new_task_stats():
+    return {
+        "runs": 0,
+        "measured": 0,
+        "last": 0,
+        "max": 0,
+        "total": 0,
+        "over_budget": 0,
+    }
+
+
+def _sample():
+    alloc = gc.mem_alloc()
+    free = gc.mem_free()
+    if alloc > stats["peak_alloc"]:
+        stats["peak_alloc"] = alloc
+    if stats["min_free"] is None or free < stats["min_free"]:
+        stats["min_free"] = free
+    # Less in use than after our last collection: the VM collected by itself.
+    if alloc < _baseline[0]:
+        _baseline[0] = alloc
+    return alloc
+
+
+def init():
+    try:
+        gc.threshold(HEAP_GC_THRESHOLD_BYTES)
+    except AttributeError:
+        pass
+    collect()
+
+
+def collect():
+    started = time.ticks_us()
+    gc.collect()
+    elapsed = time.ticks_diff(time.ticks_us(), started)
+    stats["collections"] += 1
+    stats["collect_us"] += elapsed
+    if elapsed > stats["max_collect_us"]:
+        stats["max_collect_us"] = elapsed
+    _baseline[0] = gc.mem_alloc()
+
+
+def maybe_collect():
+    # Called where a pause costs nothing, so the automatic collection at
+    # gc.threshold() rarely has to run in the middle of a bus transfer.
+    alloc = _sample()
+    if (
+        alloc - _baseline[0] >= HEAP_IDLE_COLLECT_BYTES
+        or gc.mem_free() < HEAP_LOW_WATER_BYTES
+    ):
+        collect()
+        return True
+    return False
+
+
+def budget(name):
+    return HEAP_TASK_BUDGETS.get(name, HEAP_DEFAULT_BUDGET_BYTES)
+
+
+def record(name, before):
+    after = _sample()
+    task = task_stats.get(name)
+    if task is None:
+        task = task_stats[name] = _new_task_stats()
+    task["runs"] += 1
+    # A collection during the task hides what it allocated; skip the run
+    # rather than count a figure that is too low.
+    if after < before:
+        return
+    allocated = after - before
+    task["measured"] += 1
+    task["last"] = allocated
+    task["total"] += allocated
+    limit = budget(name)
+    if allocated > limit:
+        task["over_budget"] += 1
+        if allocated > task["max"]:
+            _log.warning("%s allocated %d bytes (budget %d)", name, allocated, limit)
+    if allocated > task["max"]:
+        task["max"] = allocated
+
+
+def run(name, func, *args):
+    before = gc.mem_alloc()
+    try:
+        return func(*args)
+    finally:
+        record(name, before)
+
+
+async def run_async(name, func, *args):
+    # For coroutine functions. Whatever other tasks allocate while this one
+    # waits is counted against it too, so its figures are an upper bound.
+    before = gc.mem_alloc()
+    try:
+        return await func(*args)
+    finally:
+        record(name, before)
+
+
+def largest_free_block():
+    # MicroPython cannot report this, so find the biggest bytearray that can
+    # still be allocated. A failed allocation makes the VM collect and retry
+    # before giving up, which also returns the earlier probes to the pool.
+    low, high = 0, gc.mem_free()
+    while high - low > PROBE_STEP_BYTES:
+        size = (low + high) // 2
+        try:
+            block = bytearray(size)
+        except MemoryError:
+            high = size
+            continue
+        del block
+        low = size
+    return low
+
+
+def print_stats():
+    largest = largest_free_block()
+    if stats["min_largest_free"] is None or largest < stats["min_largest_free"]:
+        stats["min_largest_free"] = largest
+    free = gc.mem_free()
+    fragmentation = 100 - largest * 100 // free if free else 0
+    collections = stats["collections"]
+    average = stats["collect_us"] // collections if collections else 0
+    print(
+        f"[Heap] free={free} alloc={gc.mem_alloc()} peak={stats['peak_alloc']} "
+        f"min_free={stats['min_free']} largest_block={largest} "
+        f"min_largest_block={stats['min_largest_free']} "
+        f"fragmentation={max(0, fragmentation)}%"
+    )
+    print(
+        f"[Heap] collections={collections} avg={average}us "
+        f"max={stats['max_collect_us']}us"
+    )
+    for name, task in task_stats.items():
+        measured = task["measured"]
+        average = task["total"] // measured if measured else 0
+        print(
+            f"[Heap] {name}: runs={task['runs']} last={task['last']} "
+            f"avg={average} max={task['max']} budget={budget(name)} "
+            f"over_budget={task['over_budget']}"
+        )
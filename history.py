@@ -0,0 +1,259 @@
+from array import array
+
+CHANNELS = ("pressure", "temperature", "humidity")
+
+
+class MonotonicQueue:
+    # Indices of window samples kept in monotonic order so the window
+    # minimum (or maximum) is always at the head. Amortised O(1) per sample.
+
+    def __init__(self, capacity, keep_smaller):
+        self.seqs = array("I", [0] * capacity)
+        self.capacity = capacity
+        self.keep_smaller = keep_smaller
+        self.head = 0
+        self.size = 0
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def _at(self, offset):
+        return self.seqs[(self.head + offset) % self.capacity]
+
+    def push(self, seq, value, values):
+        capacity = self.capacity
+        while self.size:
+            tail_value = values[self._at(self.size - 1) % capacity]
+            if self.keep_smaller:
+                if tail_value < value:
+                    break
+            elif tail_value > value:
+                break
+            self.size -= 1
+        self.seqs[(self.head + self.size) % capacity] = seq
+        self.size += 1
+
+    def expire(self, oldest_seq):
+        while self.size and self.seqs[self.head] < oldest_seq:
+            self.head = (self.head + 1) % self.capacity
+            self.size -= 1
+
+    def front(self, values):
+        if not self.size:
+            return None
+        return values[self.seqs[self.head] % self.capacity]
+
+
+class Channel:
+    def __init__(self, capacity):
+        self.values = array("f", bytes(4 * capacity))
+        self.capacity = capacity
+        self._min = MonotonicQueue(capacity, True)
+        self._max = MonotonicQueue(capacity, False)
+        self.sum_y = 0.0
+        self.sum_ty = 0.0
+
+    def clear(self):
+        self._min.clear()
+        self._max.clear()
+        self.sum_y = 0.0
+        self.sum_ty = 0.0
+
+    @property
+    def minimum(self):
+        return self._min.front(self.values)
+
+    @property
+    def maximum(self):
+        return self._max.front(self.values)
+
+
+class WeatherHistory:
+    # Fixed-capacity ring of timestamped pressure/temperature/humidity
+    # samples. Sums for the mean and the least-squares slope are updated on
+    # every append/evict; times are kept relative to the oldest sample so the
+    # single-precision sums stay small.
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("I", [0] * capacity)
+        self.channels = {name: Channel(capacity) for name in CHANNELS}
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.next_seq = 0
+        self.base_time = 0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        for channel in self.channels.values():
+            channel.clear()
+
+    def __len__(self):
+        return self.count
+
+    def channel(self, name):
+        return self.channels[name]
+
+    def _slot(self, seq):
+        return seq % self.capacity
+
+    def oldest_seq(self):
+        return self.next_seq - self.count
+
+    def append(self, timestamp, pressure, temperature, humidity):
+        timestamp = int(timestamp)
+        if self.count == self.capacity:
+            self._evict_oldest()
+        if self.count == 0:
+            self.base_time = timestamp
+
+        seq = self.next_seq
+        slot = self._slot(seq)
+        t = float(timestamp - self.base_time)
+        self.times[slot] = timestamp
+        self.sum_t += t
+        self.sum_tt += t * t
+
+        for name, value in zip(CHANNELS, (pressure, temperature, humidity)):
+            channel = self.channels[name]
+            channel.values[slot] = value
+            value = channel.values[slot]
+            channel.sum_y += value
+            channel.sum_ty += t * value
+            channel._min.push(seq, value, channel.values)
+            channel._max.push(seq, value, channel.values)
+
+        self.next_seq = seq + 1
+        self.count += 1
+
+        # Incremental sums drift in single precision; rebuild them once per
+        # lap of the ring, which keeps the amortised cost constant.
+        if self.next_seq % self.capacity == 0:
+            self._rebuild_sums()
+
+    def _evict_oldest(self):
+        seq = self.oldest_seq()
+        slot = self._slot(seq)
+        t = float(self.times[slot] - self.base_time)
+        self.sum_t -= t
+        self.sum_tt -= t * t
+        for channel in self.channels.values():
+            value = channel.values[slot]
+            channel.sum_y -= value
+            channel.sum_ty -= t * value
+        self.count -= 1
+        for channel in self.channels.values():
+            channel._min.expire(seq + 1)
+            channel._max.expire(seq + 1)
+
+        if self.count:
+            self._rebase(self.times[self._slot(seq + 1)])
+        else:
+            self.clear()
+
+    def expire(self, oldest_allowed_time):
+        while self.count and self.oldest_time() < oldest_allowed_time:
+            self._evict_oldest()
+
+    def _rebase(self, new_base):
+        shift = float(new_base - self.base_time)
+        if not shift:
+            return
+        n = self.count
+        self.sum_tt += -2.0 * shift * self.sum_t + n * shift * shift
+        self.sum_t -= n * shift
+        for channel in self.channels.values():
+            channel.sum_ty -= shift * channel.sum_y
+        self.base_time = new_base
+
+    def _rebuild_sums(self):
+        if not self.count:
+            return
+        first = self.oldest_seq()
+        self.base_time = self.times[self._slot(first)]
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        for channel in self.channels.values():
+            channel.sum_y = 0.0
+            channel.sum_ty = 0.0
+        for seq in range(first, self.next_seq):
+            slot = self._slot(seq)
+            t = float(self.times[slot] - self.base_time)
+            self.sum_t += t
+            self.sum_tt += t * t
+            for channel in self.channels.values():
+                value = channel.values[slot]
+                channel.sum_y += value
+                channel.sum_ty += t * value
+
+    def oldest(self, name):
+        if not self.count:
+            return None
+        return self.channels[name].values[self._slot(self.oldest_seq())]
+
+    def newest(self, name):
+        if not self.count:
+            return None
+        return self.channels[name].values[self._slot(self.next_seq - 1)]
+
+    def oldest_time(self):
+        if not self.count:
+            return None
+        return self.times[self._slot(self.oldest_seq())]
+
+    def newest_time(self):
+        if not self.count:
+            return None
+        return self.times[self._slot(self.next_seq - 1)]
+
+    def span_seconds(self):
+        if self.count < 2:
+            return 0
+        return self.newest_time() - self.oldest_time()
+
+    def change(self, name):
+        if self.count < 2:
+            return None
+        return self.newest(name) - self.oldest(name)
+
+    def mean(self, name):
+        if not self.count:
+            return None
+        return self.channels[name].sum_y / self.count
+
+    def minimum(self, name):
+        return self.channels[name].minimum if self.count else None
+
+    def maximum(self, name):
+        return self.channels[name].maximum if self.count else None
+
+    def slope(self, name):
+        # Least-squares slope in units per second.
+        n = self.count
+        if n < 2:
+            return None
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0:
+            return None
+        channel = self.channels[name]
+        return (n * channel.sum_ty - self.sum_t * channel.sum_y) / denominator
+
+    def slope_per_hour(self, name):
+        slope = self.slope(name)
+        return None if slope is None else slope * 3600
+
+    def samples(self):
+        for seq in range(self.oldest_seq(), self.next_seq):
+            slot = self._slot(seq)
+            yield (
+                self.times[slot],
+                self.channels["pressure"].values[slot],
+                self.channels["temperature"].values[slot],
+                self.channels["humidity"].values[slot],
+            )
+
+    def memory_bytes(self):
+        # times + three value arrays + two index queues per channel
+        return self.capacity * 4 * (1 + len(CHANNELS) * 3)
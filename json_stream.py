@@ -0,0 +1,276 @@
+_WHITESPACE = b" \t\r\n"
+_NUMBER_CHARS = b"+-0123456789.eE"
+_ESCAPES = {
+    ord('"'): '"',
+    ord("\\"): "\\",
+    ord("/"): "/",
+    ord("b"): "\b",
+    ord("f"): "\f",
+    ord("n"): "\n",
+    ord("r"): "\r",
+    ord("t"): "\t",
+}
+
+stats = {"bytes_read": 0, "reads": 0}
+
+
+class JSONStreamError(ValueError):
+    pass
+
+
+class _Done(Exception):
+    pass
+
+
+class _Reader:
+    def __init__(self, stream, chunk_size):
+        self.pos = 0
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            # Already in memory: parsed in place, nothing to fill.
+            self.stream = None
+            self.buf = stream
+            self.length = len(stream)
+            return
+        self.stream = stream
+        self.buf = bytearray(chunk_size)
+        self.length = 0
+        self._readinto = getattr(stream, "readinto", None)
+
+    def _fill(self):
+        if self.stream is None:
+            return False
+        if self._readinto is not None:
+            n = self._readinto(self.buf)
+        else:
+            data = self.stream.read(len(self.buf))
+            n = len(data) if data else 0
+            self.buf[:n] = data if n else b""
+        stats["reads"] += 1
+        if not n:
+            return False
+        stats["bytes_read"] += n
+        self.length = n
+        self.pos = 0
+        return True
+
+    def peek(self):
+        if self.pos >= self.length and not self._fill():
+            return -1
+        return self.buf[self.pos]
+
+    def next(self):
+        ch = self.peek()
+        self.pos += 1
+        return ch
+
+    def skip_whitespace(self):
+        ch = self.peek()
+        while ch != -1 and ch in _WHITESPACE:
+            self.pos += 1
+            ch = self.peek()
+        return ch
+
+    def expect(self, ch):
+        if self.skip_whitespace() != ch:
+            raise JSONStreamError(f"expected '{chr(ch)}'")
+        self.pos += 1
+
+
+class _Extractor:
+    # Recursive-descent walk over the stream that only materialises values
+    # whose path was requested; everything else is skipped byte by byte.
+
+    def __init__(self, reader, paths):
+        self.reader = reader
+        self.paths = [tuple(path) for path in paths]
+        self.results = {}
+
+    def _is_target(self, path):
+        return path in self.paths
+
+    def _is_prefix(self, path):
+        depth = len(path)
+        for wanted in self.paths:
+            if len(wanted) > depth and wanted[:depth] == path:
+                return True
+        return False
+
+    def walk(self, path):
+        if self._is_target(path):
+            self.results[path] = self.parse_value()
+            if len(self.results) == len(self.paths):
+                raise _Done()
+        elif self._is_prefix(path):
+            self.descend(path)
+        else:
+            self.skip_value()
+
+    def descend(self, path):
+        reader = self.reader
+        ch = reader.skip_whitespace()
+        if ch == ord("{"):
+            reader.pos += 1
+            if reader.skip_whitespace() == ord("}"):
+                reader.pos += 1
+                return
+            while True:
+                key = self.parse_string()
+                reader.expect(ord(":"))
+                self.walk(path + (key,))
+                ch = reader.skip_whitespace()
+                reader.pos += 1
+                if ch == ord("}"):
+                    return
+                if ch != ord(","):
+                    raise JSONStreamError("expected ',' or '}'")
+        elif ch == ord("["):
+            reader.pos += 1
+            if reader.skip_whitespace() == ord("]"):
+                reader.pos += 1
+                return
+            index = 0
+            while True:
+                self.walk(path + (index,))
+                index += 1
+                ch = reader.skip_whitespace()
+                reader.pos += 1
+                if ch == ord("]"):
+                    return
+                if ch != ord(","):
+                    raise JSONStreamError("expected ',' or ']'")
+        else:
+            self.skip_value()
+
+    def skip_value(self):
+        reader = self.reader
+        ch = reader.skip_whitespace()
+        if ch == ord('"'):
+            self.skip_string()
+        elif ch == ord("{") or ch == ord("["):
+            depth = 0
+            while True:
+                ch = reader.peek()
+                if ch == -1:
+                    raise JSONStreamError("unexpected end of stream")
+                if ch == ord('"'):
+                    self.skip_string()
+                    continue
+                reader.pos += 1
+                if ch == ord("{") or ch == ord("["):
+                    depth += 1
+                elif ch == ord("}") or ch == ord("]"):
+                    depth -= 1
+                    if not depth:
+                        return
+        else:
+            self.parse_scalar()
+
+    def skip_string(self):
+        reader = self.reader
+        reader.pos += 1
+        while True:
+            ch = reader.next()
+            if ch == -1:
+                raise JSONStreamError("unterminated string")
+            if ch == ord("\\"):
+                reader.next()
+            elif ch == ord('"'):
+                return
+
+    def parse_string(self):
+        reader = self.reader
+        if reader.skip_whitespace() != ord('"'):
+            raise JSONStreamError("expected string")
+        reader.pos += 1
+        out = bytearray()
+        while True:
+            ch = reader.next()
+            if ch == -1:
+                raise JSONStreamError("unterminated string")
+            if ch == ord('"'):
+                return out.decode()
+            if ch == ord("\\"):
+                ch = reader.next()
+                if ch == ord("u"):
+                    code = int(bytes(reader.next() for _ in range(4)).decode(), 16)
+                    out.extend(chr(code).encode())
+                elif ch in _ESCAPES:
+                    out.extend(_ESCAPES[ch].encode())
+                else:
+                    raise JSONStreamError("invalid escape")
+            else:
+                out.append(ch)
+
+    def parse_scalar(self):
+        reader = self.reader
+        ch = reader.skip_whitespace()
+        token = bytearray()
+        while ch != -1 and (ch in _NUMBER_CHARS or ord("a") <= ch <= ord("z")):
+            token.append(ch)
+            reader.pos += 1
+            ch = reader.peek()
+        text = token.decode()
+        if text == "null":
+            return None
+        if text == "true":
+            return True
+        if text == "false":
+            return False
+        try:
+            if "." in text or "e" in text or "E" in text:
+                return float(text)
+            return int(text)
+        except ValueError:
+            raise JSONStreamError(f"invalid token {text}")
+
+    def parse_value(self):
+        reader = self.reader
+        ch = reader.skip_whitespace()
+        if ch == ord('"'):
+            return self.parse_string()
+        if ch == ord("["):
+            reader.pos += 1
+            items = []
+            if reader.skip_whitespace() == ord("]"):
+                reader.pos += 1
+                return items
+            while True:
+                items.append(self.parse_value())
+                ch = reader.skip_whitespace()
+                reader.pos += 1
+                if ch == ord("]"):
+                    return items
+                if ch != ord(","):
+                    raise JSONStreamError("expected ',' or ']'")
+        if ch == ord("{"):
+            reader.pos += 1
+            items = {}
+            if reader.skip_whitespace() == ord("}"):
+                reader.pos += 1
+                return items
+            while True:
+                key = self.parse_string()
+                reader.expect(ord(":"))
+                items[key] = self.parse_value()
+                ch = reader.skip_whitespace()
+                reader.pos += 1
+                if ch == ord("}"):
+                    return items
+                if ch != ord(","):
+                    raise JSONStreamError("expected ',' or '}'")
+        if ch == -1:
+            raise JSONStreamError("unexpected end of stream")
+        return self.parse_scalar()
+
+
+def extract(stream, paths, chunk_size=128):
+    # Returns {path: value} for the requested paths, e.g.
+    # extract(sock, [("daily", "time"), ("daily", "weather_code")]).
+    # Reading stops as soon as every path has been found. A bytes-like
+    # object is parsed in place instead of read.
+    extractor = _Extractor(_Reader(stream, chunk_size), paths)
+    try:
+        extractor.walk(())
+    except _Done:
+        pass
+    return extractor.results
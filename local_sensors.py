@@ -1,21 +1,23 @@
 import re
 import time
+from collections import namedtuple
 
 import bme280
 import ds18x20
 import machine
 import onewire
-from machine import Pin, SoftI2C
+
+import buses
+import log
+import time_service
 
 DS18X20_PIN = 15
-BME280_SCL = 5
-BME280_SDA = 4
 
 dat = machine.Pin(DS18X20_PIN)
 ow = onewire.OneWire(dat)
 ds = ds18x20.DS18X20(ow)
 
-bme = bme280.BME280(i2c=SoftI2C(scl=Pin(BME280_SCL), sda=Pin(BME280_SDA)))
+bme = bme280.BME280(i2c=buses.get("bme280"))
 
 
 def extract_numeric_value(value_str):
@@ -28,43 +30,188 @@ def extract_numeric_value(value_str):
     return None
 
 
-def read_ds_sensor(ds_sensor):
+def _new_bus_stats():
+    return {"count": 0, "errors": 0, "total_us": 0, "last_us": 0, "max_us": 0}
+
+
+bus_stats = {
+    "bme280": _new_bus_stats(),
+    "onewire_scan": _new_bus_stats(),
+    "ds18x20": _new_bus_stats(),
+}
+
+SensorSnapshot = namedtuple(
+    "SensorSnapshot",
+    (
+        "timestamp",
+        "outside_temp_C",
+        "outside_temps",
+        "inside_temp_C",
+        "humidity",
+        "pressure_hPa",
+        "pressure_mmHg",
+    ),
+)
+
+MMHG_PER_HPA = 0.7500616827
+PRESSURE_OFFSET_MMHG = 33
+
+# 12-bit DS18x20 conversion time.
+DS18X20_CONVERSION_MS = 750
+# With no probes found, the bus is scanned again on every Nth conversion
+# attempt: a probe plugged in late is picked up without a reboot, and an
+# empty bus does not cost a scan every cycle.
+DS18X20_RESCAN_EVERY = 10
+
+_ds_roms = None
+_ds_attempts_without_roms = 0
+_ds_conversion_started = None
+ds_temperatures = []
+_log = log.get("Sensors")
+
+
+def timed_bus_call(bus, func):
+    stats = bus_stats[bus]
+    started = time.ticks_us()
     try:
-        roms = ds_sensor.scan()
+        return func()
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        elapsed = time.ticks_diff(time.ticks_us(), started)
+        stats["count"] += 1
+        stats["total_us"] += elapsed
+        stats["last_us"] = elapsed
+        if elapsed > stats["max_us"]:
+            stats["max_us"] = elapsed
+
+
+def print_bus_stats():
+    for bus, stats in bus_stats.items():
+        average_us = stats["total_us"] // stats["count"] if stats["count"] else 0
+        print(
+            f"[Sensors] {bus}: count={stats['count']} errors={stats['errors']} "
+            f"avg={average_us}us last={stats['last_us']}us max={stats['max_us']}us"
+        )
+
+
+def scan_ds_roms(force=False):
+    global _ds_roms
+    if _ds_roms is None or force:
+        try:
+            _ds_roms = timed_bus_call("onewire_scan", ds.scan)
+        except Exception as e:
+            _log.error("Sensor scan failed: %s", e)
+            _ds_roms = []
+    return _ds_roms
+
+
+def start_ds_conversion():
+    global _ds_conversion_started, _ds_attempts_without_roms
+    roms = scan_ds_roms()
+    if not roms:
+        _ds_attempts_without_roms += 1
+        if _ds_attempts_without_roms < DS18X20_RESCAN_EVERY:
+            return False
+        _ds_attempts_without_roms = 0
+        roms = scan_ds_roms(force=True)
         if not roms:
-            print("No DS18x20 sensors found!")
-            return "DS18x20 Error"
+            return False
+    timed_bus_call("ds18x20", ds.convert_temp)
+    _ds_conversion_started = time.ticks_ms()
+    return True
 
-        ds_sensor.convert_temp()
-        time.sleep_ms(750)
 
-        for rom in roms:
-            try:
-                tempC = ds_sensor.read_temp(rom)
-                rounded = round(tempC)
-                return rounded
-            except Exception as e:
-                print(f"Error reading DS18x20 sensor: {e}")
-                return "DS18x20 Read Error"
+def ds_conversion_pending():
+    return _ds_conversion_started is not None
 
+
+def ds_conversion_ready():
+    return (
+        _ds_conversion_started is not None
+        and time.ticks_diff(time.ticks_ms(), _ds_conversion_started)
+        >= DS18X20_CONVERSION_MS
+    )
+
+
+def collect_ds_temperatures():
+    global _ds_conversion_started, ds_temperatures
+    if not ds_conversion_ready():
+        return None
+    _ds_conversion_started = None
+
+    temperatures = []
+    read_failed = False
+    for rom in scan_ds_roms():
+        try:
+            temperatures.append(
+                (rom, timed_bus_call("ds18x20", lambda: ds.read_temp(rom)))
+            )
+        except Exception as e:
+            _log.error("Error reading DS18x20 sensor %s: %s", rom, e)
+            read_failed = True
+
+    if read_failed:
+        scan_ds_roms(force=True)
+    ds_temperatures = temperatures
+    return temperatures
+
+
+def poll_ds_sensors():
+    try:
+        collect_ds_temperatures()
+        if not ds_conversion_pending() and not start_ds_conversion():
+            ds_temperatures.clear()
     except Exception as e:
-        print(f"Sensor scan failed: {e}")
+        _log.error("Error polling DS18x20 sensors: %s", e)
+    return ds_temperatures
+
+
+def read_ds_sensor():
+    try:
+        if not start_ds_conversion():
+            _log.warning("No DS18x20 sensors found!")
+            return "DS18x20 Error"
+
+        time.sleep_ms(DS18X20_CONVERSION_MS)
+        temperatures = collect_ds_temperatures()
+        if not temperatures:
+            return "DS18x20 Read Error"
+        return round(temperatures[0][1])
+
+    except Exception as e:
+        _log.error("Sensor scan failed: %s", e)
         return "DS18x20 Scan Error"
 
 
 def read_bme280_values():
     try:
-        return bme.values
+        return timed_bus_call("bme280", lambda: bme.values)
     except Exception as e:
-        print(f"Error reading BME280 values: {e}")
+        _log.error("Error reading BME280 values: %s", e)
         return None
 
 
+def _strip_units(value):
+    if isinstance(value, str):
+        return float(value.rstrip("ChPa% "))
+    return float(value)
+
+
+def parse_bme280_values(values):
+    temp, pressure_hPa, hum = values
+    return _strip_units(temp), _strip_units(hum), _strip_units(pressure_hPa)
+
+
+def hpa_to_mmhg(pressure_hPa):
+    return pressure_hPa * MMHG_PER_HPA + PRESSURE_OFFSET_MMHG
+
+
 def read_bme280_temperature():
     values = read_bme280_values()
     if values:
-        temp, _, _ = values
-        temp_value = float(temp[:-1]) if isinstance(temp, str) else temp
+        temp_value, _, _ = parse_bme280_values(values)
         return round(temp_value)
     return "Temp Error"
 
@@ -72,8 +219,7 @@ def read_bme280_temperature():
 def read_bme280_humidity():
     values = read_bme280_values()
     if values:
-        _, _, hum = values
-        hum_value = float(hum[:-1]) if isinstance(hum, str) else hum
+        _, hum_value, _ = parse_bme280_values(values)
         return round(hum_value)
     return "Humidity Error"
 
@@ -81,21 +227,54 @@ def read_bme280_humidity():
 def read_bme280_pressure():
     values = read_bme280_values()
     if values:
-        _, pressure_hPa, _ = values
-        pressure_value = (
-            float(pressure_hPa[:-3]) if isinstance(pressure_hPa, str) else pressure_hPa
-        )
-        conversion_factor = 0.7500616827
-        pressure_mmHg = round(pressure_value * conversion_factor) + 33
-        return round(pressure_mmHg)
+        _, _, pressure_value = parse_bme280_values(values)
+        return round(hpa_to_mmhg(pressure_value))
     return "Pressure Error"
 
 
+def read_snapshot():
+    # Non-blocking: returns the conversion started on the previous tick and
+    # kicks off the next one.
+    outside_temps = tuple(temp for _, temp in poll_ds_sensors())
+    outside_temp = outside_temps[0] if outside_temps else None
+
+    inside_temp = humidity = pressure_hPa = pressure_mmHg = None
+    values = read_bme280_values()
+    if values:
+        try:
+            inside_temp, humidity, pressure_hPa = parse_bme280_values(values)
+            pressure_mmHg = hpa_to_mmhg(pressure_hPa)
+        except (TypeError, ValueError) as e:
+            _log.error("Error parsing BME280 values: %s", e)
+
+    # UTC, so the log and the tendency window stay in order across DST.
+    return SensorSnapshot(
+        time_service.utc_now(),
+        outside_temp,
+        outside_temps,
+        inside_temp,
+        humidity,
+        pressure_hPa,
+        pressure_mmHg,
+    )
+
+
+def snapshot_to_observation(snapshot):
+    observation = {}
+    if snapshot.outside_temp_C is not None:
+        observation["outside_temp_C"] = f"{round(snapshot.outside_temp_C)}C"
+    if snapshot.inside_temp_C is not None:
+        observation["inside_temp_C"] = f"{round(snapshot.inside_temp_C)}C"
+        observation["humidity_%"] = f"{round(snapshot.humidity)}%"
+        observation["pressure_mmHg"] = f"{round(snapshot.pressure_mmHg)}"
+    return observation
+
+
 def observations():
     try:
         print("Initializing sensors...")
 
-        ds_available = ds.scan()
+        ds_available = scan_ds_roms()
         bme_available = read_bme280_values() is not None
 
         if not ds_available:
@@ -109,31 +288,17 @@ def observations():
 
         print("Starting observation loop. Reading every 5 minutes...\n")
 
+        if ds_available:
+            start_ds_conversion()
+            time.sleep_ms(DS18X20_CONVERSION_MS)
+
         while True:
             try:
-                observations = {}
-
-                if ds_available:
-                    temp_out = read_ds_sensor(ds)
-                    print(f"Temperature outside: {temp_out}C")
-                    observations["outside_temp_C"] = temp_out
-
-                if bme_available:
-                    temp_in = read_bme280_temperature()
-                    humidity = read_bme280_humidity()
-                    pressure = read_bme280_pressure()
-
-                    print(f"Temperature inside: {temp_in}C")
-                    print(f"Humidity inside: {humidity}%")
-                    print(f"Pressure inside: {pressure} mmHg")
-                    print("-" * 40)
-                    print()
-
-                    observations["inside_temp_C"] = temp_in
-                    observations["humidity_%"] = humidity
-                    observations["pressure_mmHg"] = pressure
+                snapshot = read_snapshot()
+                observations = snapshot_to_observation(snapshot)
 
                 print("Observations:", observations)
+                print_bus_stats()
                 print("-" * 40)
 
             except Exception as loop_error:
@@ -147,33 +312,24 @@ def observations():
     return observations
 
 
-def get_latest_observation():
-    try:
-        observation = {}
+def print_observation(observation):
+    if "outside_temp_C" in observation:
+        _log.debug("Temperature outside: %s", observation["outside_temp_C"])
 
-        ds_available = ds.scan()
-        bme_available = read_bme280_values() is not None
+    if "inside_temp_C" in observation:
+        _log.debug("Temperature inside: %s", observation["inside_temp_C"])
+        _log.debug("Humidity inside: %s", observation["humidity_%"])
+        _log.debug("Pressure inside: %s mmHg", observation["pressure_mmHg"])
 
-        if ds_available:
-            temp_out = read_ds_sensor(ds)
-            print(f"Temperature outside: {temp_out}C")
-            observation["outside_temp_C"] = f"{temp_out}C"
-
-        if bme_available:
-            temp_in = read_bme280_temperature()
-            humidity = read_bme280_humidity()
-            pressure = read_bme280_pressure()
-
-            print(f"Temperature inside: {temp_in}C")
-            print(f"Humidity inside: {humidity}%")
-            print(f"Pressure inside: {pressure} mmHg")
-
-            observation["inside_temp_C"] = f"{temp_in}C"
-            observation["humidity_%"] = f"{humidity}%"
-            observation["pressure_mmHg"] = f"{pressure}"
 
+def get_latest_observation():
+    try:
+        snapshot = read_snapshot()
+        observation = snapshot_to_observation(snapshot)
+        if _log.enabled(log.DEBUG):
+            print_observation(observation)
         return observation
 
     except Exception as e:
-        print("Error getting observation:", e)
+        _log.error("Error getting observation: %s", e)
         return {}
@@ -0,0 +1,171 @@
+import time
+
+from config import (LOG_LEVEL, LOG_LEVELS, LOG_RATE_LIMIT_COUNT,
+                    LOG_RATE_LIMIT_WINDOW_MS, LOG_RING_LEVEL, LOG_RING_SIZE)
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_LETTERS = {DEBUG: "D", INFO: "I", WARNING: "W", ERROR: "E"}
+# Rate-limit windows kept at once; expired ones are dropped to make room.
+RATE_LIMIT_KEYS = 64
+
+stats = {"printed": 0, "stored": 0, "suppressed": 0, "format_errors": 0}
+
+# Entries are kept unformatted, (ticks_ms, level, tag, fmt, args), and only
+# formatted by dump(); an argument that is changed later shows its new value.
+_ring = [None] * LOG_RING_SIZE
+_ring_next = 0
+_ring_level = LEVEL_NAMES.get(LOG_RING_LEVEL, OFF)
+# (tag, fmt, name) -> [window start, messages in window, suppressed in window]
+_limits = {}
+_loggers = {}
+
+
+def level_value(name):
+    return LEVEL_NAMES.get(name, OFF)
+
+
+def _format(fmt, args):
+    if not args:
+        return fmt
+    try:
+        return fmt % args
+    except Exception:
+        stats["format_errors"] += 1
+        return f"{fmt} {args!r}"
+
+
+def _report(tag, state):
+    if state[2]:
+        print(f"[{tag}] ({state[2]} similar messages suppressed)")
+
+
+def _prune(now):
+    for key in list(_limits):
+        state = _limits[key]
+        if time.ticks_diff(now, state[0]) >= LOG_RATE_LIMIT_WINDOW_MS:
+            _report(key[0], state)
+            del _limits[key]
+    if len(_limits) >= RATE_LIMIT_KEYS:
+        _limits.clear()
+
+
+def _allowed(tag, fmt, args):
+    # Calls from the same place share a format string; with the tag and the
+    # first argument when it is a string (the task, job or server a shared
+    # message is about) that is the key, so one failing job cannot silence
+    # another. Once a key has been printed LOG_RATE_LIMIT_COUNT times in a
+    # window the rest are counted, and the count is reported when the next
+    # window opens.
+    now = time.ticks_ms()
+    key = (tag, fmt, args[0] if args and isinstance(args[0], str) else None)
+    state = _limits.get(key)
+    if state is None:
+        if len(_limits) >= RATE_LIMIT_KEYS:
+            _prune(now)
+        state = _limits[key] = [now, 0, 0]
+    elif time.ticks_diff(now, state[0]) >= LOG_RATE_LIMIT_WINDOW_MS:
+        _report(tag, state)
+        state[0] = now
+        state[1] = 0
+        state[2] = 0
+    state[1] += 1
+    if state[1] > LOG_RATE_LIMIT_COUNT:
+        state[2] += 1
+        stats["suppressed"] += 1
+        return False
+    return True
+
+
+def _store(level, tag, fmt, args):
+    global _ring_next
+    _ring[_ring_next] = (time.ticks_ms(), level, tag, fmt, args)
+    _ring_next = (_ring_next + 1) % LOG_RING_SIZE
+    stats["stored"] += 1
+
+
+class Logger:
+    # One per module tag, from get(). Nothing is formatted unless the level
+    # is enabled; for arguments that are expensive to build, check
+    # enabled() first, or prints() when the value only matters on the
+    # console (the ring is on at a lower level than most tags print).
+
+    def __init__(self, tag, level):
+        self.tag = tag
+        self.level = level
+
+    def enabled(self, level):
+        # Printed or stored in the ring.
+        return level >= self.level or level >= _ring_level
+
+    def prints(self, level):
+        return level >= self.level
+
+    def log(self, level, fmt, args):
+        if level < self.level and level < _ring_level:
+            return
+        # Only printing is rate-limited: the ring keeps every message, so a
+        # dump after a crash shows what the console left out.
+        if level >= _ring_level:
+            _store(level, self.tag, fmt, args)
+        if level >= self.level and _allowed(self.tag, fmt, args):
+            print(f"[{self.tag}] {_format(fmt, args)}")
+            stats["printed"] += 1
+
+    def debug(self, fmt, *args):
+        self.log(DEBUG, fmt, args)
+
+    def info(self, fmt, *args):
+        self.log(INFO, fmt, args)
+
+    def warning(self, fmt, *args):
+        self.log(WARNING, fmt, args)
+
+    def error(self, fmt, *args):
+        self.log(ERROR, fmt, args)
+
+
+def get(tag):
+    logger = _loggers.get(tag)
+    if logger is None:
+        level = level_value(LOG_LEVELS.get(tag, LOG_LEVEL))
+        logger = _loggers[tag] = Logger(tag, level)
+    return logger
+
+
+def set_level(tag, name):
+    get(tag).level = level_value(name)
+
+
+def entries():
+    # Oldest first.
+    for offset in range(LOG_RING_SIZE):
+        entry = _ring[(_ring_next + offset) % LOG_RING_SIZE]
+        if entry is not None:
+            yield entry
+
+
+def dump():
+    # The ring is only written by log calls, so it can be dumped from the
+    # REPL or an exception handler after the fact.
+    for ticks, level, tag, fmt, args in entries():
+        print(f"{ticks} {LEVEL_LETTERS[level]} [{tag}] {_format(fmt, args)}")
+
+
+def clear():
+    global _ring_next
+    for index in range(LOG_RING_SIZE):
+        _ring[index] = None
+    _ring_next = 0
+
+
+def print_stats():
+    print(
+        f"[Log] printed={stats['printed']} stored={stats['stored']} "
+        f"suppressed={stats['suppressed']} format_errors={stats['format_errors']}"
+    )
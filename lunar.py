@@ -0,0 +1,150 @@
+import math
+import struct
+
+MAGIC = b"WBMN"
+VERSION = 1
+
+# magic, version, reserved, lunation count
+HEADER_FORMAT = "<4sBBH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# New moon in seconds since 2000-01-01 00:00 UTC, then first quarter, full
+# moon and last quarter as minutes after that new moon.
+RECORD_FORMAT = "<IHHH"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+PHASE_EVENTS = ("new", "first-quarter", "full", "last-quarter")
+
+SYNODIC_MONTH_DAYS = 29.53058867
+# Mean new moon of 2000-01-06 18:14 UTC, in seconds since 2000-01-01.
+MEAN_EPOCH_SECONDS = 497640
+
+
+def pack_record(new_moon, first_quarter, full, last_quarter):
+    return struct.pack(
+        RECORD_FORMAT,
+        new_moon,
+        (first_quarter - new_moon + 30) // 60,
+        (full - new_moon + 30) // 60,
+        (last_quarter - new_moon + 30) // 60,
+    )
+
+
+def unpack_record(data):
+    new_moon, first_quarter, full, last_quarter = struct.unpack(RECORD_FORMAT, data)
+    return (
+        new_moon,
+        new_moon + first_quarter * 60,
+        new_moon + full * 60,
+        new_moon + last_quarter * 60,
+    )
+
+
+def build_table(lunations):
+    # lunations: (new, first quarter, full, last quarter) instants in
+    # seconds since 2000, in order. The last record only closes the previous
+    # lunation; its quarters are never read and may equal its new moon.
+    out = bytearray(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, len(lunations)))
+    for lunation in lunations:
+        out.extend(pack_record(*lunation))
+    return bytes(out)
+
+
+def mean_phase(seconds):
+    # The original model: a single mean synodic month from a fixed epoch.
+    # Off by up to ~14 hours at the principal phases; kept as the fallback
+    # when no table covers the date.
+    days = (seconds - MEAN_EPOCH_SECONDS) / 86400
+    age = math.fmod(days, SYNODIC_MONTH_DAYS)
+    if age < 0:
+        age += SYNODIC_MONTH_DAYS
+    return age / SYNODIC_MONTH_DAYS, age
+
+
+def illumination(phase):
+    return (1 - math.cos(2 * math.pi * phase)) / 2
+
+
+class LunarTable:
+    # Binary search over fixed-size records read straight from the file, so
+    # only the header and the lunation in use are kept in RAM. Consecutive
+    # lookups inside the same lunation are answered from that record.
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, count = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a lunar table")
+            if count < 2:
+                raise ValueError("lunar table too short")
+            self.count = count
+            self.first = self._read(f, 0)[0]
+            self.last = self._read(f, count - 1)[0]
+        self._current = None
+        self.stats = {"lookups": 0, "reads": 0}
+
+    def _read(self, f, index):
+        f.seek(HEADER_SIZE + index * RECORD_SIZE)
+        return unpack_record(f.read(RECORD_SIZE))
+
+    def covers(self, seconds):
+        return self.first <= seconds < self.last
+
+    def lunation(self, seconds):
+        # Returns (new, first quarter, full, last quarter, next new moon)
+        # for the lunation containing `seconds`.
+        self.stats["lookups"] += 1
+        current = self._current
+        if current is not None and current[0] <= seconds < current[4]:
+            return current
+        if not self.covers(seconds):
+            raise ValueError("date outside lunar table")
+
+        with open(self.path, "rb") as f:
+            low = 0
+            high = self.count - 1
+            while high - low > 1:
+                middle = (low + high) // 2
+                self.stats["reads"] += 1
+                if self._read(f, middle)[0] <= seconds:
+                    low = middle
+                else:
+                    high = middle
+            self.stats["reads"] += 2
+            record = self._read(f, low)
+            next_new = self._read(f, low + 1)[0]
+        self._current = record + (next_new,)
+        return self._current
+
+    def phase(self, seconds):
+        # Phase fraction is interpolated within each quarter, so it is
+        # exactly 0, 0.25, 0.5 and 0.75 at the principal phase instants.
+        # Returns (phase, age in days, next event name, next event time).
+        events = self.lunation(seconds)
+        for quarter in range(4):
+            if seconds < events[quarter + 1]:
+                break
+        start = events[quarter]
+        end = events[quarter + 1]
+        phase = (quarter + (seconds - start) / (end - start)) / 4
+        age = (seconds - events[0]) / 86400
+        return phase, age, PHASE_EVENTS[(quarter + 1) % 4], end
+
+
+def phase_name(phase):
+    if phase < 0.125:
+        return "new"
+    if phase < 0.25:
+        return "waxing-crescent"
+    if phase < 0.375:
+        return "first-quarter"
+    if phase < 0.5:
+        return "waxing-gibbous"
+    if phase < 0.625:
+        return "full"
+    if phase < 0.75:
+        return "waning-gibbous"
+    if phase < 0.875:
+        return "last-quarter"
+    return "waning-crescent"
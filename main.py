@@ -1,156 +1,237 @@
 import time
 
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import buses
 import forecast
+import heap
+import log
+import observation_bus
+import resolver
+import scheduler
+import sntp
+import telemetry
+import time_service
 import timekeeping
+import tz
 import wi_fi
 from config import (BLINK_INTERVAL_MS, CLOCK_DISPLAY_DURATION_SECONDS,
                     DISPLAY_UPDATE_INTERVAL, FORECAST_DISPLAY_DURATION_SECONDS,
-                    NTP_SYNC_INTERVAL_SECONDS, WEATHER_CHECK_INTERVAL,
-                    WIFI_RETRY_ATTEMPTS, WIFI_RETRY_DELAY)
-from display import (display_clock, display_main_loop, display_moon,
-                     display_reading, load_bitmap, load_moon_bitmap,
+                    FORECAST_INTERVAL, FORECAST_RETRY_SECONDS,
+                    MOON_DISPLAY_DURATION_SECONDS,
+                    NETWORK_BATCH_WINDOW_SECONDS, NETWORK_POWER_SAVE,
+                    NETWORK_RETRY_SECONDS, NTP_RETRY_SECONDS,
+                    NTP_SYNC_INTERVAL_SECONDS, OBSLOG_DIR, OBSLOG_FLUSH_EVERY,
+                    OBSLOG_INTERVAL_SECONDS, OBSLOG_RECORDS_PER_SEGMENT,
+                    OBSLOG_SEGMENTS, SENSOR_SAMPLE_INTERVAL, TELEMETRY_ENABLED,
+                    TELEMETRY_INTERVAL_SECONDS, TENDENCY_WINDOW_SECONDS,
+                    TIMEZONE, WEATHER_CHECK_INTERVAL, WIFI_STARTUP_WAIT_MS)
+from display import (display_clock, display_moon, display_reading,
+                     load_bitmap, observation_pages, print_display_stats,
                      set_led_color)
-from weather_change import check_weather_change
-
-
-def main_loop():
-    last_weather_check = 0
-    last_display_update = time.ticks_ms() - (DISPLAY_UPDATE_INTERVAL * 1000)
-    last_ntp_sync = 0
-    weather_change_info_cache = []
-    significant_change_level = 0
-    last_blink_time = 0
-    led_on = False
-    wifi_connected = False
-    clock_display_active = False
-    clock_display_start_time = 0
-    last_forecast_display = time.ticks_ms() - (FORECAST_DISPLAY_DURATION_SECONDS * 1000)
-
-    print("Attempting to connect to Wi-Fi for time sync and forecast...")
-    for attempt in range(WIFI_RETRY_ATTEMPTS):
+from local_sensors import print_observation, snapshot_to_observation
+from netjobs import NetworkJobs
+from obslog import ObservationLog
+from weather_change import check_weather_change, warm_start
+
+state = {
+    "weather_changes": [],
+    "significance": 0,
+    "led_on": False,
+}
+
+
+observation_log = None
+network_jobs = NetworkJobs(
+    wi_fi.manager,
+    NETWORK_POWER_SAVE,
+    NETWORK_BATCH_WINDOW_SECONDS * 1000,
+    NETWORK_RETRY_SECONDS * 1000,
+)
+_log = log.get("Main")
+
+
+def log_observation(snapshot):
+    if log.get("Sensors").enabled(log.DEBUG):
+        print_observation(snapshot_to_observation(snapshot))
+    if observation_log is not None:
         try:
-            if wi_fi.connect_wifi():
-                print("Wi-Fi connected successfully!")
-                wifi_connected = True
-                break
-            else:
-                print(
-                    f"Wi-Fi connection failed (attempt {attempt + 1}). Retrying in {WIFI_RETRY_DELAY} seconds..."
-                )
-                time.sleep(WIFI_RETRY_DELAY)
+            observation_log.log_snapshot(snapshot, OBSLOG_INTERVAL_SECONDS)
         except Exception as e:
-            print(
-                f"An error occurred during Wi-Fi connection (attempt {attempt + 1}): {e}"
-            )
-            time.sleep(WIFI_RETRY_DELAY)
-
-    if wifi_connected:
-        print("Attempting initial time synchronization from NTP...")
-        try:
-            if timekeeping.sync_rtc_from_ntp("Europe/Lviv"):
-                print("RTC synchronized from NTP successfully.")
-                last_ntp_sync = time.time()
-            else:
-                print("Initial NTP synchronization failed. Using RTC time.")
-        except Exception as e:
-            print(f"Error during initial NTP sync: {e}")
-            print("Using RTC time.")
+            _log.error("Error writing observation log: %s", e)
+
+
+def open_observation_log():
+    global observation_log
+    try:
+        observation_log = ObservationLog(
+            OBSLOG_DIR, OBSLOG_SEGMENTS, OBSLOG_RECORDS_PER_SEGMENT, OBSLOG_FLUSH_EVERY
+        )
+        warm_start(
+            observation_log.records(time_service.utc_now() - TENDENCY_WINDOW_SECONDS)
+        )
+    except Exception as e:
+        _log.error("Error opening observation log: %s", e)
+
+
+def update_weather_change():
+    try:
+        weather_changes, significance = check_weather_change()
+    except Exception as e:
+        _log.error("Error checking weather change: %s", e)
+        weather_changes, significance = [], 0
+
+    if weather_changes:
+        _log.info("Weather Changes Detected: %s", weather_changes)
+        state["weather_changes"] = weather_changes
+        state["significance"] = significance
+    else:
+        state["weather_changes"] = []
+        state["significance"] = 0
+
+
+async def sync_time():
+    if not wi_fi.is_connected():
+        return NTP_RETRY_SECONDS * 1000
+    _log.info("Attempting time synchronization from NTP...")
+    # Anchor the local clock on an RTC second edge so the measured offset is
+    # good to milliseconds, not to a second.
+    await time_service.sync_aligned()
+    if await timekeeping.sync_rtc_from_ntp(TIMEZONE, time_service.utc_now_ms):
+        time_service.sync()
+        _log.info("RTC synchronized from NTP successfully.")
+        interval = timekeeping.ntp_drift.next_interval()
+        # Check the clock again right after each DST change, however good
+        # the drift estimate: an RTC set to local time by hand shows up then.
+        now = time_service.utc_now()
+        change = tz.get_zone(TIMEZONE).next_transition(now)
+        if change is not None and change - now + 60 < interval:
+            interval = change - now + 60
+        return interval * 1000
+    _log.warning("NTP synchronization failed. Using RTC time.")
+    return NTP_RETRY_SECONDS * 1000
+
+
+async def fetch_forecast():
+    if not wi_fi.is_connected():
+        return FORECAST_RETRY_SECONDS * 1000
+    await forecast.refresh_forecast()
+    return forecast.next_refresh_delay() * 1000
+
+
+def blink_led():
+    significant_change_level = state["significance"]
+    if significant_change_level == 2:
+        state["led_on"] = not state["led_on"]
+        set_led_color(1 if state["led_on"] else 0, 0, 0)
+    elif significant_change_level == 1:
+        set_led_color(0, 0, 0.2)
     else:
-        print("Wi-Fi not connected. Using RTC time.")
+        set_led_color(0, 0.2, 0)
+
+
+async def show_clock(duration_seconds):
+    shown_minute = None
+    deadline = time.ticks_add(time.ticks_ms(), duration_seconds * 1000)
+    while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        current_time = time_service.localtime()
+        if current_time[4] != shown_minute:
+            heap.run("display_clock", display_clock, current_time)
+            shown_minute = current_time[4]
+        await asyncio.sleep(1)
+
 
+async def rotate_display():
     while True:
         try:
-            current_time_ms = time.ticks_ms()
-            current_time_seconds = time.time()
-
-            if (
-                wifi_connected
-                and current_time_seconds - last_ntp_sync >= NTP_SYNC_INTERVAL_SECONDS
-            ):
-                print("Attempting weekly time synchronization from NTP...")
-                try:
-                    if timekeeping.sync_rtc_from_ntp("Europe/Lviv"):
-                        print("RTC synchronized from NTP successfully.")
-                        last_ntp_sync = current_time_seconds
-                    else:
-                        print("Weekly NTP synchronization failed.")
-                except Exception as e:
-                    print(f"Error during weekly NTP sync: {e}")
-
-            if (
-                time.ticks_diff(current_time_ms, last_weather_check)
-                >= WEATHER_CHECK_INTERVAL * 1000
-            ):
-                try:
-                    weather_changes, significance = check_weather_change()
-                    last_weather_check = current_time_ms
-
-                    if weather_changes:
-                        print(f"Weather Changes Detected: {weather_changes}")
-                        weather_change_info_cache = weather_changes
-                        significant_change_level = significance
-                    else:
-                        weather_change_info_cache = []
-                        significant_change_level = 0
-
-                except Exception as e:
-                    print(f"Error checking weather change: {e}")
-                    weather_change_info_cache = []
-                    significant_change_level = 0
-
-            if significant_change_level == 2:
-                if (
-                    time.ticks_diff(current_time_ms, last_blink_time)
-                    >= BLINK_INTERVAL_MS
-                ):
-                    led_on = not led_on
-                    set_led_color(1 if led_on else 0, 0, 0)
-                    last_blink_time = current_time_ms
-            elif significant_change_level == 1:
-                set_led_color(0, 0, 0.2)
-            else:
-                set_led_color(0, 0.2, 0)
+            heap.run("display_moon", display_moon)
+        except Exception as e:
+            _log.error("Error showing moon phase: %s", e)
+        await asyncio.sleep(MOON_DISPLAY_DURATION_SECONDS)
 
-            try:
-                display_moon()
-                time.sleep(5)
-            except Exception as e:
-                print(f"Error showing moon phase: {e}")
+        for icon, label, value in observation_pages(
+            observation_bus.latest_observation()
+        ):
+            heap.run("display_reading", display_reading, icon, label, value)
+            await asyncio.sleep(DISPLAY_UPDATE_INTERVAL)
 
+        forecast_code = forecast.get_cached_tomorrow_weather_code()
+        if forecast_code is not None:
             try:
-                display_main_loop()
-
-                if (
-                    wifi_connected
-                    and time.ticks_diff(current_time_ms, last_forecast_display)
-                    >= FORECAST_DISPLAY_DURATION_SECONDS * 1000
-                ):
-                    tomorrow_forecast_code = forecast.get_tomorrow_weather_code()
-                    if tomorrow_forecast_code is not None:
-                        icon_filename = forecast.get_weather_icon(
-                            tomorrow_forecast_code
-                        )
-                        bitmap_data = forecast.load_forecast_bitmap(icon_filename)
-                        forecast.display_forecast(bitmap_data)
-                        time.sleep(7)
-                        last_forecast_display = current_time_ms
-
-                if weather_change_info_cache:
-                    for change, icon in weather_change_info_cache:
-                        display_reading(load_bitmap(icon), "", change)
-
-                current_rtc_time = timekeeping.get_rtc_time()
-                display_clock(current_rtc_time)
-                time.sleep(CLOCK_DISPLAY_DURATION_SECONDS)
-
+                icon_filename = forecast.get_weather_icon(forecast_code)
+                bitmap_data = forecast.load_forecast_bitmap(icon_filename)
+                heap.run("display_forecast", forecast.display_forecast, bitmap_data)
+                await asyncio.sleep(FORECAST_DISPLAY_DURATION_SECONDS)
             except Exception as e:
-                print(f"Error updating display: {e}")
+                _log.error("Error showing forecast: %s", e)
 
-            time.sleep(1)
+        for change, icon in state["weather_changes"]:
+            heap.run("display_reading", display_reading, load_bitmap(icon), "", change)
+            await asyncio.sleep(DISPLAY_UPDATE_INTERVAL)
 
+        try:
+            await show_clock(CLOCK_DISPLAY_DURATION_SECONDS)
         except Exception as e:
-            print(f"EXCEPTION IN MAIN LOOP: {e}")
-            time.sleep(5)
+            _log.error("Error updating display: %s", e)
+            await asyncio.sleep(1)
+
+
+async def main():
+    heap.init()
+    timekeeping.migrate_rtc_to_utc(TIMEZONE)
+    timekeeping.sync_system_clock()
+    time_service.sync()
+    open_observation_log()
+    observation_bus.subscribe(log_observation)
+    if TELEMETRY_ENABLED:
+        observation_bus.subscribe(telemetry.add_snapshot)
+    scheduler.start("sensors", SENSOR_SAMPLE_INTERVAL * 1000, observation_bus.sample)
+    scheduler.start("weather", WEATHER_CHECK_INTERVAL * 1000, update_weather_change)
+    scheduler.start("led", BLINK_INTERVAL_MS, blink_led)
+    asyncio.create_task(rotate_display())
+
+    # In power-save mode the radio is only up while a batch of network jobs
+    # runs; otherwise the manager keeps the link up and the jobs just check it.
+    if not NETWORK_POWER_SAVE:
+        _log.info("Attempting to connect to Wi-Fi for time sync and forecast...")
+        asyncio.create_task(wi_fi.manager.run())
+        if not await wi_fi.manager.wait_connected(WIFI_STARTUP_WAIT_MS):
+            _log.warning("Wi-Fi not connected yet. Using RTC time.")
+    network_jobs.add("ntp", sync_time, NTP_SYNC_INTERVAL_SECONDS * 1000)
+    network_jobs.add("forecast", fetch_forecast, FORECAST_INTERVAL * 1000)
+    if TELEMETRY_ENABLED:
+        network_jobs.add(
+            "telemetry", telemetry.publish, TELEMETRY_INTERVAL_SECONDS * 1000
+        )
+    asyncio.create_task(network_jobs.run())
+
+    while True:
+        await asyncio.sleep(60)
+        scheduler.print_stats()
+        observation_bus.print_stats()
+        print_display_stats()
+        buses.print_stats()
+        time_service.print_stats()
+        sntp.print_stats()
+        resolver.print_stats()
+        wi_fi.manager.print_stats()
+        network_jobs.print_stats(wi_fi.manager.radio_on_seconds())
+        if TELEMETRY_ENABLED:
+            telemetry.print_stats()
+        heap.print_stats()
+        log.print_stats()
+
+
+def main_loop():
+    try:
+        asyncio.run(main())
+    except Exception:
+        # What led up to the crash, including messages not printed.
+        log.dump()
+        raise
 
 
 if __name__ == "__main__":
@@ -1,55 +1,64 @@
-import math
 import time
 
-from timekeeping import get_ntp_time_utc, get_rtc_time
-from wi_fi import connect_wifi
+import log
+import time_service
+from config import LUNAR_TABLE_FILE
+from lunar import LunarTable, illumination, mean_phase, phase_name
 
+# The table is indexed in seconds since 2000-01-01 00:00 UTC; this is that
+# instant on the local time.mktime() scale (0 on the Pico itself).
+EPOCH_2000 = time.mktime((2000, 1, 1, 0, 0, 0, 0, 0, -1))
 
-def moon_info():
-    ntp_timestamp = None
-    if connect_wifi():
-        print("[Main] Wi-Fi connected, attempting to fetch NTP time...")
-        ntp_timestamp = get_ntp_time_utc()
+_log = log.get("Moon")
 
-    if ntp_timestamp:
-        current_timestamp = ntp_timestamp
-        print("[Main] Using NTP time.")
-    else:
-        print("[Main] NTP unavailable, falling back to RTC.")
-        year, month, day, hour, minute, second, _ = get_rtc_time()
-        current_timestamp = time.mktime(
-            (year, month, day, hour, minute, second, 0, 0, -1)
-        )
-
-    epoch_timestamp = time.mktime((2000, 1, 6, 18, 14, 0, 0, 0, -1))
-    moon_cycle = 29.53058867
-    days = (current_timestamp - epoch_timestamp) / 86400
-
-    moon_day = math.fmod(days, moon_cycle)
-    if moon_day < 0:
-        moon_day += moon_cycle
-    phase = moon_day / moon_cycle
-    moon_day_number = round(moon_day)
-
-    if 0 <= phase < 0.125:
-        phase_name = "new"
-    elif phase < 0.25:
-        phase_name = "waxing-crescent"
-    elif phase < 0.375:
-        phase_name = "first-quarter"
-    elif phase < 0.5:
-        phase_name = "waxing-gibbous"
-    elif phase < 0.625:
-        phase_name = "full"
-    elif phase < 0.75:
-        phase_name = "waning-gibbous"
-    elif phase < 0.875:
-        phase_name = "last-quarter"
+
+def open_table(path=LUNAR_TABLE_FILE):
+    try:
+        return LunarTable(path)
+    except OSError:
+        _log.warning("No lunar table at %s, using the mean synodic month.", path)
+    except Exception as e:
+        _log.warning("Ignoring lunar table %s: %s", path, e)
+    return None
+
+
+table = open_table()
+
+# Memoized per local calendar day: the phase name and day number only
+# change once a day, and recomputing them needs no I/O at all.
+_cache = {"day": None, "info": None}
+
+
+def moon_details(timestamp=None):
+    # (phase 0..1, age in days, illuminated fraction, next principal phase
+    # name or None, its timestamp or None)
+    if timestamp is None:
+        timestamp = time_service.utc_now()
+    seconds = timestamp - EPOCH_2000
+    if table is not None and table.covers(seconds):
+        phase, age, next_name, next_seconds = table.phase(seconds)
+        next_timestamp = next_seconds + EPOCH_2000
     else:
-        phase_name = "waning-crescent"
+        phase, age = mean_phase(seconds)
+        next_name = next_timestamp = None
+    return phase, age, illumination(phase), next_name, next_timestamp
+
+
+def moon_info(timestamp=None):
+    if timestamp is not None:
+        return _compute(timestamp)
+    day = time_service.day_key()
+    if _cache["day"] != day:
+        _cache["info"] = _compute(time_service.utc_now())
+        _cache["day"] = day
+    return _cache["info"]
+
 
-    return phase_name, moon_day_number
+def _compute(current_timestamp):
+    phase, age, _, _, _ = moon_details(current_timestamp)
+    return phase_name(phase), round(age)
 
 
 if __name__ == "__main__":
-    moon_info()
+    print(moon_info())
+    print(moon_details())
@@ -0,0 +1,204 @@
+import struct
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import resolver
+
+# MQTT 3.1.1, publishing only: CONNECT, PUBLISH at QoS 0 or 1, PINGREQ and
+# DISCONNECT, over asyncio streams. Each call waits up to timeout_ms for the
+# connection, for a write to drain and for each packet read, with the event
+# loop free meanwhile; only an uncached DNS lookup in connect() blocks it.
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+_PROTOCOL = b"\x00\x04MQTT\x04"
+_CLEAN_SESSION = 0x02
+_PASSWORD_FLAG = 0x40
+_USERNAME_FLAG = 0x80
+
+
+class MQTTError(OSError):
+    pass
+
+
+def _encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        if length:
+            byte |= 0x80
+        encoded.append(byte)
+        if not length:
+            return encoded
+
+
+def _string(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return struct.pack("!H", len(value)) + value
+
+
+class MQTTClient:
+    def __init__(
+        self,
+        client_id,
+        host,
+        port=1883,
+        user=None,
+        password=None,
+        keepalive=0,
+        timeout_ms=3000,
+    ):
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.keepalive = keepalive
+        self.timeout_ms = timeout_ms
+        self.reader = None
+        self.writer = None
+        self.last_packet_id = 0
+        # ticks_ms of the last packet sent, for keepalive pings.
+        self.last_sent_ms = 0
+
+    def is_connected(self):
+        return self.writer is not None
+
+    async def _wait(self, awaitable):
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            raise MQTTError("timed out")
+
+    async def _send(self, header, body=b""):
+        self.writer.write(bytes((header,)) + _encode_length(len(body)) + body)
+        await self._wait(self.writer.drain())
+        self.last_sent_ms = time.ticks_ms()
+
+    async def _read_exact(self, nbytes):
+        try:
+            return await self.reader.readexactly(nbytes)
+        except EOFError:
+            raise MQTTError("connection closed by broker")
+
+    async def _read_packet(self):
+        header = (await self._read_exact(1))[0]
+        length = 0
+        shift = 0
+        while True:
+            byte = (await self._read_exact(1))[0]
+            length |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        return header, await self._read_exact(length) if length else b""
+
+    async def _expect(self, packet_type, packet_id=None):
+        # The client subscribes to nothing, so anything else the broker
+        # sends before the reply is skipped.
+        while True:
+            header, body = await self._wait(self._read_packet())
+            if header & 0xF0 != packet_type:
+                continue
+            if packet_id is None or struct.unpack("!H", body[:2])[0] == packet_id:
+                return body
+
+    async def connect(self, clean_session=True):
+        self.close()
+        addr = resolver.resolve(self.host, self.port)
+        try:
+            self.reader, self.writer = await self._wait(
+                asyncio.open_connection(addr[0], addr[1])
+            )
+        except OSError:
+            # The broker may have moved; look it up again next time.
+            resolver.forget(self.host, self.port)
+            raise
+
+        flags = _CLEAN_SESSION if clean_session else 0
+        payload = _string(self.client_id)
+        if self.user is not None:
+            flags |= _USERNAME_FLAG
+            payload += _string(self.user)
+            if self.password is not None:
+                flags |= _PASSWORD_FLAG
+                payload += _string(self.password)
+        try:
+            await self._send(
+                CONNECT,
+                _PROTOCOL + struct.pack("!BH", flags, self.keepalive) + payload,
+            )
+            body = await self._expect(CONNACK)
+        except OSError:
+            self.close()
+            raise
+        if len(body) < 2 or body[1] != 0:
+            self.close()
+            raise MQTTError(f"connection refused (code {body[1] if body else None})")
+
+    def next_packet_id(self):
+        self.last_packet_id = self.last_packet_id % 0xFFFF + 1
+        return self.last_packet_id
+
+    async def publish(
+        self, topic, payload, qos=0, retain=False, packet_id=None, dup=False
+    ):
+        # At QoS 1 this waits for the PUBACK and returns the packet id. A
+        # retry of an unacknowledged message passes its first packet id back
+        # with dup=True.
+        if isinstance(payload, str):
+            payload = payload.encode()
+        header = PUBLISH | qos << 1 | (1 if retain else 0)
+        body = _string(topic)
+        if qos:
+            if packet_id is None:
+                packet_id = self.next_packet_id()
+            if dup:
+                header |= 0x08
+            body += struct.pack("!H", packet_id)
+        await self._send(header, body + payload)
+        if qos:
+            await self._expect(PUBACK, packet_id)
+        return packet_id
+
+    def keepalive_due(self):
+        return bool(self.keepalive) and (
+            time.ticks_diff(time.ticks_ms(), self.last_sent_ms)
+            >= self.keepalive * 1000 // 2
+        )
+
+    async def ping(self):
+        await self._send(PINGREQ)
+        await self._expect(PINGRESP)
+
+    async def disconnect(self):
+        if self.writer is None:
+            return
+        try:
+            await self._send(DISCONNECT)
+        except OSError:
+            pass
+        self.close()
+
+    def close(self):
+        if self.writer is not None:
+            # Closing a stream over a dead link, or one left behind by an
+            # event loop that has since stopped, can raise almost anything;
+            # the stream is dropped either way.
+            try:
+                self.writer.close()
+            except Exception:
+                pass
+            self.reader = None
+            self.writer = None
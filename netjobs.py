@@ -0,0 +1,134 @@
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import heap
+import log
+from scheduler import MAX_SLEEP_MS
+
+_log = log.get("Network")
+
+
+class NetworkJobs:
+    # Runs every job that needs the network in batches: when the first job
+    # falls due, every job due within batch_window_ms runs with it, the
+    # radio is brought up once for the lot and, in power-save mode, turned
+    # off again afterwards.
+    #
+    # Jobs are coroutine functions, awaited one after another; while a job
+    # waits on the network the sensors and display keep running. They may
+    # return the delay in ms until their next run (e.g. an NTP sync that
+    # adapts to drift); None keeps their interval.
+
+    def __init__(self, manager, power_save, batch_window_ms, retry_ms):
+        self.manager = manager
+        self.power_save = power_save
+        self.batch_window_ms = batch_window_ms
+        self.retry_ms = retry_ms
+        self.jobs = []
+        self.stats = {
+            "batches": 0,
+            "jobs_run": 0,
+            "errors": 0,
+            "connect_failures": 0,
+            "last_batch_ms": 0,
+        }
+
+    def add(self, name, func, interval_ms, initial_delay_ms=0):
+        # remaining_ms counts down instead of holding a ticks deadline:
+        # job intervals can run to weeks, far past what ticks_diff() covers.
+        self.jobs.append(
+            {
+                "name": name,
+                "func": func,
+                "interval_ms": interval_ms,
+                "remaining_ms": initial_delay_ms,
+                "runs": 0,
+                "errors": 0,
+            }
+        )
+
+    def _advance(self, elapsed_ms):
+        for job in self.jobs:
+            job["remaining_ms"] -= elapsed_ms
+
+    async def _run_job(self, job):
+        delay_ms = None
+        try:
+            delay_ms = await heap.run_async(job["name"], job["func"])
+        except Exception as e:
+            job["errors"] += 1
+            self.stats["errors"] += 1
+            _log.error("Error in job '%s': %s", job["name"], e)
+        job["runs"] += 1
+        self.stats["jobs_run"] += 1
+        job["remaining_ms"] = job["interval_ms"] if delay_ms is None else delay_ms
+
+    async def _link_up(self):
+        # In power-save mode the batch owns the radio; otherwise the
+        # manager's supervisor task keeps the link up and we only look.
+        if self.power_save:
+            if await self.manager.connect():
+                return True, 0
+            return False, self.manager.next_backoff_ms()
+        return self.manager.is_connected(), self.retry_ms
+
+    async def _run_batch(self, batch):
+        started = time.ticks_ms()
+        self.stats["batches"] += 1
+        try:
+            linked, retry_ms = await self._link_up()
+            if not linked:
+                # Keep the jobs due and try again later.
+                self.stats["connect_failures"] += 1
+                _log.info(
+                    "No link for %d job(s), retrying in %d ms.", len(batch), retry_ms
+                )
+                for job in batch:
+                    job["remaining_ms"] = retry_ms
+                return
+            for job in batch:
+                await self._run_job(job)
+        finally:
+            if self.power_save:
+                self.manager.power_down()
+            elapsed = time.ticks_diff(time.ticks_ms(), started)
+            self.stats["last_batch_ms"] = elapsed
+            # Jobs in the batch already had their delays reset; only the
+            # others have to be aged by the time the batch took.
+            for job in self.jobs:
+                if job not in batch:
+                    job["remaining_ms"] -= elapsed
+
+    async def run(self):
+        while True:
+            if not self.jobs:
+                await asyncio.sleep(MAX_SLEEP_MS / 1000)
+                continue
+            wait_ms = min(job["remaining_ms"] for job in self.jobs)
+            if wait_ms > 0:
+                wait_ms = min(wait_ms, MAX_SLEEP_MS)
+                started = time.ticks_ms()
+                await asyncio.sleep(wait_ms / 1000)
+                self._advance(time.ticks_diff(time.ticks_ms(), started))
+                continue
+            batch = [
+                job for job in self.jobs if job["remaining_ms"] <= self.batch_window_ms
+            ]
+            await self._run_batch(batch)
+
+    def print_stats(self, radio_on_seconds):
+        stats = self.stats
+        print(
+            f"[Network] batches={stats['batches']} jobs={stats['jobs_run']} "
+            f"errors={stats['errors']} connect_failures={stats['connect_failures']} "
+            f"last_batch={stats['last_batch_ms']}ms radio_on={radio_on_seconds}s"
+        )
+        for job in self.jobs:
+            print(
+                f"[Network] {job['name']}: runs={job['runs']} errors={job['errors']} "
+                f"next in {max(0, job['remaining_ms']) // 1000}s"
+            )
@@ -0,0 +1,90 @@
+import time
+
+import local_sensors
+import log
+from config import OBSERVATION_TTL_SECONDS
+
+_snapshot = None
+_observation = None
+_sampled_at = None
+_subscribers = []
+
+stats = {
+    "samples": 0,
+    "hits": 0,
+    "misses": 0,
+    "bus_reads": 0,
+    "bus_reads_avoided": 0,
+}
+_last_sample_bus_reads = 0
+_log = log.get("Observation")
+
+
+def _bus_read_count():
+    return sum(bus["count"] for bus in local_sensors.bus_stats.values())
+
+
+def subscribe(callback):
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def sample():
+    global _snapshot, _observation, _sampled_at, _last_sample_bus_reads
+    reads_before = _bus_read_count()
+    snapshot = local_sensors.read_snapshot()
+    _last_sample_bus_reads = _bus_read_count() - reads_before
+
+    _snapshot = snapshot
+    _observation = None
+    _sampled_at = time.ticks_ms()
+    stats["samples"] += 1
+    stats["bus_reads"] += _last_sample_bus_reads
+
+    for callback in _subscribers:
+        try:
+            callback(snapshot)
+        except Exception as e:
+            _log.error("Subscriber %s failed: %s", callback, e)
+    return snapshot
+
+
+def age_ms():
+    if _sampled_at is None:
+        return None
+    return time.ticks_diff(time.ticks_ms(), _sampled_at)
+
+
+def is_fresh(max_age_seconds=OBSERVATION_TTL_SECONDS):
+    age = age_ms()
+    return age is not None and age <= max_age_seconds * 1000
+
+
+def latest_snapshot(max_age_seconds=OBSERVATION_TTL_SECONDS):
+    if is_fresh(max_age_seconds):
+        stats["hits"] += 1
+        stats["bus_reads_avoided"] += _last_sample_bus_reads
+        return _snapshot
+    stats["misses"] += 1
+    return sample()
+
+
+def latest_observation(max_age_seconds=OBSERVATION_TTL_SECONDS):
+    global _observation
+    snapshot = latest_snapshot(max_age_seconds)
+    if _observation is None:
+        _observation = local_sensors.snapshot_to_observation(snapshot)
+    return _observation
+
+
+def print_stats():
+    print(
+        f"[Observation] samples={stats['samples']} hits={stats['hits']} "
+        f"misses={stats['misses']} bus_reads={stats['bus_reads']} "
+        f"bus_reads_avoided={stats['bus_reads_avoided']}"
+    )
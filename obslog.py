@@ -0,0 +1,221 @@
+import os
+import struct
+import time
+
+MAGIC = b"WBOL"
+VERSION = 1
+# Timestamps are UTC seconds since Jan 1 of this year: 2000 on the Pico,
+# 1970 on the host.
+EPOCH_YEAR = time.gmtime(0)[0]
+
+# magic, version, record size, epoch year of the timestamps
+HEADER_FORMAT = "<4sBBH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# timestamp (s), outside temp (0.01 °C), inside temp (0.01 °C),
+# humidity (0.01 %), pressure (0.1 hPa)
+RECORD_FORMAT = "<IhhHH"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+MISSING_SIGNED = -32768
+MISSING_UNSIGNED = 0xFFFF
+
+
+def _encode(value, scale, missing):
+    if value is None:
+        return missing
+    return int(round(value * scale))
+
+
+def _decode(value, scale, missing):
+    if value == missing:
+        return None
+    return value / scale
+
+
+def pack_record(
+    buf, offset, timestamp, outside_temp, inside_temp, humidity, pressure_hPa
+):
+    struct.pack_into(
+        RECORD_FORMAT,
+        buf,
+        offset,
+        int(timestamp),
+        _encode(outside_temp, 100, MISSING_SIGNED),
+        _encode(inside_temp, 100, MISSING_SIGNED),
+        _encode(humidity, 100, MISSING_UNSIGNED),
+        _encode(pressure_hPa, 10, MISSING_UNSIGNED),
+    )
+
+
+def unpack_record(buf, offset=0):
+    timestamp, outside, inside, humidity, pressure = struct.unpack_from(
+        RECORD_FORMAT, buf, offset
+    )
+    return (
+        timestamp,
+        _decode(outside, 100, MISSING_SIGNED),
+        _decode(inside, 100, MISSING_SIGNED),
+        _decode(humidity, 100, MISSING_UNSIGNED),
+        _decode(pressure, 10, MISSING_UNSIGNED),
+    )
+
+
+def read_header(f):
+    # The segment's epoch year, or None if it is not in this format.
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        return None
+    magic, version, record_size, epoch = struct.unpack(HEADER_FORMAT, header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        return None
+    return epoch
+
+
+def read_records(f, buf=None):
+    # Yields the records of an open segment after its header, one at a time,
+    # each read into the same buffer: a 512-record segment never becomes a
+    # list in RAM. A truncated last record is ignored.
+    if buf is None:
+        buf = bytearray(RECORD_SIZE)
+    while f.readinto(buf) == RECORD_SIZE:
+        yield unpack_record(buf)
+
+
+def read_segment(path, buf=None):
+    try:
+        with open(path, "rb") as f:
+            if read_header(f) is None:
+                print(f"[ObsLog] Skipping segment with unknown format: {path}")
+                return
+            yield from read_records(f, buf)
+    except OSError:
+        pass
+
+
+class ObservationLog:
+    # Append-only ring of fixed-size segment files. Records are batched in RAM
+    # and written every `flush_every` samples, so the flash sees one append per
+    # batch instead of one per sample.
+
+    def __init__(self, directory, segments, records_per_segment, flush_every):
+        self.directory = directory
+        self.segments = segments
+        self.records_per_segment = records_per_segment
+        self.flush_every = flush_every
+        self._pending = bytearray(RECORD_SIZE * flush_every)
+        self._pending_count = 0
+        self._read_buffer = bytearray(RECORD_SIZE)
+        self.last_logged = None
+        self.stats = {"records": 0, "flushes": 0, "bytes_written": 0, "rotations": 0}
+
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass
+
+        self.current_index, self.current_count = self._find_newest_segment()
+
+    def segment_path(self, index):
+        return f"{self.directory}/obs_{index:03d}.bin"
+
+    def _segment_state(self, index):
+        try:
+            size = os.stat(self.segment_path(index))[6]
+        except OSError:
+            return None, 0
+        count = max(0, (size - HEADER_SIZE) // RECORD_SIZE)
+        first_timestamp = None
+        if count:
+            with open(self.segment_path(index), "rb") as f:
+                f.seek(HEADER_SIZE)
+                first_timestamp = unpack_record(f.read(RECORD_SIZE))[0]
+        return first_timestamp, count
+
+    def _find_newest_segment(self):
+        newest_index, newest_count, newest_timestamp = 0, None, None
+        for index in range(self.segments):
+            first_timestamp, count = self._segment_state(index)
+            if first_timestamp is None:
+                continue
+            if newest_timestamp is None or first_timestamp > newest_timestamp:
+                newest_index, newest_count = index, count
+                newest_timestamp = first_timestamp
+        if newest_count is None:
+            self._start_segment(0)
+            return 0, 0
+        return newest_index, newest_count
+
+    def _start_segment(self, index):
+        with open(self.segment_path(index), "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_SIZE, EPOCH_YEAR))
+        self.stats["bytes_written"] += HEADER_SIZE
+
+    def _ordered_segments(self):
+        for step in range(1, self.segments + 1):
+            yield (self.current_index + step) % self.segments
+
+    def append(self, timestamp, outside_temp, inside_temp, humidity, pressure_hPa):
+        pack_record(
+            self._pending,
+            self._pending_count * RECORD_SIZE,
+            timestamp,
+            outside_temp,
+            inside_temp,
+            humidity,
+            pressure_hPa,
+        )
+        self._pending_count += 1
+        self.last_logged = timestamp
+        self.stats["records"] += 1
+        if self._pending_count >= self.flush_every:
+            self.flush()
+
+    def log_snapshot(self, snapshot, min_interval_seconds=0):
+        if (
+            self.last_logged is not None
+            and snapshot.timestamp - self.last_logged < min_interval_seconds
+        ):
+            return False
+        self.append(
+            snapshot.timestamp,
+            snapshot.outside_temp_C,
+            snapshot.inside_temp_C,
+            snapshot.humidity,
+            snapshot.pressure_hPa,
+        )
+        return True
+
+    def flush(self):
+        if not self._pending_count:
+            return
+        pending = memoryview(self._pending)
+        written = 0
+        while written < self._pending_count:
+            space = self.records_per_segment - self.current_count
+            if space <= 0:
+                self.current_index = (self.current_index + 1) % self.segments
+                self.current_count = 0
+                self._start_segment(self.current_index)
+                self.stats["rotations"] += 1
+                continue
+            batch = min(space, self._pending_count - written)
+            start = written * RECORD_SIZE
+            end = (written + batch) * RECORD_SIZE
+            with open(self.segment_path(self.current_index), "ab") as f:
+                f.write(pending[start:end])
+            self.current_count += batch
+            written += batch
+            self.stats["bytes_written"] += batch * RECORD_SIZE
+        self._pending_count = 0
+        self.stats["flushes"] += 1
+
+    def records(self, since=None):
+        for index in self._ordered_segments():
+            for record in read_segment(self.segment_path(index), self._read_buffer):
+                if since is None or record[0] >= since:
+                    yield record
+        for position in range(self._pending_count):
+            record = unpack_record(self._pending, position * RECORD_SIZE)
+            if since is None or record[0] >= since:
+                yield record
@@ -0,0 +1,48 @@
+import socket
+import time
+
+import log
+from config import DNS_CACHE_SECONDS
+
+# getaddrinfo() is the one network call MicroPython cannot make
+# cooperative: it blocks the event loop until the lookup finishes or fails,
+# with no timeout of its own. Addresses are cached per (host, port) so that
+# only the first lookup, and one every DNS_CACHE_SECONDS, pays for it.
+# (host, port) -> [address, time.time() when resolved]
+_cache = {}
+stats = {"lookups": 0, "hits": 0, "errors": 0}
+_log = log.get("DNS")
+
+
+def resolve(host, port):
+    key = (host, port)
+    entry = _cache.get(key)
+    if entry is not None:
+        age = time.time() - entry[1]
+        if 0 <= age < DNS_CACHE_SECONDS:
+            stats["hits"] += 1
+            return entry[0]
+    stats["lookups"] += 1
+    try:
+        address = socket.getaddrinfo(host, port)[0][-1]
+    except OSError:
+        stats["errors"] += 1
+        # A stale address beats none: the host has most likely not moved.
+        if entry is not None:
+            _log.warning("Lookup of %s failed, reusing %s", host, entry[0])
+            return entry[0]
+        raise
+    _cache[key] = [address, time.time()]
+    return address
+
+
+def forget(host, port):
+    # After a failure that may mean the address has changed.
+    _cache.pop((host, port), None)
+
+
+def print_stats():
+    print(
+        f"[DNS] lookups={stats['lookups']} hits={stats['hits']} "
+        f"errors={stats['errors']} cached={len(_cache)}"
+    )
@@ -0,0 +1,86 @@
+import time
+
+import heap
+import log
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+# uasyncio sleeps are bounded by half the ticks_ms() period, so long
+# intervals (weekly NTP sync) are slept in chunks.
+MAX_SLEEP_MS = 60 * 60 * 1000
+
+task_stats = {}
+_log = log.get("Scheduler")
+
+
+def _new_stats(interval_ms):
+    return {
+        "interval_ms": interval_ms,
+        "runs": 0,
+        "errors": 0,
+        "overruns": 0,
+        "last_ms": 0,
+        "max_ms": 0,
+    }
+
+
+async def sleep_ms(delay_ms):
+    while delay_ms > MAX_SLEEP_MS:
+        await asyncio.sleep(MAX_SLEEP_MS / 1000)
+        delay_ms -= MAX_SLEEP_MS
+    await asyncio.sleep(delay_ms / 1000)
+
+
+async def periodic(name, interval_ms, func, initial_delay_ms=0):
+    stats = _new_stats(interval_ms)
+    task_stats[name] = stats
+
+    if initial_delay_ms:
+        await sleep_ms(initial_delay_ms)
+
+    deadline = time.ticks_ms()
+    while True:
+        started = time.ticks_ms()
+        try:
+            heap.run(name, func)
+        except Exception as e:
+            stats["errors"] += 1
+            _log.error("Error in task '%s': %s", name, e)
+
+        elapsed = time.ticks_diff(time.ticks_ms(), started)
+        stats["runs"] += 1
+        stats["last_ms"] = elapsed
+        if elapsed > stats["max_ms"]:
+            stats["max_ms"] = elapsed
+
+        if interval_ms > MAX_SLEEP_MS:
+            await sleep_ms(max(0, interval_ms - elapsed))
+            deadline = time.ticks_ms()
+            continue
+
+        # Keep a fixed cadence: the next run is scheduled from the previous
+        # deadline, not from when this run finished.
+        deadline = time.ticks_add(deadline, interval_ms)
+        delay = time.ticks_diff(deadline, time.ticks_ms())
+        if delay < 0:
+            stats["overruns"] += 1
+            deadline = time.ticks_ms()
+            delay = 0
+        await asyncio.sleep(delay / 1000)
+
+
+def start(name, interval_ms, func, initial_delay_ms=0):
+    return asyncio.create_task(periodic(name, interval_ms, func, initial_delay_ms))
+
+
+def print_stats():
+    for name, stats in task_stats.items():
+        print(
+            f"[Scheduler] {name}: runs={stats['runs']} errors={stats['errors']} "
+            f"overruns={stats['overruns']} last={stats['last_ms']}ms "
+            f"max={stats['max_ms']}ms"
+        )
+
@@ -0,0 +1,151 @@
+# Host-side simulator: fake MicroPython modules and simulated hardware so the
+# application runs unmodified on CPython.
+#
+#   import sim
+#   world = sim.install()          # before importing any app module
+#   import display, forecast ...   # talk to the simulated hardware
+#   world.panel.to_pbm("frame.pbm")
+#
+# or run the whole app: python -m sim.run --duration 120
+import gc
+import importlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Installed in this order: later fakes import earlier ones.
+FAKE_MODULES = (
+    "micropython",
+    "framebuf",
+    "machine",
+    "network",
+    "sh1106",
+    "writer",
+    "bme280",
+    "onewire",
+    "ds18x20",
+    "urtc",
+    "urequests",
+)
+ALIASES = {
+    "utime": "time",
+    "ujson": "json",
+    "uos": "os",
+    "ustruct": "struct",
+    "uselect": "select",
+    "usocket": "socket",
+    "uasyncio": "asyncio",
+    "uio": "io",
+    "uerrno": "errno",
+    "ubinascii": "binascii",
+    "uhashlib": "hashlib",
+}
+
+# CPython objects are many times larger than MicroPython's, so the simulated
+# heap is scaled up until the app's imports leave roughly the share free
+# that they leave on a Pico W. Only what is allocated after install() counts:
+# the simulator's own state and the seeded flash are not on the device heap.
+# Compare numbers between runs, not against the device.
+HEAP_BYTES = 1280 * 1024
+_heap_base = [0]
+
+
+def _patch_gc():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    threshold = [-1]
+
+    def mem_alloc():
+        return max(0, tracemalloc.get_traced_memory()[0] - _heap_base[0])
+
+    def mem_free():
+        return max(0, HEAP_BYTES - mem_alloc())
+
+    def gc_threshold(amount=None):
+        if amount is None:
+            return threshold[0]
+        threshold[0] = amount
+
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+    gc.threshold = gc_threshold
+
+
+def _seed(world):
+    # Puts on the simulated flash what `mpremote cp` puts on the device.
+    fs = world.fs
+    root = fs.root
+    if not os.path.isdir(os.path.join(root, "images")):
+        fs.seed(os.path.join(REPO_DIR, "images"), "/images")
+    if not os.path.exists(os.path.join(root, "assets.bin")):
+        from asset_bundle import build_bundle
+        from tools.build_assets import load_icons
+
+        bundle = build_bundle(list(load_icons(os.path.join(REPO_DIR, "images"))))
+        with open(os.path.join(root, "assets.bin"), "wb") as f:
+            f.write(bundle)
+    if not os.path.exists(os.path.join(root, "moon.bin")):
+        from lunar import build_table
+        from tools.build_lunar_table import lunations
+
+        year = time.gmtime()[0]
+        with open(os.path.join(root, "moon.bin"), "wb") as f:
+            f.write(build_table(lunations(max(2000, year - 1), year + 1)))
+    credentials = os.path.join(root, world.config.WIFI_CREDENTIALS_FILE.lstrip("/"))
+    if not os.path.exists(credentials):
+        with open(credentials, "w") as f:
+            for access_point in world.wifi.access_points:
+                f.write(f"SSID={access_point.ssid}\n")
+                f.write(f"PASSWORD={access_point.password}\n")
+    # The simulated DS3231 starts on UTC, as one set by current firmware.
+    marker = os.path.join(root, world.config.RTC_UTC_MARKER_FILE.lstrip("/"))
+    if not os.path.exists(marker):
+        with open(marker, "w") as f:
+            f.write("1\n")
+
+
+def install(scenario=None, root=None, seed=True):
+    # Must run before any app module is imported. Returns the World, whose
+    # devices (panel, bme280, probes, rtc, wifi, ntp, http, mqtt) can be
+    # inspected and scripted while the app runs.
+    from sim import clock, net, world
+    from sim.scenario import Scenario
+
+    if world.current is not None:
+        return world.current
+
+    # The device has no time zones: time.mktime() and localtime() are UTC.
+    os.environ["TZ"] = "UTC"
+    time.tzset()
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+
+    if scenario is None:
+        scenario = Scenario()
+    elif not isinstance(scenario, Scenario):
+        scenario = Scenario.load(scenario)
+    if root is None:
+        root = tempfile.mkdtemp(prefix="weatherbox-sim-")
+
+    import config
+
+    current = world.World(scenario, root, config)
+    world.current = current
+    clock.patch(time, current.clock)
+    _patch_gc()
+    for name in FAKE_MODULES:
+        sys.modules[name] = importlib.import_module(f"sim.fakes.{name}")
+    for alias, name in ALIASES.items():
+        sys.modules.setdefault(alias, importlib.import_module(name))
+    current.wire()
+    net.patch_getaddrinfo(current.ntp, current.mqtt)
+    if seed:
+        _seed(current)
+    current.fs.install()
+    gc.collect()
+    _heap_base[0] = tracemalloc.get_traced_memory()[0]
+    return current
@@ -0,0 +1,97 @@
+import time as _host
+
+# Kept before patch() replaces them.
+_host_time = _host.time
+_host_gmtime = _host.gmtime
+
+# MicroPython's ticks wrap at 2**30 on the RP2040; the simulated ticks do the
+# same so code that subtracts ticks instead of using ticks_diff() breaks here
+# too.
+TICKS_PERIOD = 1 << 30
+TICKS_MASK = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD >> 1
+
+
+class Clock:
+    # Two clocks: the "true" UTC the NTP stub serves, taken from the host,
+    # and the MCU clock behind time.time(), which starts wherever
+    # machine.RTC().datetime() puts it, like the board after a reset.
+
+    def __init__(self, ticks_offset_ms=0, time_scale=1):
+        self.origin_ns = _host.perf_counter_ns()
+        self.origin_utc = _host_time()
+        self.ticks_offset_ms = ticks_offset_ms
+        # Scenario time runs time_scale times faster than the host, so a day
+        # of sensor data can be replayed in minutes. Ticks and sleeps are not
+        # scaled.
+        self.time_scale = time_scale
+        self.system_offset = 0
+
+    def elapsed_us(self):
+        return (_host.perf_counter_ns() - self.origin_ns) // 1000
+
+    def elapsed(self):
+        return self.elapsed_us() / 1_000_000
+
+    def scenario_seconds(self):
+        return self.elapsed() * self.time_scale
+
+    def utc(self):
+        return self.origin_utc + self.elapsed()
+
+    def ticks_ms(self):
+        return (self.elapsed_us() // 1000 + self.ticks_offset_ms) & TICKS_MASK
+
+    def ticks_us(self):
+        return (self.elapsed_us() + self.ticks_offset_ms * 1000) & TICKS_MASK
+
+    def ticks_cpu(self):
+        return self.ticks_us()
+
+    @staticmethod
+    def ticks_diff(end, start):
+        return ((end - start + TICKS_HALF) & TICKS_MASK) - TICKS_HALF
+
+    @staticmethod
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & TICKS_MASK
+
+    def time(self):
+        return int(self.utc() + self.system_offset)
+
+    def time_ns(self):
+        return int((self.utc() + self.system_offset) * 1_000_000_000)
+
+    def set_time(self, seconds):
+        self.system_offset = seconds - self.utc()
+
+    def localtime(self, seconds=None):
+        # The MCU clock has no zone: localtime() and gmtime() agree.
+        return _host_gmtime(self.time() if seconds is None else seconds)
+
+    def sleep(self, seconds):
+        _host.sleep(seconds)
+
+    def sleep_ms(self, ms):
+        if ms > 0:
+            _host.sleep(ms / 1000)
+
+    def sleep_us(self, us):
+        if us > 0:
+            _host.sleep(us / 1_000_000)
+
+
+def patch(time_module, clock):
+    # Adds the MicroPython-only functions to CPython's time module and
+    # points time()/localtime()/gmtime() at the MCU clock.
+    time_module.ticks_ms = clock.ticks_ms
+    time_module.ticks_us = clock.ticks_us
+    time_module.ticks_cpu = clock.ticks_cpu
+    time_module.ticks_diff = clock.ticks_diff
+    time_module.ticks_add = clock.ticks_add
+    time_module.sleep_ms = clock.sleep_ms
+    time_module.sleep_us = clock.sleep_us
+    time_module.time = clock.time
+    time_module.time_ns = clock.time_ns
+    time_module.localtime = clock.localtime
+    time_module.gmtime = clock.localtime
@@ -0,0 +1,271 @@
+import time as _host
+
+from sim.i2c import RegisterDevice
+from sim.scenario import in_windows
+
+BME280_CHIP_ID = 0x60
+BME280_DATA = 0xF7
+BME280_CTRL_MEAS = 0xF4
+BME280_CALIBRATION = bytes(range(0x88, 0x88 + 26))
+
+# The simulated BME280 stores linear raw values instead of needing the Bosch
+# compensation formulas; the fake driver in sim/fakes/bme280.py decodes them.
+BME280_TEMPERATURE_OFFSET = 100
+BME280_TEMPERATURE_SCALE = 5000
+BME280_PRESSURE_SCALE = 8
+BME280_HUMIDITY_SCALE = 512
+
+
+class BME280Device(RegisterDevice):
+    def __init__(self, world, series):
+        super().__init__()
+        self.world = world
+        self.series = series
+        self.registers[0xD0] = BME280_CHIP_ID
+        self.registers[0x88 : 0x88 + 26] = BME280_CALIBRATION
+        self.measurements = 0
+        self._measure()
+
+    def _write_register(self, register, value):
+        super()._write_register(register, value)
+        # Forced mode (mode bits 01 or 10) runs one measurement.
+        if register == BME280_CTRL_MEAS and value & 0x03 in (0x01, 0x02):
+            self._measure()
+
+    def _before_read(self, register, nbytes):
+        # Normal mode keeps the data registers fresh.
+        if register <= BME280_DATA < register + nbytes:
+            if self.registers[BME280_CTRL_MEAS] & 0x03 == 0x03:
+                self._measure()
+
+    def values(self):
+        t = self.world.clock.scenario_seconds()
+        return (
+            self.series["temperature"].at(t),
+            self.series["pressure"].at(t),
+            self.series["humidity"].at(t),
+        )
+
+    def _measure(self):
+        temperature, pressure, humidity = self.values()
+        raw_t = _clamp(
+            (temperature + BME280_TEMPERATURE_OFFSET) * BME280_TEMPERATURE_SCALE,
+            0xFFFFF,
+        )
+        raw_p = _clamp(pressure * 100 * BME280_PRESSURE_SCALE, 0xFFFFF)
+        raw_h = _clamp(humidity * BME280_HUMIDITY_SCALE, 0xFFFF)
+        self.registers[BME280_DATA : BME280_DATA + 8] = bytes(
+            (
+                raw_p >> 12,
+                (raw_p >> 4) & 0xFF,
+                (raw_p & 0x0F) << 4,
+                raw_t >> 12,
+                (raw_t >> 4) & 0xFF,
+                (raw_t & 0x0F) << 4,
+                raw_h >> 8,
+                raw_h & 0xFF,
+            )
+        )
+        self.measurements += 1
+
+
+def _clamp(value, limit):
+    return max(0, min(round(value), limit))
+
+
+def decode_bme280(data):
+    raw_p = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
+    raw_t = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
+    raw_h = (data[6] << 8) | data[7]
+    return (
+        raw_t / BME280_TEMPERATURE_SCALE - BME280_TEMPERATURE_OFFSET,
+        raw_p / BME280_PRESSURE_SCALE / 100,
+        raw_h / BME280_HUMIDITY_SCALE,
+    )
+
+
+def crc8(data):
+    # Dallas/Maxim 1-Wire CRC (x^8 + x^5 + x^4 + 1).
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            mix = (crc ^ byte) & 0x01
+            crc >>= 1
+            if mix:
+                crc ^= 0x8C
+            byte >>= 1
+    return crc
+
+
+DS18B20_FAMILY = 0x28
+DS18B20_CONVERSION_MS = 750
+# Power-on value of the temperature register: 85 °C.
+DS18B20_RESET_RAW = 0x0550
+
+
+class DS18B20Probe:
+    def __init__(self, world, series, serial, dropouts=()):
+        self.world = world
+        self.series = series
+        self.dropouts = dropouts
+        rom = bytearray((DS18B20_FAMILY,)) + serial.to_bytes(6, "little")
+        rom.append(crc8(rom))
+        self.rom = bytes(rom)
+        self.raw = DS18B20_RESET_RAW
+        self.conversion_started = None
+        self.conversions = 0
+
+    def present(self):
+        return not in_windows(self.world.clock.scenario_seconds(), self.dropouts)
+
+    def start_conversion(self):
+        self.conversion_started = _host.monotonic()
+        self.conversions += 1
+
+    def scratchpad(self):
+        # The temperature register only changes once a conversion completes;
+        # reading early returns the previous value (85 °C after power-up).
+        started = self.conversion_started
+        if started is not None:
+            if (_host.monotonic() - started) * 1000 >= DS18B20_CONVERSION_MS:
+                t = self.world.clock.scenario_seconds()
+                self.raw = round(self.series.at(t) * 16) & 0xFFFF
+                self.conversion_started = None
+        data = bytearray(
+            (self.raw & 0xFF, self.raw >> 8, 0x4B, 0x46, 0x7F, 0xFF, 0x0C, 0x10)
+        )
+        data.append(crc8(data))
+        return data
+
+
+class OneWireBus:
+    # Follows the transaction state: reset, a ROM command (skip or match),
+    # then a function command (convert or read scratchpad). Bytes read from
+    # nobody come back as 0xFF, so a vanished probe fails the CRC check.
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.probes = []
+        self.stats = {"resets": 0, "bytes_written": 0, "bytes_read": 0}
+        self._state = "idle"
+        self._selected = []
+        self._rom = bytearray()
+        self._out = bytearray()
+
+    def present_probes(self):
+        return [probe for probe in self.probes if probe.present()]
+
+    def reset(self):
+        self.stats["resets"] += 1
+        self._state = "rom"
+        self._selected = []
+        self._out = bytearray()
+        return bool(self.present_probes())
+
+    def write_byte(self, value):
+        self.stats["bytes_written"] += 1
+        state = self._state
+        if state == "rom":
+            if value == 0xCC:
+                self._selected = self.present_probes()
+                self._state = "function"
+            elif value == 0x55:
+                self._rom = bytearray()
+                self._state = "match"
+            else:
+                self._state = "idle"
+        elif state == "match":
+            self._rom.append(value)
+            if len(self._rom) == 8:
+                rom = bytes(self._rom)
+                self._selected = [
+                    probe for probe in self.present_probes() if probe.rom == rom
+                ]
+                self._state = "function"
+        elif state == "function":
+            if value == 0x44:
+                for probe in self._selected:
+                    probe.start_conversion()
+            elif value == 0xBE and len(self._selected) == 1:
+                self._out = self._selected[0].scratchpad()
+            self._state = "idle"
+
+    def read_byte(self):
+        self.stats["bytes_read"] += 1
+        if not self._out:
+            return 0xFF
+        value = self._out[0]
+        del self._out[0]
+        return value
+
+
+class DS3231Device(RegisterDevice):
+    # Keeps whatever time it was set to (UTC, from the firmware) in BCD
+    # registers and runs fast or slow by drift_ppm against the host clock.
+    # Writing the seconds register restarts the divider, so the next tick
+    # comes a full second after the write.
+
+    def __init__(self, world, start, drift_ppm=0):
+        super().__init__(0x13)
+        self.world = world
+        self.drift_ppm = drift_ppm
+        self._set(start)
+        self.registers[0x0E] = 0x1C
+        self.registers[0x0F] = 0x00
+        self.writes = 0
+
+    def _set(self, local_seconds):
+        self.base = local_seconds
+        self.base_ns = _host.perf_counter_ns()
+
+    def now(self):
+        elapsed = (_host.perf_counter_ns() - self.base_ns) / 1e9
+        return self.base + elapsed * (1 + self.drift_ppm / 1e6)
+
+    def write(self, data):
+        touches_time = len(data) > 1 and data[0] <= 0x06
+        if touches_time:
+            # A partial write keeps the other fields running.
+            self._encode(int(self.now()))
+        super().write(data)
+        if touches_time:
+            self.writes += 1
+            self._set(self._decode())
+
+    def _before_read(self, register, nbytes):
+        if register <= 0x06:
+            self._encode(int(self.now()))
+        if register <= 0x12 and register + nbytes > 0x11:
+            # Temperature registers, 0.25 °C resolution.
+            self.registers[0x11] = 25
+            self.registers[0x12] = 0
+
+    def _encode(self, seconds):
+        year, month, day, hour, minute, second, weekday = _host.gmtime(seconds)[:7]
+        registers = self.registers
+        registers[0x00] = _bcd(second)
+        registers[0x01] = _bcd(minute)
+        registers[0x02] = _bcd(hour)
+        # Day of week as urtc uses it: Monday is 1.
+        registers[0x03] = weekday + 1
+        registers[0x04] = _bcd(day)
+        registers[0x05] = _bcd(month) | (0x80 if year >= 2100 else 0)
+        registers[0x06] = _bcd(year % 100)
+
+    def _decode(self):
+        registers = self.registers
+        year = 2000 + _unbcd(registers[0x06]) + (100 if registers[0x05] & 0x80 else 0)
+        month = _unbcd(registers[0x05] & 0x1F)
+        day = _unbcd(registers[0x04])
+        hour = _unbcd(registers[0x02] & 0x3F)
+        minute = _unbcd(registers[0x01])
+        second = _unbcd(registers[0x00] & 0x7F)
+        return int(_host.mktime((year, month, day, hour, minute, second, 0, 0, -1)))
+
+
+def _bcd(value):
+    return (value // 10) << 4 | value % 10
+
+
+def _unbcd(value):
+    return (value >> 4) * 10 + (value & 0x0F)
@@ -0,0 +1,60 @@
+# Interface of the common MicroPython BME280 driver (values, read_raw_data,
+# read_compensated_data), reading the simulated sensor over I2C.
+import time
+
+from sim.devices import decode_bme280
+
+BME280_I2CADDR = 0x76
+BME280_OSAMPLE_1 = 1
+BME280_OSAMPLE_2 = 2
+BME280_OSAMPLE_4 = 3
+BME280_OSAMPLE_8 = 4
+BME280_OSAMPLE_16 = 5
+
+_REGISTER_CHIPID = 0xD0
+_REGISTER_CONTROL_HUM = 0xF2
+_REGISTER_CONTROL = 0xF4
+_REGISTER_DATA = 0xF7
+
+
+class BME280:
+    def __init__(self, mode=BME280_OSAMPLE_1, address=BME280_I2CADDR, i2c=None):
+        if i2c is None:
+            raise ValueError("An I2C object is required.")
+        self.i2c = i2c
+        self.address = address
+        self._mode = mode
+        chip_id = self.i2c.readfrom_mem(address, _REGISTER_CHIPID, 1)[0]
+        if chip_id != 0x60:
+            raise RuntimeError(f"Unexpected chip id 0x{chip_id:02x}")
+        # Calibration blocks: read for the bus traffic, unused by the
+        # simulated part's linear encoding.
+        self.i2c.readfrom_mem(address, 0x88, 26)
+        self.i2c.readfrom_mem(address, 0xE1, 7)
+
+    def read_raw_data(self):
+        mode = self._mode
+        self.i2c.writeto_mem(self.address, _REGISTER_CONTROL_HUM, bytes((mode,)))
+        self.i2c.writeto_mem(
+            self.address, _REGISTER_CONTROL, bytes((mode << 5 | mode << 2 | 1,))
+        )
+        # Forced-mode measurement time at 1x oversampling.
+        time.sleep_ms(2)
+        return self.i2c.readfrom_mem(self.address, _REGISTER_DATA, 8)
+
+    def read_compensated_data(self):
+        temperature, pressure, humidity = decode_bme280(self.read_raw_data())
+        return (
+            round(temperature * 100),
+            round(pressure * 100 * 256),
+            round(humidity * 1024),
+        )
+
+    @property
+    def values(self):
+        t, p, h = self.read_compensated_data()
+        return (
+            f"{t / 100:.2f}C",
+            f"{p / 256 / 100:.2f}hPa",
+            f"{h / 1024:.2f}%",
+        )
@@ -0,0 +1,174 @@
+# Pure-Python FrameBuffer with the same memory layouts and clipping rules as
+# MicroPython's, so a buffer drawn here is byte-identical to one drawn on the
+# device. Monochrome formats only; text(), ellipse() and poly() are not used
+# by the app and are left out.
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+MVLSB = MONO_VLSB
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError("invalid format")
+        if stride is None:
+            stride = width
+        if format != MONO_VLSB:
+            stride = (stride + 7) & ~7
+            needed = (stride * height + 7) // 8
+        else:
+            needed = ((height + 7) // 8) * stride
+        if len(buffer) < needed:
+            raise ValueError("buffer too small")
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = stride
+
+    def _locate(self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        index = x + y * self.stride
+        if self.format == MONO_HLSB:
+            return index >> 3, 7 - (index & 7)
+        return index >> 3, index & 7
+
+    def _get(self, x, y):
+        offset, bit = self._locate(x, y)
+        return (self.buf[offset] >> bit) & 1
+
+    def _set(self, x, y, c):
+        offset, bit = self._locate(x, y)
+        if c & 1:
+            self.buf[offset] |= 1 << bit
+        else:
+            self.buf[offset] &= ~(1 << bit) & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+        return None
+
+    def fill(self, c):
+        # Whole bytes when the pixels fill them exactly, pixel by pixel
+        # otherwise so padding bits stay untouched like on the device.
+        whole = self.stride == self.width and (
+            self.height % 8 == 0 if self.format == MONO_VLSB else self.width % 8 == 0
+        )
+        if not whole:
+            self.fill_rect(0, 0, self.width, self.height, c)
+            return
+        size = self.width * self.height // 8
+        self.buf[:size] = (b"\xff" if c & 1 else b"\x00") * size
+
+    def fill_rect(self, x, y, w, h, c):
+        if h < 1 or w < 1 or x + w <= 0 or y + h <= 0:
+            return
+        if x >= self.width or y >= self.height:
+            return
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        # Bresenham, as in modframebuf.c.
+        dx = x2 - x1
+        sx = 1 if dx > 0 else -1
+        dx = abs(dx)
+        dy = y2 - y1
+        sy = 1 if dy > 0 else -1
+        dy = abs(dy)
+        steep = dy > dx
+        if steep:
+            x1, y1 = y1, x1
+            dx, dy = dy, dx
+            sx, sy = sy, sx
+        e = 2 * dy - dx
+        for _ in range(dx):
+            if steep:
+                self.pixel(y1, x1, c)
+            else:
+                self.pixel(x1, y1, c)
+            while e >= 0:
+                y1 += sy
+                e -= 2 * dx
+            x1 += sx
+            e += 2 * dy
+        self.pixel(x2, y2, c)
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        if (
+            x >= self.width
+            or y >= self.height
+            or -x >= fbuf.width
+            or -y >= fbuf.height
+        ):
+            return
+        x0, y0 = max(0, x), max(0, y)
+        x1 = max(0, -x)
+        y1 = max(0, -y)
+        x0end = min(self.width, x + fbuf.width)
+        y0end = min(self.height, y + fbuf.height)
+        for cy in range(y0, y0end):
+            cx1 = x1
+            for cx in range(x0, x0end):
+                c = fbuf._get(cx1, y1)
+                if palette is not None:
+                    c = palette._get(c, 0)
+                if c != key:
+                    self._set(cx, cy, c)
+                cx1 += 1
+            y1 += 1
+
+    def scroll(self, xstep, ystep):
+        if xstep < 0:
+            sx, xend, dx = 0, self.width + xstep, 1
+            if xend <= 0:
+                return
+        else:
+            sx, xend, dx = self.width - 1, xstep - 1, -1
+            if xend >= sx:
+                return
+        if ystep < 0:
+            y, yend, dy = 0, self.height + ystep, 1
+            if yend <= 0:
+                return
+        else:
+            y, yend, dy = self.height - 1, ystep - 1, -1
+            if yend >= y:
+                return
+        while y != yend:
+            x = sx
+            while x != xend:
+                self._set(x, y, self._get(x - xstep, y - ystep))
+                x += dx
+            y += dy
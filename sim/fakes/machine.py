@@ -0,0 +1,188 @@
+import time
+
+from sim import world as _world
+from sim.i2c import I2CPort
+
+# RP2040 pin count: GP0..GP29.
+_PINS = 30
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        # Named pins ("LED" on the Pico W) are accepted as they are.
+        if not isinstance(id, str) and not 0 <= id < _PINS:
+            raise ValueError("invalid pin")
+        self.id = id
+        self._value = 0
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = 1 if value else 0
+
+    __call__ = value
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=None, hard=False):
+        return None
+
+    def __repr__(self):
+        return f"Pin(GPIO{self.id})"
+
+
+def _pin_id(pin):
+    return pin.id if isinstance(pin, Pin) else pin
+
+
+def _check_hardware_pins(id, scl, sda):
+    # The RP2040 routes I2Cn only to particular pins; anything else raises
+    # like the real port does.
+    if id not in (0, 1):
+        raise ValueError(f"I2C({id}) doesn't exist")
+    if sda % 2 != 0 or (sda // 2) % 2 != id:
+        raise ValueError("bad SDA pin")
+    if scl % 2 != 1 or (scl // 2) % 2 != id:
+        raise ValueError("bad SCL pin")
+
+
+class I2C(I2CPort):
+    def __init__(self, id, scl=None, sda=None, freq=400_000, timeout=50_000):
+        scl, sda = _pin_id(scl), _pin_id(sda)
+        _check_hardware_pins(id, scl, sda)
+        super().__init__(_world.current.i2c_bus(scl, sda), freq)
+        self.id = id
+
+
+class SoftI2C(I2CPort):
+    def __init__(self, scl, sda, freq=400_000, timeout=50_000):
+        super().__init__(_world.current.i2c_bus(_pin_id(scl), _pin_id(sda)), freq)
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = _pin_id(pin)
+        self._freq = 0
+        self._duty = 0
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        self._duty = value
+        _world.current.leds[self.pin] = value
+
+    def deinit(self):
+        self._duty = 0
+        _world.current.leds[self.pin] = 0
+
+
+class RTC:
+    # The MCU's own clock: setting it moves time.time().
+    def datetime(self, datetimetuple=None):
+        clock = _world.current.clock
+        if datetimetuple is None:
+            year, month, day, hour, minute, second, weekday = clock.localtime()[:7]
+            return (year, month, day, weekday, hour, minute, second, 0)
+        year, month, day, _, hour, minute, second = datetimetuple[:7]
+        clock.set_time(
+            int(time.mktime((year, month, day, hour, minute, second, 0, 0, -1)))
+        )
+
+
+class WDT:
+    def __init__(self, id=0, timeout=5000):
+        self.timeout = timeout
+
+    def feed(self):
+        pass
+
+
+class ADC:
+    def __init__(self, pin):
+        self.pin = _pin_id(pin)
+
+    def read_u16(self):
+        # Only the on-chip temperature sensor (ADC4) reads something sane.
+        return 14000 if self.pin == 4 else 0
+
+
+_freq = 125_000_000
+
+
+def freq(value=None):
+    global _freq
+    if value is None:
+        return _freq
+    _freq = value
+
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x5a\x2b\x2f"
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+def soft_reset():
+    raise SystemExit("machine.soft_reset()")
+
+
+def lightsleep(time_ms=None):
+    if time_ms is not None:
+        time.sleep_ms(time_ms)
+
+
+deepsleep = lightsleep
+
+
+def idle():
+    pass
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+PWRON_RESET = 1
+WDT_RESET = 3
+
+
+def reset_cause():
+    return PWRON_RESET
@@ -0,0 +1,46 @@
+import gc
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+viper = native
+
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+
+def mem_info(verbose=False):
+    used = gc.mem_alloc()
+    free = gc.mem_free()
+    print(f"stack: 0 out of 7936\nGC: total: {used + free}, used: {used}, free: {free}")
+
+
+def qstr_info(verbose=False):
+    print("qstr pool: n_pool=0, n_qstr=0, n_str_data_bytes=0, n_total_bytes=0")
+
+
+def stack_use():
+    return 0
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def schedule(func, arg):
+    func(arg)
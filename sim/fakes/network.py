@@ -0,0 +1,148 @@
+# The CYW43 station interface against the simulated radio environment.
+# Joining takes WiFi.CONNECT_MS; the link drops when the access point has an
+# outage, exactly like walking out of range.
+import time
+
+from sim import world as _world
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+AUTH_OPEN = 0
+AUTH_WPA2_PSK = 4
+
+_interfaces = {}
+
+
+def WLAN(interface_id=STA_IF):
+    # Like the port, every call returns the same object per interface.
+    interface = _interfaces.get(interface_id)
+    if interface is None:
+        interface = _interfaces[interface_id] = _WLAN(interface_id)
+        if interface_id == STA_IF:
+            _world.current.wifi.station = interface
+    return interface
+
+
+class _WLAN:
+    PM_NONE = 0x10
+    PM_PERFORMANCE = 0xA11142
+    PM_POWERSAVE = 0x111022
+
+    def __init__(self, interface_id):
+        self.interface_id = interface_id
+        self._active = False
+        self._status = STAT_IDLE
+        self._access_point = None
+        self._joining = None
+        self._join_started = 0
+        self._config = {"pm": self.PM_PERFORMANCE, "hostname": "weatherbox"}
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self._active = bool(is_active)
+        if not self._active:
+            self.disconnect()
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        if not self._active:
+            raise OSError("Wifi Not Active")
+        wifi = _world.current.wifi
+        wifi.stats["joins"] += 1
+        self._access_point = None
+        self._joining = (ssid, key)
+        self._join_started = time.ticks_ms()
+        self._status = STAT_CONNECTING
+
+    def _update(self):
+        wifi = _world.current.wifi
+        if self._joining is not None:
+            if time.ticks_diff(time.ticks_ms(), self._join_started) < wifi.CONNECT_MS:
+                return
+            ssid, key = self._joining
+            self._joining = None
+            access_point = wifi.find(ssid)
+            if access_point is None:
+                self._status = STAT_NO_AP_FOUND
+            elif access_point.password != key:
+                self._status = STAT_WRONG_PASSWORD
+            else:
+                self._access_point = access_point
+                self._status = STAT_GOT_IP
+        elif self._access_point is not None and not self._access_point.up():
+            self._access_point = None
+            self._status = STAT_CONNECT_FAIL
+
+    def disconnect(self):
+        self._joining = None
+        self._access_point = None
+        self._status = STAT_IDLE
+
+    def isconnected(self):
+        self._update()
+        return self._status == STAT_GOT_IP
+
+    def status(self, param=None):
+        self._update()
+        if param == "rssi":
+            if self._access_point is None:
+                raise OSError("not connected")
+            return self._access_point.rssi
+        if param is not None:
+            raise ValueError("unknown status param")
+        return self._status
+
+    def scan(self):
+        if not self._active:
+            raise OSError("Wifi Not Active")
+        wifi = _world.current.wifi
+        wifi.stats["scans"] += 1
+        return [
+            (
+                ap.ssid.encode(),
+                bytes((0x02, 0x00, 0x00, 0x00, 0x00, index)),
+                ap.channel,
+                ap.rssi,
+                AUTH_WPA2_PSK,
+                False,
+            )
+            for index, ap in enumerate(wifi.access_points)
+            if ap.up()
+        ]
+
+    def ifconfig(self, config=None):
+        if config is not None:
+            return None
+        if self.isconnected():
+            return ("192.168.4.23", "255.255.255.0", "192.168.4.1", "192.168.4.1")
+        return ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+
+    def config(self, *args, **kwargs):
+        if kwargs:
+            self._config.update(kwargs)
+            return None
+        if args[0] == "mac":
+            return b"\x28\xcd\xc1\x00\x00\x01"
+        if args[0] == "ssid" and self._access_point is not None:
+            return self._access_point.ssid
+        return self._config.get(args[0])
+
+
+def hostname(name=None):
+    if name is None:
+        return "weatherbox"
+    return None
+
+
+def country(code=None):
+    if code is None:
+        return "XX"
+    return None
@@ -0,0 +1,57 @@
+# MicroPython's onewire.OneWire on top of the simulated 1-Wire bus. ROM
+# search is not bit-banged; scan() asks the bus who is present.
+from sim import world as _world
+from sim.devices import crc8 as _crc8
+
+
+class OneWireError(Exception):
+    pass
+
+
+class OneWire:
+    SEARCH_ROM = 0xF0
+    MATCH_ROM = 0x55
+    SKIP_ROM = 0xCC
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.bus = _world.current.onewire_bus(getattr(pin, "id", pin))
+
+    def reset(self, required=False):
+        present = self.bus.reset()
+        if required and not present:
+            raise OneWireError
+        return present
+
+    def readbit(self):
+        return self.bus.read_byte() & 1
+
+    def readbyte(self):
+        return self.bus.read_byte()
+
+    def readinto(self, buf):
+        for index in range(len(buf)):
+            buf[index] = self.bus.read_byte()
+
+    def writebit(self, value):
+        pass
+
+    def writebyte(self, value):
+        self.bus.write_byte(value)
+
+    def write(self, buf):
+        for value in buf:
+            self.bus.write_byte(value)
+
+    def select_rom(self, rom):
+        self.reset()
+        self.writebyte(self.MATCH_ROM)
+        self.write(rom)
+
+    def scan(self):
+        self.reset()
+        self.writebyte(self.SEARCH_ROM)
+        return [bytearray(probe.rom) for probe in self.bus.present_probes()]
+
+    def crc8(self, data):
+        return _crc8(data)
@@ -0,0 +1,176 @@
+# Same interface and wire protocol as the usual MicroPython SH1106 driver:
+# the framebuffer is the driver's own, show() sends it page by page through
+# the I2C port to whatever sits at `addr` (the simulated panel).
+import framebuf
+
+_SET_CONTRAST = 0x81
+_SET_NORM_INV = 0xA6
+_SET_DISP = 0xAE
+_SET_SCAN_DIR = 0xC0
+_SET_SEG_REMAP = 0xA0
+_LOW_COLUMN_ADDRESS = 0x00
+_HIGH_COLUMN_ADDRESS = 0x10
+_SET_PAGE_ADDRESS = 0xB0
+
+
+class SH1106(framebuf.FrameBuffer):
+    def __init__(self, width, height, external_vcc, rotate=0):
+        if rotate not in (0, 180):
+            raise ValueError("rotate 90/270 is not simulated")
+        self.width = width
+        self.height = height
+        self.external_vcc = external_vcc
+        self.flip_en = rotate == 180
+        self.rotate90 = False
+        self.pages = height // 8
+        self.bufsize = self.pages * width
+        self.renderbuf = bytearray(self.bufsize)
+        self.displaybuf = self.renderbuf
+        self.pages_to_update = 0
+        super().__init__(self.renderbuf, width, height, framebuf.MONO_VLSB)
+        self.init_display()
+
+    def init_display(self):
+        self.reset()
+        for cmd in (
+            0xAE,
+            0xD5,
+            0x80,
+            0xA8,
+            self.height - 1,
+            0xD3,
+            0x00,
+            0x40,
+            0xAD,
+            0x8B,
+            0xDA,
+            0x12,
+            0x81,
+            0xFF,
+            0xD9,
+            0x22 if self.external_vcc else 0xF1,
+            0xDB,
+            0x40,
+            0xA4,
+            0xA6,
+        ):
+            self.write_cmd(cmd)
+        self.flip(self.flip_en, update=False)
+        self.fill(0)
+        self.show(True)
+        self.poweron()
+
+    def poweroff(self):
+        self.write_cmd(_SET_DISP | 0x00)
+
+    def poweron(self):
+        self.write_cmd(_SET_DISP | 0x01)
+
+    def flip(self, flag=None, update=True):
+        if flag is None:
+            flag = not self.flip_en
+        self.write_cmd(_SET_SEG_REMAP | (0x01 if flag else 0x00))
+        self.write_cmd(_SET_SCAN_DIR | (0x08 if flag else 0x00))
+        self.flip_en = flag
+        if update:
+            self.show(True)
+
+    def sleep(self, value):
+        self.write_cmd(_SET_DISP | (not value))
+
+    def contrast(self, contrast):
+        self.write_cmd(_SET_CONTRAST)
+        self.write_cmd(contrast)
+
+    def invert(self, invert):
+        self.write_cmd(_SET_NORM_INV | (invert & 1))
+
+    def show(self, full_update=False):
+        width, pages, buf = self.width, self.pages, self.displaybuf
+        if full_update:
+            pages_to_update = (1 << pages) - 1
+        else:
+            pages_to_update = self.pages_to_update
+        for page in range(pages):
+            if pages_to_update & (1 << page):
+                self.write_cmd(_SET_PAGE_ADDRESS | page)
+                self.write_cmd(_LOW_COLUMN_ADDRESS | 2)
+                self.write_cmd(_HIGH_COLUMN_ADDRESS | 0)
+                self.write_data(buf[width * page : width * page + width])
+        self.pages_to_update = 0
+
+    def register_updates(self, y0, y1=None):
+        start_page = max(0, y0 // 8)
+        end_page = max(0, y1 // 8) if y1 is not None else start_page
+        if start_page > end_page:
+            start_page, end_page = end_page, start_page
+        for page in range(start_page, min(end_page, self.pages - 1) + 1):
+            self.pages_to_update |= 1 << page
+
+    def pixel(self, x, y, color=None):
+        if color is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, color)
+        self.register_updates(y)
+
+    def fill(self, color):
+        super().fill(color)
+        self.pages_to_update = (1 << self.pages) - 1
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        super().blit(fbuf, x, y, key, palette)
+        self.register_updates(y, y + fbuf.height)
+
+    def scroll(self, x, y):
+        super().scroll(x, y)
+        self.pages_to_update = (1 << self.pages) - 1
+
+    def fill_rect(self, x, y, w, h, color):
+        super().fill_rect(x, y, w, h, color)
+        self.register_updates(y, y + h - 1)
+
+    def hline(self, x, y, w, color):
+        super().hline(x, y, w, color)
+        self.register_updates(y)
+
+    def vline(self, x, y, h, color):
+        super().vline(x, y, h, color)
+        self.register_updates(y, y + h - 1)
+
+    def line(self, x1, y1, x2, y2, color):
+        super().line(x1, y1, x2, y2, color)
+        self.register_updates(y1, y2)
+
+    def rect(self, x, y, w, h, color, fill=False):
+        super().rect(x, y, w, h, color, fill)
+        self.register_updates(y, y + h - 1)
+
+    def reset(self, res=None):
+        if res is not None:
+            res(1)
+            res(0)
+            res(1)
+
+
+class SH1106_I2C(SH1106):
+    def __init__(
+        self, width, height, i2c, res=None, addr=0x3C, rotate=0, external_vcc=False
+    ):
+        self.i2c = i2c
+        self.addr = addr
+        self.res = res
+        self.temp = bytearray(2)
+        if res is not None:
+            res.init(res.OUT, value=1)
+        super().__init__(width, height, external_vcc, rotate)
+
+    def write_cmd(self, cmd):
+        self.temp[0] = 0x80
+        self.temp[1] = cmd
+        self.i2c.writeto(self.addr, self.temp)
+
+    def write_data(self, buf):
+        self.i2c.writevto(self.addr, (b"\x40", buf))
+
+    def reset(self, res=None):
+        super().reset(self.res)
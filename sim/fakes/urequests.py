@@ -0,0 +1,78 @@
+# urequests against the in-process HTTP stub. The body arrives through
+# Response.raw, a stream, just as it would off the socket.
+import io
+import json as _json
+
+from sim import world as _world
+
+
+class _Body(io.BytesIO):
+    # The whole body has already arrived, so non-blocking reads never come
+    # up empty.
+    def setblocking(self, flag):
+        pass
+
+
+class Response:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.reason = b"OK" if status_code == 200 else b""
+        self.encoding = "utf-8"
+        self.raw = _Body(content)
+        self._cached = None
+
+    def close(self):
+        if self.raw is not None:
+            self.raw.close()
+            self.raw = None
+        self._cached = None
+
+    @property
+    def content(self):
+        if self._cached is None:
+            try:
+                self._cached = self.raw.read()
+            finally:
+                self.raw.close()
+                self.raw = None
+        return self._cached
+
+    @property
+    def text(self):
+        return str(self.content, self.encoding)
+
+    def json(self):
+        return _json.loads(self.content)
+
+
+def request(method, url, data=None, json=None, headers=None, stream=None, timeout=None):
+    if json is not None:
+        data = _json.dumps(json)
+    if isinstance(data, str):
+        data = data.encode()
+    status, content = _world.current.http.request(method, url, data)
+    return Response(status, content)
+
+
+def head(url, **kw):
+    return request("HEAD", url, **kw)
+
+
+def get(url, **kw):
+    return request("GET", url, **kw)
+
+
+def post(url, **kw):
+    return request("POST", url, **kw)
+
+
+def put(url, **kw):
+    return request("PUT", url, **kw)
+
+
+def patch(url, **kw):
+    return request("PATCH", url, **kw)
+
+
+def delete(url, **kw):
+    return request("DELETE", url, **kw)
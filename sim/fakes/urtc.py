@@ -0,0 +1,71 @@
+# The DS3231 part of the urtc library: datetime() reads and writes the BCD
+# time registers of the simulated chip over I2C.
+from collections import namedtuple
+
+DateTimeTuple = namedtuple(
+    "DateTimeTuple",
+    ["year", "month", "day", "weekday", "hour", "minute", "second", "millisecond"],
+)
+
+
+def datetime_tuple(
+    year=None,
+    month=None,
+    day=None,
+    weekday=None,
+    hour=None,
+    minute=None,
+    second=None,
+    millisecond=None,
+):
+    return DateTimeTuple(year, month, day, weekday, hour, minute, second, millisecond)
+
+
+def _bcd2bin(value):
+    return value - 6 * (value >> 4)
+
+
+def _bin2bcd(value):
+    return value + 6 * (value // 10)
+
+
+class DS3231:
+    _CONTROL_REGISTER = 0x0E
+    _STATUS_REGISTER = 0x0F
+    _DATETIME_REGISTER = 0x00
+
+    def __init__(self, i2c, address=0x68):
+        self.i2c = i2c
+        self.address = address
+
+    def datetime(self, datetime=None):
+        if datetime is None:
+            buffer = self.i2c.readfrom_mem(self.address, self._DATETIME_REGISTER, 7)
+            return datetime_tuple(
+                year=_bcd2bin(buffer[6]) + 2000,
+                month=_bcd2bin(buffer[5] & 0x1F),
+                day=_bcd2bin(buffer[4]),
+                weekday=_bcd2bin(buffer[3]),
+                hour=_bcd2bin(buffer[2] & 0x3F),
+                minute=_bcd2bin(buffer[1]),
+                second=_bcd2bin(buffer[0]),
+                millisecond=0,
+            )
+        datetime = datetime_tuple(*datetime)
+        buffer = bytearray(7)
+        buffer[0] = _bin2bcd(datetime.second)
+        buffer[1] = _bin2bcd(datetime.minute)
+        buffer[2] = _bin2bcd(datetime.hour)
+        buffer[3] = _bin2bcd(datetime.weekday)
+        buffer[4] = _bin2bcd(datetime.day)
+        buffer[5] = _bin2bcd(datetime.month)
+        buffer[6] = _bin2bcd(datetime.year - 2000)
+        self.i2c.writeto_mem(self.address, self._DATETIME_REGISTER, buffer)
+        status = self.i2c.readfrom_mem(self.address, self._STATUS_REGISTER, 1)[0]
+        self.i2c.writeto_mem(
+            self.address, self._STATUS_REGISTER, bytes((status & 0x7F,))
+        )
+
+    def lost_power(self):
+        status = self.i2c.readfrom_mem(self.address, self._STATUS_REGISTER, 1)[0]
+        return bool(status & 0x80)
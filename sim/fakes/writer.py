@@ -0,0 +1,45 @@
+# Minimal Writer with the interface of Peter Hinch's writer.py: renders
+# font_to_py fonts onto any FrameBuffer-like device.
+import framebuf
+
+
+class Writer:
+    state = {}
+
+    @staticmethod
+    def set_textpos(device, row=None, col=None):
+        state = Writer.state.setdefault(id(device), [0, 0])
+        if row is not None:
+            state[0] = row
+        if col is not None:
+            state[1] = col
+        return tuple(state)
+
+    def __init__(self, device, font, verbose=True):
+        self.device = device
+        self.font = font
+        self.height = font.height()
+        self.map = framebuf.MONO_HLSB if font.hmap() else framebuf.MONO_VLSB
+        Writer.state.setdefault(id(device), [0, 0])
+
+    def _state(self):
+        return Writer.state[id(self.device)]
+
+    def stringlen(self, string):
+        return sum(self.font.get_ch(ch)[2] for ch in string)
+
+    def printstring(self, string, invert=False):
+        state = self._state()
+        for ch in string:
+            if ch == "\n":
+                state[0] += self.height
+                state[1] = 0
+                continue
+            glyph, height, width = self.font.get_ch(ch)
+            buf = bytearray(glyph)
+            if invert:
+                for index in range(len(buf)):
+                    buf[index] ^= 0xFF
+            fbuf = framebuf.FrameBuffer(buf, width, height, self.map)
+            self.device.blit(fbuf, state[1], state[0])
+            state[1] += width
@@ -0,0 +1,80 @@
+import builtins
+import os
+import shutil
+
+_real = {
+    "open": builtins.open,
+    "stat": os.stat,
+    "mkdir": os.mkdir,
+    "listdir": os.listdir,
+    "remove": os.remove,
+    "rename": os.rename,
+    "rmdir": os.rmdir,
+}
+
+
+class DeviceFS:
+    # The device's flash as a directory on the host. Absolute paths whose
+    # first component does not exist on the host ("/log", "/assets.bin")
+    # are device paths and land under root; everything else, including the
+    # Python library itself, is left alone. Relative paths resolve against
+    # root because the simulator runs with root as its working directory.
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def map(self, path):
+        if isinstance(path, bytes):
+            path = path.decode()
+        if not isinstance(path, str) or not path.startswith("/"):
+            return path
+        if path.startswith(self.root + "/") or path == self.root:
+            return path
+        top = path.split("/")[1]
+        if top and os.path.lexists("/" + top):
+            return path
+        return self.root + path
+
+    def install(self):
+        fs = self
+
+        def open(file, *args, **kwargs):
+            return _real["open"](fs.map(file), *args, **kwargs)
+
+        def one_path(name):
+            real = _real[name]
+
+            def call(path, *args, **kwargs):
+                return real(fs.map(path), *args, **kwargs)
+
+            return call
+
+        def rename(src, dst):
+            return _real["rename"](fs.map(src), fs.map(dst))
+
+        builtins.open = open
+        for name in ("stat", "mkdir", "listdir", "remove", "rmdir"):
+            setattr(os, name, one_path(name))
+        os.rename = rename
+        # MicroPython's os has ilistdir() instead of scandir().
+        os.ilistdir = lambda path=".": (
+            (entry.name, 0x4000 if entry.is_dir() else 0x8000, 0, entry.stat().st_size)
+            for entry in os.scandir(fs.map(path))
+        )
+        os.chdir(self.root)
+
+    def seed(self, source, name):
+        # Copies a file or directory from the repository onto the "flash".
+        target = os.path.join(self.root, name.lstrip("/"))
+        if os.path.isdir(source):
+            shutil.copytree(source, target, dirs_exist_ok=True)
+        else:
+            shutil.copyfile(source, target)
+        return target
+
+
+def uninstall():
+    builtins.open = _real["open"]
+    for name in ("stat", "mkdir", "listdir", "remove", "rename", "rmdir"):
+        setattr(os, name, _real[name])
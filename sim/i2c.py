@@ -0,0 +1,108 @@
+import errno
+
+# Start and stop conditions are about one bit time each; every byte on the
+# wire, address included, is 8 bits plus ACK.
+_BITS_PER_BYTE = 9
+_FRAMING_BITS = 2
+
+
+class I2CBus:
+    # The wires: devices attach by 7-bit address, every transfer is counted
+    # and costed at the bus clock, and a missing device NACKs with EIO like
+    # the real controller.
+
+    def __init__(self, scl, sda):
+        self.scl = scl
+        self.sda = sda
+        self.devices = {}
+        self.stats = {"transactions": 0, "bytes": 0, "nacks": 0, "wire_us": 0}
+
+    def attach(self, address, device):
+        self.devices[address] = device
+
+    def device(self, address, freq, nbytes):
+        stats = self.stats
+        stats["transactions"] += 1
+        device = self.devices.get(address)
+        if device is None:
+            stats["nacks"] += 1
+            raise OSError(errno.EIO, "I2C device not responding")
+        stats["bytes"] += nbytes
+        bits = (nbytes + 1) * _BITS_PER_BYTE + _FRAMING_BITS
+        stats["wire_us"] += bits * 1_000_000 // freq
+        return device
+
+    def scan(self):
+        return sorted(self.devices)
+
+
+class I2CPort:
+    # What machine.I2C/SoftI2C hand out: one controller's view of a bus.
+
+    def __init__(self, bus, freq):
+        self.bus = bus
+        self.freq = freq
+
+    def scan(self):
+        return self.bus.scan()
+
+    def writeto(self, addr, buf, stop=True):
+        data = bytes(buf)
+        self.bus.device(addr, self.freq, len(data)).write(data)
+        return len(data)
+
+    def writevto(self, addr, vector, stop=True):
+        data = b"".join(bytes(buf) for buf in vector)
+        self.bus.device(addr, self.freq, len(data)).write(data)
+        return len(data)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        return bytes(self.bus.device(addr, self.freq, nbytes).read(nbytes))
+
+    def readfrom_into(self, addr, buf, stop=True):
+        buf[:] = self.readfrom(addr, len(buf), stop)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        data = bytes(buf)
+        device = self.bus.device(addr, self.freq, len(data) + addrsize // 8)
+        device.write(bytes((memaddr,)) + data)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        device = self.bus.device(addr, self.freq, nbytes + addrsize // 8 + 1)
+        device.write(bytes((memaddr,)))
+        return bytes(device.read(nbytes))
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        buf[:] = self.readfrom_mem(addr, memaddr, len(buf), addrsize)
+
+
+class RegisterDevice:
+    # Typical register-file chip: the first byte of a write sets the
+    # register pointer, the rest are written from there; reads continue
+    # from the pointer. Subclasses refresh registers in _before_read().
+
+    def __init__(self, size=256):
+        self.registers = bytearray(size)
+        self.pointer = 0
+
+    def write(self, data):
+        if not data:
+            return
+        self.pointer = data[0]
+        for value in data[1:]:
+            self._write_register(self.pointer, value)
+            self.pointer = (self.pointer + 1) % len(self.registers)
+
+    def read(self, nbytes):
+        self._before_read(self.pointer, nbytes)
+        out = bytearray(nbytes)
+        for index in range(nbytes):
+            out[index] = self.registers[self.pointer]
+            self.pointer = (self.pointer + 1) % len(self.registers)
+        return out
+
+    def _write_register(self, register, value):
+        self.registers[register] = value
+
+    def _before_read(self, register, nbytes):
+        pass
@@ -0,0 +1,344 @@
+import json
+import socket
+import struct
+import threading
+import time as _host
+
+import tz
+from sim.scenario import in_windows
+
+NTP_PORT = 123
+# Seconds between 1900 (NTP era) and 1970.
+NTP_UNIX_DELTA = 2208988800
+# getaddrinfo() on MicroPython fails with this when there is no route.
+EAI_FAIL = -2
+
+_real_getaddrinfo = socket.getaddrinfo
+
+
+class AccessPoint:
+    def __init__(self, world, ssid, password, rssi=-60, channel=6, outages=()):
+        self.world = world
+        self.ssid = ssid
+        self.password = password
+        self.rssi = rssi
+        self.channel = channel
+        self.outages = [tuple(window) for window in outages]
+
+    def up(self):
+        return not in_windows(self.world.clock.scenario_seconds(), self.outages)
+
+
+class WiFi:
+    # The radio environment: which networks are in range and whether the
+    # station interface currently has a link through one of them.
+
+    CONNECT_MS = 1200
+
+    def __init__(self, world, access_points):
+        self.world = world
+        self.access_points = [AccessPoint(world, **entry) for entry in access_points]
+        self.station = None
+        self.stats = {"scans": 0, "joins": 0}
+
+    def find(self, ssid):
+        for access_point in self.access_points:
+            if access_point.ssid == ssid and access_point.up():
+                return access_point
+        return None
+
+    def link_up(self):
+        station = self.station
+        return station is not None and station.isconnected()
+
+
+class NTPServer:
+    # One UDP socket on localhost per pool host name, answering like a real
+    # server from the host's clock plus offset_ms, after delay_ms.
+
+    def __init__(self, world, host, offset_ms=0, delay_ms=0, stratum=2, answer=True):
+        self.world = world
+        self.host = host
+        self.offset_ms = offset_ms
+        self.delay_ms = delay_ms
+        self.stratum = stratum
+        self.answer = answer
+        self.requests = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        thread = threading.Thread(target=self._serve, daemon=True)
+        thread.start()
+
+    def _timestamp(self):
+        ms = int(self.world.clock.utc() * 1000) + self.offset_ms
+        seconds, ms = divmod(ms, 1000)
+        return seconds + NTP_UNIX_DELTA, (ms << 32) // 1000
+
+    def _serve(self):
+        while True:
+            try:
+                request, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            received = self._timestamp()
+            self.requests += 1
+            if not self.answer or len(request) < 48:
+                continue
+            if self.delay_ms:
+                _host.sleep(self.delay_ms / 1000)
+            reply = bytearray(48)
+            # LI 0, version 4, mode 4 (server)
+            reply[0] = 0x24
+            reply[1] = self.stratum
+            reply[2] = 6
+            reply[3] = 0xEC
+            reply[12:16] = b"SIM\x00"
+            struct.pack_into("!II", reply, 16, *received)
+            reply[24:32] = request[40:48]
+            struct.pack_into("!II", reply, 32, *received)
+            struct.pack_into("!II", reply, 40, *self._timestamp())
+            try:
+                self.sock.sendto(reply, client)
+            except OSError:
+                pass
+
+
+class NTPStub:
+    def __init__(self, world, hosts, offset_ms=0, delay_ms=15, unreachable=()):
+        self.world = world
+        self.servers = {
+            host: NTPServer(
+                world, host, offset_ms, delay_ms, answer=host not in unreachable
+            )
+            for host in hosts
+        }
+
+    def resolve(self, host, port):
+        server = self.servers.get(host)
+        if server is None or port != NTP_PORT:
+            return None
+        if not self.world.wifi.link_up():
+            raise OSError(EAI_FAIL, "no route to host")
+        return [
+            (socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP, "", server.address)
+        ]
+
+
+def patch_getaddrinfo(*stubs):
+    # Each stub answers for its own host names and returns None otherwise.
+    def getaddrinfo(host, port, *args, **kwargs):
+        for stub in stubs:
+            resolved = stub.resolve(host, port)
+            if resolved is not None:
+                return resolved
+        return _real_getaddrinfo(host, port, *args, **kwargs)
+
+    socket.getaddrinfo = getaddrinfo
+
+
+class MQTTBroker:
+    # Stands in for the telemetry broker: a TCP server on localhost that
+    # speaks enough MQTT 3.1.1 for a publisher. Everything published lands
+    # in `messages` as (topic, payload, qos, dup). During an outage window,
+    # or with refuse=True, CONNECT is answered with "server unavailable";
+    # packets that arrive while the Wi-Fi link is down drop the connection.
+
+    def __init__(self, world, host, port, outages=(), refuse=False):
+        self.world = world
+        self.host = host
+        self.port = port
+        self.outages = [tuple(window) for window in outages]
+        self.refuse = refuse
+        self.messages = []
+        self.stats = {
+            "connects": 0,
+            "refused": 0,
+            "publishes": 0,
+            "duplicates": 0,
+            "pings": 0,
+            "dropped_connections": 0,
+        }
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(4)
+        self.address = self.sock.getsockname()
+        thread = threading.Thread(target=self._accept, daemon=True)
+        thread.start()
+
+    def resolve(self, host, port):
+        if host != self.host or port != self.port:
+            return None
+        if not self.world.wifi.link_up():
+            raise OSError(EAI_FAIL, "no route to host")
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", self.address)
+        ]
+
+    def available(self):
+        return not self.refuse and not in_windows(
+            self.world.clock.scenario_seconds(), self.outages
+        )
+
+    def records(self, suffix="/observations"):
+        # Decoded observation records from every batch received so far.
+        from obslog import HEADER_SIZE, RECORD_SIZE, unpack_record
+
+        records = []
+        for topic, payload, _, _ in self.messages:
+            if topic.endswith(suffix):
+                for offset in range(HEADER_SIZE, len(payload), RECORD_SIZE):
+                    records.append(unpack_record(payload, offset))
+        return records
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            thread = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            thread.start()
+
+    @staticmethod
+    def _read_exact(conn, nbytes):
+        data = b""
+        while len(data) < nbytes:
+            chunk = conn.recv(nbytes - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    def _read_packet(self, conn):
+        header = self._read_exact(conn, 1)[0]
+        length = shift = 0
+        while True:
+            byte = self._read_exact(conn, 1)[0]
+            length |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        return header, self._read_exact(conn, length) if length else b""
+
+    def _handle(self, conn, header, body):
+        # Returns False once the connection should close.
+        kind = header & 0xF0
+        if kind == 0x10:
+            if not self.available():
+                self.stats["refused"] += 1
+                conn.sendall(b"\x20\x02\x00\x03")
+                return False
+            self.stats["connects"] += 1
+            conn.sendall(b"\x20\x02\x00\x00")
+        elif kind == 0x30:
+            qos = (header >> 1) & 0x03
+            dup = bool(header & 0x08)
+            (topic_length,) = struct.unpack("!H", body[:2])
+            topic = body[2 : 2 + topic_length].decode()
+            offset = 2 + topic_length
+            if qos:
+                packet_id = body[offset : offset + 2]
+                offset += 2
+            self.messages.append((topic, body[offset:], qos, dup))
+            self.stats["publishes"] += 1
+            if dup:
+                self.stats["duplicates"] += 1
+            if qos == 1:
+                conn.sendall(b"\x40\x02" + packet_id)
+        elif kind == 0xC0:
+            self.stats["pings"] += 1
+            conn.sendall(b"\xd0\x00")
+        elif kind == 0xE0:
+            return False
+        return True
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    header, body = self._read_packet(conn)
+                except (EOFError, OSError):
+                    return
+                if not self.world.wifi.link_up():
+                    self.stats["dropped_connections"] += 1
+                    return
+                try:
+                    if not self._handle(conn, header, body):
+                        return
+                except OSError:
+                    return
+
+
+class HTTPStub:
+    # Answers urequests in-process. Handlers get (method, url, body) and
+    # return (status, body bytes); the longest matching URL prefix wins.
+
+    def __init__(self, world):
+        self.world = world
+        self.routes = {}
+        self.stats = {"requests": 0, "bytes": 0, "refused": 0}
+
+    def route(self, prefix, handler):
+        self.routes[prefix] = handler
+
+    def request(self, method, url, body=None):
+        if not self.world.wifi.link_up():
+            self.stats["refused"] += 1
+            raise OSError(EAI_FAIL, "no route to host")
+        self.stats["requests"] += 1
+        for prefix in sorted(self.routes, key=len, reverse=True):
+            if url.startswith(prefix):
+                status, content = self.routes[prefix](method, url, body)
+                break
+        else:
+            status, content = 404, b"Not Found"
+        self.stats["bytes"] += len(content)
+        return status, content
+
+
+def parse_query(url):
+    query = url.partition("?")[2]
+    params = {}
+    for pair in query.split("&"):
+        if pair:
+            key, _, value = pair.partition("=")
+            params[key] = value.replace("%2F", "/").replace("%2C", ",")
+    return params
+
+
+# What a daily Open-Meteo forecast looks like when the scenario does not say.
+DEFAULT_FORECAST = {
+    "weather_code": [3, 61, 0, 71, 2, 45, 80],
+    "temperature_2m_max": [9.4, 7.1, 11.8, 2.3, 6.0, 4.4, 8.9],
+    "temperature_2m_min": [2.1, 3.5, 1.0, -3.2, -0.4, 1.7, 2.8],
+    "precipitation_sum": [0.0, 6.2, 0.0, 3.1, 0.2, 0.0, 9.5],
+    "wind_speed_10m_max": [14.2, 22.8, 9.1, 17.5, 11.0, 6.3, 25.4],
+}
+
+
+def open_meteo_handler(world, overrides):
+    def handler(method, url, body):
+        params = parse_query(url)
+        days = int(params.get("forecast_days", 7))
+        variables = [name for name in params.get("daily", "").split(",") if name]
+        zone = tz.get_zone(params.get("timezone", "UTC"))
+        today = int(zone.to_local(world.clock.utc()))
+        dates = [
+            "{:04d}-{:02d}-{:02d}".format(*_host.gmtime(today + day * 86400)[:3])
+            for day in range(days)
+        ]
+        daily = {"time": dates}
+        for name in variables:
+            values = overrides.get(name, DEFAULT_FORECAST.get(name, [0]))
+            daily[name] = [values[day % len(values)] for day in range(days)]
+        document = {
+            "latitude": float(params.get("latitude", 0)),
+            "longitude": float(params.get("longitude", 0)),
+            "timezone": params.get("timezone", "GMT"),
+            "daily_units": {name: "" for name in ["time"] + variables},
+            "daily": daily,
+        }
+        return 200, json.dumps(document).encode()
+
+    return handler
@@ -0,0 +1,162 @@
+COLUMNS = 132
+PAGES = 8
+WIDTH = 128
+HEIGHT = 64
+# The glass is wired to SEG2..SEG129 of the controller.
+FIRST_VISIBLE_COLUMN = 2
+
+# Commands that take one argument byte.
+_TWO_BYTE_COMMANDS = (0x81, 0xA8, 0xAD, 0xD3, 0xD5, 0xD9, 0xDA, 0xDB)
+
+
+class SH1106Panel:
+    # The controller side of the display: a 132x64 display RAM written
+    # through the I2C command/data protocol with page and column addressing,
+    # exactly what the driver (or DirtyRegionDisplay) sends. What the panel
+    # shows is read back out of this RAM, so a frame that never reached the
+    # wire never shows up in a snapshot either.
+
+    def __init__(self):
+        self.ram = [bytearray(COLUMNS) for _ in range(PAGES)]
+        self.page = 0
+        self.column = 0
+        self.on = False
+        self.contrast = 0x80
+        self.inverted = False
+        self.all_on = False
+        self.segment_remap = False
+        self.com_reverse = False
+        self.start_line = 0
+        self.display_offset = 0
+        self._pending = None
+        self._rmw_column = None
+        self.stats = {"commands": 0, "data_bytes": 0, "writes": 0}
+
+    def write(self, data):
+        self.stats["writes"] += 1
+        index = 0
+        while index < len(data):
+            control = data[index]
+            index += 1
+            if control & 0x40:
+                self._data(data[index:])
+                return
+            if control & 0x80:
+                # Co=1: one command byte, then another control byte.
+                if index < len(data):
+                    self._command(data[index])
+                    index += 1
+            else:
+                for value in data[index:]:
+                    self._command(value)
+                return
+
+    def read(self, nbytes):
+        # Status read: bit 6 is set while the display is off.
+        return bytes((0x00 if self.on else 0x40,)) * nbytes
+
+    def _command(self, value):
+        self.stats["commands"] += 1
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            if pending == 0x81:
+                self.contrast = value
+            elif pending == 0xD3:
+                self.display_offset = value & 0x3F
+            return
+        if value in _TWO_BYTE_COMMANDS:
+            self._pending = value
+        elif value <= 0x0F:
+            self.column = (self.column & 0xF0) | value
+        elif value <= 0x1F:
+            self.column = ((value & 0x0F) << 4) | (self.column & 0x0F)
+        elif 0x40 <= value <= 0x7F:
+            self.start_line = value & 0x3F
+        elif value in (0xA0, 0xA1):
+            self.segment_remap = bool(value & 0x01)
+        elif value in (0xA4, 0xA5):
+            self.all_on = bool(value & 0x01)
+        elif value in (0xA6, 0xA7):
+            self.inverted = bool(value & 0x01)
+        elif value in (0xAE, 0xAF):
+            self.on = bool(value & 0x01)
+        elif 0xB0 <= value <= 0xB7:
+            self.page = value & 0x07
+        elif value in (0xC0, 0xC8):
+            self.com_reverse = bool(value & 0x08)
+        elif value == 0xE0:
+            self._rmw_column = self.column
+        elif value == 0xEE and self._rmw_column is not None:
+            self.column = self._rmw_column
+            self._rmw_column = None
+
+    def _data(self, data):
+        self.stats["data_bytes"] += len(data)
+        row = self.ram[self.page]
+        for value in data:
+            # The column counter stops at the last column.
+            if self.column < COLUMNS:
+                row[self.column] = value
+                self.column += 1
+
+    def framebuffer(self):
+        # The visible RAM as a 128x64 MONO_VLSB buffer, comparable byte for
+        # byte with the driver's own framebuffer.
+        out = bytearray(WIDTH * PAGES)
+        for page in range(PAGES):
+            start = FIRST_VISIBLE_COLUMN
+            out[page * WIDTH : (page + 1) * WIDTH] = self.ram[page][
+                start : start + WIDTH
+            ]
+        return out
+
+    def ram_pixel(self, x, y):
+        column = x + FIRST_VISIBLE_COLUMN
+        return (self.ram[y >> 3][column] >> (y & 7)) & 1
+
+    def rows(self, glass=False):
+        # 64 rows of 128 pixels (0/1). By default in framebuffer orientation,
+        # i.e. the way the picture looks on the mounted device; glass=True
+        # applies segment remap and COM direction, giving the panel's own
+        # view.
+        if not self.on:
+            return [[0] * WIDTH for _ in range(HEIGHT)]
+        rows = []
+        for y in range(HEIGHT):
+            line = y
+            if glass and self.com_reverse:
+                line = HEIGHT - 1 - y
+            line = (line + self.start_line + self.display_offset) % HEIGHT
+            row = []
+            for x in range(WIDTH):
+                column = WIDTH - 1 - x if glass and self.segment_remap else x
+                pixel = 1 if self.all_on else self.ram_pixel(column, line)
+                row.append(pixel ^ self.inverted)
+            rows.append(row)
+        return rows
+
+    def to_pbm(self, path, glass=False, scale=1):
+        rows = self.rows(glass)
+        width = WIDTH * scale
+        with open(path, "wb") as f:
+            f.write(f"P4\n{width} {HEIGHT * scale}\n".encode())
+            for row in rows:
+                packed = bytearray((width + 7) // 8)
+                for x in range(width):
+                    if row[x // scale]:
+                        packed[x >> 3] |= 0x80 >> (x & 7)
+                for _ in range(scale):
+                    f.write(packed)
+
+    def to_ascii(self, glass=False):
+        # Two pixel rows per text line using half-block characters.
+        rows = self.rows(glass)
+        glyphs = (" ", "▄", "▀", "█")
+        lines = []
+        for y in range(0, HEIGHT, 2):
+            upper, lower = rows[y], rows[y + 1]
+            lines.append(
+                "".join(glyphs[upper[x] * 2 + lower[x]] for x in range(WIDTH))
+            )
+        return "\n".join(lines)
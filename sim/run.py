@@ -0,0 +1,59 @@
+# Runs the whole application on the simulated hardware:
+#   python -m sim.run --duration 120 --frames /tmp/frames
+#   python -m sim.run --scenario storm.json --root /tmp/flash
+import argparse
+import asyncio
+import os
+import sys
+
+import sim
+
+
+async def _capture_frames(world, directory, interval):
+    # Saves the panel whenever its RAM differs from the last saved frame.
+    os.makedirs(directory, exist_ok=True)
+    last = None
+    count = 0
+    while True:
+        frame = world.panel.framebuffer()
+        if frame != last:
+            path = os.path.join(directory, f"frame_{count:04d}.pbm")
+            world.panel.to_pbm(path, scale=2)
+            last = frame
+            count += 1
+        await asyncio.sleep(interval)
+
+
+async def _run(world, app, duration, frames, interval):
+    if frames:
+        asyncio.create_task(_capture_frames(world, frames, interval))
+    try:
+        await asyncio.wait_for(app.main(), duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m sim.run")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--scenario", help="scenario JSON file")
+    parser.add_argument("--root", help="directory holding the simulated flash")
+    parser.add_argument("--frames", help="directory for PBM snapshots of the panel")
+    parser.add_argument("--frame-interval", type=float, default=0.5)
+    args = parser.parse_args(argv[1:])
+
+    scenario = os.path.abspath(args.scenario) if args.scenario else None
+    frames = os.path.abspath(args.frames) if args.frames else None
+    world = sim.install(scenario, args.root)
+    print(f"[Sim] Flash at {world.fs.root}")
+
+    import main as app
+
+    asyncio.run(_run(world, app, args.duration, frames, args.frame_interval))
+    print(world.panel.to_ascii())
+    world.print_stats()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
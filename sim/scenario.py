@@ -0,0 +1,113 @@
+import json
+
+
+class Series:
+    # A signal over scenario seconds: piecewise-linear between (t, value)
+    # points and held flat past either end. A bare number is a constant.
+
+    def __init__(self, points):
+        if isinstance(points, (int, float)):
+            points = [(0, points)]
+        self.points = sorted((float(t), float(v)) for t, v in points)
+        if not self.points:
+            raise ValueError("a series needs at least one point")
+
+    def at(self, t):
+        points = self.points
+        if t <= points[0][0]:
+            return points[0][1]
+        if t >= points[-1][0]:
+            return points[-1][1]
+        low, high = 0, len(points) - 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if points[middle][0] <= t:
+                low = middle
+            else:
+                high = middle
+        t0, v0 = points[low]
+        t1, v1 = points[high]
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+    @classmethod
+    def from_csv(cls, path, column):
+        # First column is scenario seconds; `column` is a header name.
+        points = []
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+            index = header.index(column)
+            for line in f:
+                fields = line.strip().split(",")
+                if len(fields) > index and fields[index]:
+                    points.append((float(fields[0]), float(fields[index])))
+        return cls(points)
+
+
+def in_windows(t, windows):
+    return any(start <= t < end for start, end in windows)
+
+
+class Scenario:
+    # Everything the simulated world does on its own. Loaded from JSON:
+    #
+    #   {"time_scale": 60,
+    #    "bme280": {"temperature": [[0, 22.5], [3600, 23.1]],
+    #               "humidity": 45, "pressure": [[0, 1016], [7200, 1009]]},
+    #    "ds18x20": [{"temperature": [[0, 4.0], [3600, 2.5]],
+    #                 "dropouts": [[600, 660]]}],
+    #    "rtc": {"drift_ppm": 20, "offset_s": -3},
+    #    "wifi": [{"ssid": "home", "password": "secret", "rssi": -60,
+    #              "outages": [[300, 360]]}],
+    #    "ntp": {"offset_ms": 0, "delay_ms": 20, "unreachable": []},
+    #    "forecast": {"weather_code": [3, 61, 0]},
+    #    "mqtt": {"outages": [[1200, 3600]], "refuse": false}}
+    #
+    # Series values take either form Series() accepts, or
+    # {"csv": path, "column": name}.
+
+    DEFAULTS = {
+        "time_scale": 1,
+        "ticks_offset_ms": 0,
+        "bme280": {"temperature": 22.5, "humidity": 45, "pressure": 1013.25},
+        "ds18x20": [{"temperature": 5.0}],
+        "rtc": {"drift_ppm": 0, "offset_s": 0},
+        "wifi": [{"ssid": "weatherbox-sim", "password": "simulated", "rssi": -55}],
+        "ntp": {"offset_ms": 0, "delay_ms": 15, "unreachable": []},
+        "forecast": {},
+        "mqtt": {"outages": [], "refuse": False},
+    }
+
+    def __init__(self, data=None):
+        merged = dict(self.DEFAULTS)
+        merged.update(data or {})
+        self.data = merged
+        self.time_scale = merged["time_scale"]
+        self.ticks_offset_ms = merged["ticks_offset_ms"]
+        bme = dict(self.DEFAULTS["bme280"])
+        bme.update(merged["bme280"])
+        self.bme280 = {name: _series(value) for name, value in bme.items()}
+        self.ds18x20 = [
+            {
+                "temperature": _series(probe["temperature"]),
+                "dropouts": [tuple(window) for window in probe.get("dropouts", ())],
+            }
+            for probe in merged["ds18x20"]
+        ]
+        self.rtc = dict(self.DEFAULTS["rtc"], **merged["rtc"])
+        self.wifi = merged["wifi"]
+        self.ntp = dict(self.DEFAULTS["ntp"], **merged["ntp"])
+        self.forecast = merged["forecast"]
+        self.mqtt = dict(self.DEFAULTS["mqtt"], **merged["mqtt"])
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+
+def _series(value):
+    if isinstance(value, Series):
+        return value
+    if isinstance(value, dict):
+        return Series.from_csv(value["csv"], value["column"])
+    return Series(value)
@@ -0,0 +1,108 @@
+from sim.clock import Clock
+from sim.devices import BME280Device, DS18B20Probe, DS3231Device, OneWireBus
+from sim.fs import DeviceFS
+from sim.i2c import I2CBus
+from sim.net import HTTPStub, MQTTBroker, NTPStub, WiFi, open_meteo_handler
+from sim.panel import SH1106Panel
+
+# The world the fake drivers talk to; set by sim.install().
+current = None
+
+DISPLAY_ADDRESS = 0x3C
+RTC_ADDRESS = 0x68
+BME280_ADDRESS = 0x76
+# Serial numbers of the simulated DS18B20 probes, one per scenario entry.
+PROBE_SERIAL_BASE = 0x1F2E3D4C5B00
+
+
+class World:
+    def __init__(self, scenario, root, config):
+        self.scenario = scenario
+        self.config = config
+        self.clock = Clock(scenario.ticks_offset_ms, scenario.time_scale)
+        self.fs = DeviceFS(root)
+        self.i2c_buses = {}
+        self.onewire_buses = {}
+        self.leds = {}
+
+        self.panel = SH1106Panel()
+        self.bme280 = BME280Device(self, scenario.bme280)
+        rtc_start = int(self.clock.utc()) + scenario.rtc["offset_s"]
+        self.rtc = DS3231Device(self, rtc_start, scenario.rtc["drift_ppm"])
+        self.probes = [
+            DS18B20Probe(
+                self, probe["temperature"], PROBE_SERIAL_BASE + index, probe["dropouts"]
+            )
+            for index, probe in enumerate(scenario.ds18x20)
+        ]
+
+        self.wifi = WiFi(self, scenario.wifi)
+        self.ntp = NTPStub(self, config.NTP_SERVERS, **scenario.ntp)
+        self.http = HTTPStub(self)
+        self.mqtt = MQTTBroker(
+            self, config.MQTT_BROKER, config.MQTT_PORT, **scenario.mqtt
+        )
+        self.http.route(
+            "https://api.open-meteo.com/", open_meteo_handler(self, scenario.forecast)
+        )
+
+    def i2c_bus(self, scl, sda):
+        bus = self.i2c_buses.get((scl, sda))
+        if bus is None:
+            bus = self.i2c_buses[(scl, sda)] = I2CBus(scl, sda)
+        return bus
+
+    def onewire_bus(self, pin):
+        bus = self.onewire_buses.get(pin)
+        if bus is None:
+            bus = self.onewire_buses[pin] = OneWireBus(pin)
+        return bus
+
+    def wire(self):
+        # Puts every chip on the pins config.py says it is on.
+        devices = {
+            "display": (DISPLAY_ADDRESS, self.panel),
+            "rtc": (RTC_ADDRESS, self.rtc),
+            "bme280": (BME280_ADDRESS, self.bme280),
+        }
+        for name, scl, sda, _ in self.config.I2C_BUSES:
+            if name in devices:
+                self.i2c_bus(scl, sda).attach(*devices[name])
+        self.onewire_bus(self.config.DS18X20_PIN).probes.extend(self.probes)
+
+    def print_stats(self):
+        for (scl, sda), bus in self.i2c_buses.items():
+            stats = bus.stats
+            print(
+                f"[Sim] I2C SCL={scl} SDA={sda}: transactions={stats['transactions']} "
+                f"bytes={stats['bytes']} nacks={stats['nacks']} "
+                f"wire={stats['wire_us']}us"
+            )
+        panel = self.panel.stats
+        print(
+            f"[Sim] Panel: writes={panel['writes']} commands={panel['commands']} "
+            f"data={panel['data_bytes']} bytes"
+        )
+        for pin, bus in self.onewire_buses.items():
+            stats = bus.stats
+            print(
+                f"[Sim] 1-Wire GP{pin}: resets={stats['resets']} "
+                f"written={stats['bytes_written']} read={stats['bytes_read']}"
+            )
+        print(
+            f"[Sim] BME280 measurements={self.bme280.measurements} "
+            f"DS3231 writes={self.rtc.writes} drift={self.rtc.drift_ppm}ppm"
+        )
+        print(
+            f"[Sim] Wi-Fi scans={self.wifi.stats['scans']} "
+            f"joins={self.wifi.stats['joins']} "
+            f"NTP requests={sum(s.requests for s in self.ntp.servers.values())} "
+            f"HTTP requests={self.http.stats['requests']} "
+            f"refused={self.http.stats['refused']}"
+        )
+        mqtt = self.mqtt.stats
+        print(
+            f"[Sim] MQTT connects={mqtt['connects']} refused={mqtt['refused']} "
+            f"publishes={mqtt['publishes']} duplicates={mqtt['duplicates']} "
+            f"pings={mqtt['pings']} records={len(self.mqtt.records())}"
+        )
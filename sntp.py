@@ -0,0 +1,279 @@
+import json
+import select
+import socket
+import struct
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import log
+import resolver
+
+# Seconds between the NTP era (1900) and this port's epoch: 2000 on the
+# Pico, 1970 on CPython and newer ports. mktime() cannot be asked, since a
+# 1970 date is out of range on a 2000-epoch port.
+NTP_DELTA = 3155673600 if time.gmtime(0)[0] == 2000 else 2208988800
+
+PACKET_SIZE = 48
+# LI 0 (no warning), version 4, mode 3 (client)
+_CLIENT_HEADER = 0x23
+_MODE_SERVER = 4
+_LEAP_UNSYNCHRONIZED = 3
+# Longest the poll for replies holds the event loop before other tasks get
+# a turn. A reply is timestamped when it is noticed, so a reply that lands
+# while another task runs shows up with a longer round trip; best_sample()
+# then prefers one that did not.
+POLL_SLICE_MS = 20
+
+stats = {"queries": 0, "responses": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+_log = log.get("SNTP")
+
+
+def _to_ntp(ms):
+    seconds, ms = divmod(ms, 1000)
+    return seconds + NTP_DELTA, (ms << 32) // 1000
+
+
+def _from_ntp(seconds, fraction):
+    # Integer milliseconds: a float32 cannot hold an NTP timestamp to better
+    # than a couple of minutes.
+    return (seconds - NTP_DELTA) * 1000 + ((fraction * 1000) >> 32)
+
+
+class Sample:
+    def __init__(self, server, stratum, offset_ms, delay_ms):
+        self.server = server
+        self.stratum = stratum
+        self.offset_ms = offset_ms
+        self.delay_ms = delay_ms
+
+    def __repr__(self):
+        return (
+            f"{self.server}: stratum={self.stratum} "
+            f"offset={self.offset_ms}ms delay={self.delay_ms}ms"
+        )
+
+
+def _parse(server, data, sent, t1, t4):
+    if len(data) < PACKET_SIZE:
+        return None
+    fields = struct.unpack("!BBbb11I", data[:PACKET_SIZE])
+    header, stratum = fields[0], fields[1]
+    if header & 0x07 != _MODE_SERVER or header >> 6 == _LEAP_UNSYNCHRONIZED:
+        return None
+    # Stratum 0 is a kiss-o'-death packet; 16 means unsynchronized.
+    if not 1 <= stratum <= 15:
+        return None
+    originate = fields[9:11]
+    if originate != sent:
+        return None
+    t2 = _from_ntp(fields[11], fields[12])
+    t3 = _from_ntp(fields[13], fields[14])
+    offset = ((t2 - t1) + (t3 - t4)) // 2
+    delay = (t4 - t1) - (t3 - t2)
+    return Sample(server, stratum, offset, max(delay, 0))
+
+
+def _take(pending, polled):
+    # MicroPython's poll() returns the socket object, CPython's a file
+    # descriptor.
+    for key, entry in pending.items():
+        sock = entry[1]
+        if sock is polled or (isinstance(polled, int) and sock.fileno() == polled):
+            return pending.pop(key)
+    return None
+
+
+async def query(servers, clock_ms, timeout_ms=1500):
+    # Sends one request to every server at once and collects the replies
+    # for up to timeout_ms. clock_ms() is the local UTC clock being
+    # measured; offsets are "server minus local". The poll yields to the
+    # event loop every POLL_SLICE_MS; only an uncached DNS lookup blocks.
+    pending = {}
+    poller = select.poll()
+    for server in servers:
+        try:
+            addr = resolver.resolve(server, 123)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        except OSError as e:
+            stats["errors"] += 1
+            _log.warning("Cannot reach %s: %s", server, e)
+            continue
+        try:
+            sock.setblocking(False)
+            packet = bytearray(PACKET_SIZE)
+            packet[0] = _CLIENT_HEADER
+            t1 = clock_ms()
+            sent = _to_ntp(t1)
+            struct.pack_into("!II", packet, 40, *sent)
+            sock.sendto(packet, addr)
+        except OSError as e:
+            stats["errors"] += 1
+            _log.error("Error querying %s: %s", server, e)
+            sock.close()
+            continue
+        stats["queries"] += 1
+        pending[id(sock)] = (server, sock, sent, t1)
+        poller.register(sock, select.POLLIN)
+
+    samples = []
+    deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+    try:
+        while pending:
+            remaining = time.ticks_diff(deadline, time.ticks_ms())
+            if remaining <= 0:
+                break
+            events = poller.poll(min(remaining, POLL_SLICE_MS))
+            if not events:
+                await asyncio.sleep(0)
+                continue
+            for event in events:
+                entry = _take(pending, event[0])
+                if entry is None:
+                    continue
+                server, sock, sent, t1 = entry
+                poller.unregister(sock)
+                try:
+                    data = sock.recv(PACKET_SIZE)
+                    t4 = clock_ms()
+                except OSError as e:
+                    stats["errors"] += 1
+                    _log.error("Error reading from %s: %s", server, e)
+                    continue
+                finally:
+                    sock.close()
+                sample = _parse(server, data, sent, t1, t4)
+                if sample is None:
+                    stats["rejected"] += 1
+                else:
+                    stats["responses"] += 1
+                    samples.append(sample)
+    finally:
+        stats["timeouts"] += len(pending)
+        for server, sock, _, _ in pending.values():
+            sock.close()
+            # Pool servers come and go; look this one up again next time.
+            resolver.forget(server, 123)
+    return samples
+
+
+def best_sample(samples):
+    # The sample with the shortest round trip has the smallest offset error
+    # bound (delay / 2); stratum breaks ties.
+    best = None
+    for sample in samples:
+        key = (sample.delay_ms, sample.stratum)
+        if best is None or key < (best.delay_ms, best.stratum):
+            best = sample
+    return best
+
+
+class DriftEstimator:
+    # Tracks how fast the RTC gains or loses time between NTP syncs and
+    # turns that into the next sync interval: the worse the drift, the
+    # sooner the clock would exceed max_error_ms. Persisted so the estimate
+    # survives reboots. A correction no crystal could need, more than max_ppm
+    # over the span, is a step (the RTC set by hand, or holding local time)
+    # and restarts the measurement instead of feeding the average.
+
+    def __init__(
+        self,
+        path,
+        default_interval,
+        min_interval,
+        max_interval,
+        max_error_ms,
+        min_span,
+        max_ppm,
+    ):
+        self.path = path
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_error_ms = max_error_ms
+        self.min_span = min_span
+        self.max_ppm = max_ppm
+        # Start of the span being measured, and the corrections made since
+        # then by syncs that came too soon to measure on their own.
+        self.last_sync = None
+        self.pending_offset_ms = 0
+        self.drift_ppm = None
+        self.samples = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            self.last_sync = saved.get("last_sync")
+            self.pending_offset_ms = saved.get("pending_offset_ms", 0)
+            self.drift_ppm = saved.get("drift_ppm")
+            self.samples = saved.get("samples", 0)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        try:
+            with open(self.path, "w") as f:
+                json.dump(
+                    {
+                        "last_sync": self.last_sync,
+                        "pending_offset_ms": self.pending_offset_ms,
+                        "drift_ppm": self.drift_ppm,
+                        "samples": self.samples,
+                    },
+                    f,
+                )
+        except OSError as e:
+            _log.error("Error saving drift state: %s", e)
+
+    def _restart(self, utc_seconds):
+        self.last_sync = utc_seconds
+        self.pending_offset_ms = 0
+
+    def update(self, offset_ms, utc_seconds):
+        # offset_ms is how far the RTC was behind NTP just before it was
+        # corrected; the start of the span left it at (close to) zero.
+        if self.last_sync is None:
+            self._restart(utc_seconds)
+        else:
+            span = utc_seconds - self.last_sync
+            total_ms = self.pending_offset_ms + offset_ms
+            if span < 0 or abs(total_ms) * 1000 > self.max_ppm * max(
+                span, self.min_span
+            ):
+                _log.warning(
+                    "RTC off by %sms after %ss, not drift; restarting", total_ms, span
+                )
+                self._restart(utc_seconds)
+            elif span < self.min_span:
+                # Too short to measure: keep the start of the span, so a run
+                # of early syncs still adds up to one measurement.
+                self.pending_offset_ms = total_ms
+            else:
+                measured = -total_ms * 1000 / span
+                if self.drift_ppm is None:
+                    self.drift_ppm = measured
+                else:
+                    self.drift_ppm = (self.drift_ppm + measured) / 2
+                self.samples += 1
+                self._restart(utc_seconds)
+        self._save()
+        return self.drift_ppm
+
+    def next_interval(self):
+        if not self.drift_ppm:
+            return self.default_interval
+        interval = int(self.max_error_ms * 1000 / abs(self.drift_ppm))
+        return max(self.min_interval, min(self.max_interval, interval))
+
+
+def print_stats():
+    print(
+        f"[SNTP] queries={stats['queries']} responses={stats['responses']} "
+        f"rejected={stats['rejected']} timeouts={stats['timeouts']} "
+        f"errors={stats['errors']}"
+    )
@@ -0,0 +1,208 @@
+import binascii
+import json
+import struct
+import time
+
+import machine
+
+import log
+import mqtt
+import wi_fi
+from config import (MQTT_BROKER, MQTT_KEEPALIVE_SECONDS, MQTT_PASSWORD,
+                    MQTT_PORT, MQTT_TIMEOUT_MS, MQTT_USER, NETWORK_POWER_SAVE,
+                    TELEMETRY_BATCH_SIZE, TELEMETRY_INTERVAL_SECONDS,
+                    TELEMETRY_QUEUE_LENGTH, TELEMETRY_SAMPLE_SECONDS,
+                    TELEMETRY_TOPIC_PREFIX)
+from obslog import (EPOCH_YEAR, HEADER_FORMAT, HEADER_SIZE, MAGIC, RECORD_SIZE,
+                    VERSION, pack_record)
+
+DEVICE_ID = binascii.hexlify(machine.unique_id()).decode()
+OBSERVATIONS_TOPIC = f"{TELEMETRY_TOPIC_PREFIX}/{DEVICE_ID}/observations"
+METRICS_TOPIC = f"{TELEMETRY_TOPIC_PREFIX}/{DEVICE_ID}/metrics"
+
+stats = {
+    "batches": 0,
+    "published": 0,
+    "dropped": 0,
+    "retries": 0,
+    "errors": 0,
+    "connects": 0,
+    "max_depth": 0,
+    "last_latency_ms": 0,
+    "max_latency_ms": 0,
+    "total_latency_ms": 0,
+}
+_log = log.get("Telemetry")
+
+# A batch is an observation log segment, header and all, so the receiving
+# end decodes it with obslog.unpack_record() (or tools/read_obslog.py).
+# Timestamps are UTC, counted from Jan 1 of the epoch year in the header.
+_batch = bytearray(HEADER_SIZE + TELEMETRY_BATCH_SIZE * RECORD_SIZE)
+struct.pack_into(HEADER_FORMAT, _batch, 0, MAGIC, VERSION, RECORD_SIZE, EPOCH_YEAR)
+_batch_count = 0
+# ticks_ms of the last sample kept: unlike the timestamps, it never steps
+# back when an NTP sync corrects the clock.
+_last_sampled_ms = None
+# [payload, packet id] per batch waiting for its PUBACK, oldest first. The
+# packet id is assigned on the first send and kept, so a retry after a lost
+# connection goes out as a duplicate of the same message.
+_queue = []
+
+_client = mqtt.MQTTClient(
+    f"weatherbox-{DEVICE_ID}",
+    MQTT_BROKER,
+    MQTT_PORT,
+    MQTT_USER,
+    MQTT_PASSWORD,
+    MQTT_KEEPALIVE_SECONDS,
+    MQTT_TIMEOUT_MS,
+)
+# Wi-Fi connect count when the broker connection was opened: a socket from
+# before the radio last came up is dead even if nobody has noticed yet.
+_connected_on_link = None
+
+
+def _enqueue(payload):
+    if len(_queue) >= TELEMETRY_QUEUE_LENGTH:
+        _queue.pop(0)
+        stats["dropped"] += 1
+        _log.warning("Queue full, dropped the oldest batch.")
+    _queue.append([payload, None])
+    stats["batches"] += 1
+    if len(_queue) > stats["max_depth"]:
+        stats["max_depth"] = len(_queue)
+
+
+def add_snapshot(snapshot):
+    # Observation bus subscriber: keeps one snapshot per
+    # TELEMETRY_SAMPLE_SECONDS and queues a batch every TELEMETRY_BATCH_SIZE.
+    global _batch_count, _last_sampled_ms
+    now = time.ticks_ms()
+    if (
+        _last_sampled_ms is not None
+        and time.ticks_diff(now, _last_sampled_ms) < TELEMETRY_SAMPLE_SECONDS * 1000
+    ):
+        return False
+    _last_sampled_ms = now
+    pack_record(
+        _batch,
+        HEADER_SIZE + _batch_count * RECORD_SIZE,
+        snapshot.timestamp,
+        snapshot.outside_temp_C,
+        snapshot.inside_temp_C,
+        snapshot.humidity,
+        snapshot.pressure_hPa,
+    )
+    _batch_count += 1
+    if _batch_count == TELEMETRY_BATCH_SIZE:
+        _flush_batch()
+    return True
+
+
+def _flush_batch():
+    # Queues the samples kept so far, however few, as a batch of their own.
+    global _batch_count
+    if _batch_count:
+        _enqueue(bytes(_batch[: HEADER_SIZE + _batch_count * RECORD_SIZE]))
+        _batch_count = 0
+
+
+def _connection_current():
+    return (
+        _client.is_connected()
+        and _connected_on_link == wi_fi.manager.stats["connects"]
+    )
+
+
+async def _connect():
+    global _connected_on_link
+    if _connection_current():
+        return
+    await _client.connect()
+    _connected_on_link = wi_fi.manager.stats["connects"]
+    stats["connects"] += 1
+
+
+async def _publish_queue():
+    while _queue:
+        entry = _queue[0]
+        retry = entry[1] is not None
+        if retry:
+            stats["retries"] += 1
+        else:
+            entry[1] = _client.next_packet_id()
+        started = time.ticks_ms()
+        await _client.publish(
+            OBSERVATIONS_TOPIC, entry[0], 1, False, entry[1], retry
+        )
+        latency = time.ticks_diff(time.ticks_ms(), started)
+        _queue.pop(0)
+        stats["published"] += 1
+        stats["last_latency_ms"] = latency
+        stats["total_latency_ms"] += latency
+        if latency > stats["max_latency_ms"]:
+            stats["max_latency_ms"] = latency
+
+
+def _metrics():
+    published = stats["published"]
+    return json.dumps(
+        {
+            "queue": len(_queue),
+            "max_queue": stats["max_depth"],
+            "published": published,
+            "dropped": stats["dropped"],
+            "retries": stats["retries"],
+            "connects": stats["connects"],
+            "latency_ms": stats["last_latency_ms"],
+            "max_latency_ms": stats["max_latency_ms"],
+            "avg_latency_ms": (
+                stats["total_latency_ms"] // published if published else 0
+            ),
+        }
+    )
+
+
+async def publish():
+    # Network job: sends every queued batch, the samples of the batch still
+    # filling up included, then the metrics. Returns the delay in ms until
+    # the next run. In power-save mode the radio goes down after every
+    # network batch, so the broker connection is closed cleanly each time;
+    # otherwise it stays open between runs.
+    if not wi_fi.is_connected():
+        return TELEMETRY_INTERVAL_SECONDS * 1000
+    # Held back until the next run, a partial batch would be lost on reboot.
+    _flush_batch()
+    # Nothing to send and no connection to keep open: leave the broker be.
+    if not _queue and not _connection_current():
+        return TELEMETRY_INTERVAL_SECONDS * 1000
+    try:
+        await _connect()
+        if _queue:
+            await _publish_queue()
+            await _client.publish(METRICS_TOPIC, _metrics())
+        elif _client.keepalive_due():
+            await _client.ping()
+        if NETWORK_POWER_SAVE:
+            await _client.disconnect()
+    except OSError as e:
+        stats["errors"] += 1
+        _log.error("Publishing to %s failed: %s", MQTT_BROKER, e)
+        _client.close()
+    return TELEMETRY_INTERVAL_SECONDS * 1000
+
+
+def print_stats():
+    published = stats["published"]
+    average = stats["total_latency_ms"] // published if published else 0
+    print(
+        f"[Telemetry] queue={len(_queue)}/{TELEMETRY_QUEUE_LENGTH} "
+        f"max_queue={stats['max_depth']} batches={stats['batches']} "
+        f"published={published} dropped={stats['dropped']} "
+        f"retries={stats['retries']} errors={stats['errors']} "
+        f"connects={stats['connects']}"
+    )
+    print(
+        f"[Telemetry] latency last={stats['last_latency_ms']}ms avg={average}ms "
+        f"max={stats['max_latency_ms']}ms"
+    )
@@ -0,0 +1,80 @@
+from history import CHANNELS, WeatherHistory
+
+
+class TendencyEngine:
+    # Wall-clock tendency over a fixed window (3 h by default, as for the
+    # standard barometric tendency). Raw samples are averaged into buckets so
+    # the history holds window / bucket points regardless of how often the
+    # sensors are sampled.
+
+    def __init__(self, window_seconds, bucket_seconds, min_span_seconds):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.min_span_seconds = min_span_seconds
+        self.history = WeatherHistory(window_seconds // bucket_seconds + 1)
+        self._bucket_start = None
+        self._bucket_count = 0
+        self._bucket_sums = [0.0, 0.0, 0.0]
+
+    def reset(self):
+        self.history.clear()
+        self._bucket_start = None
+        self._bucket_count = 0
+        self._bucket_sums = [0.0, 0.0, 0.0]
+
+    def _close_bucket(self):
+        if self._bucket_count:
+            count = self._bucket_count
+            sums = self._bucket_sums
+            self.history.append(
+                self._bucket_start + self.bucket_seconds // 2,
+                sums[0] / count,
+                sums[1] / count,
+                sums[2] / count,
+            )
+        self._bucket_count = 0
+        self._bucket_sums = [0.0, 0.0, 0.0]
+
+    def add(self, timestamp, pressure, temperature, humidity):
+        timestamp = int(timestamp)
+        if self._bucket_start is not None and (
+            timestamp < self._bucket_start
+            or timestamp >= self._bucket_start + self.bucket_seconds
+        ):
+            self._close_bucket()
+            self._bucket_start = None
+
+        if self._bucket_start is None:
+            self._bucket_start = timestamp - timestamp % self.bucket_seconds
+            # A clock step backwards invalidates everything we have.
+            newest = self.history.newest_time()
+            if newest is not None and self._bucket_start < newest:
+                self.history.clear()
+
+        sums = self._bucket_sums
+        sums[0] += pressure
+        sums[1] += temperature
+        sums[2] += humidity
+        self._bucket_count += 1
+
+        self.history.expire(timestamp - self.window_seconds)
+
+    def add_bucket(self, timestamp, pressure, temperature, humidity):
+        # Append an already-averaged point, e.g. when restoring from storage.
+        self.history.append(timestamp, pressure, temperature, humidity)
+        self.history.expire(int(timestamp) - self.window_seconds)
+
+    def ready(self):
+        return self.history.span_seconds() >= self.min_span_seconds
+
+    def change(self, name):
+        # Least-squares change projected over the whole window, e.g. mmHg/3 h.
+        if not self.ready():
+            return None
+        slope = self.history.slope(name)
+        if slope is None:
+            return None
+        return slope * self.window_seconds
+
+    def changes(self):
+        return {name: self.change(name) for name in CHANNELS}
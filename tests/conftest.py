@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim  # noqa: E402
+
+# App modules import the MicroPython drivers the simulator fakes, so the
+# simulated board has to be in place before any test imports one.
+_world = sim.install()
+
+
+@pytest.fixture
+def world():
+    return _world
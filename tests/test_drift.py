@@ -0,0 +1,67 @@
+import pytest
+
+import sntp
+import tz
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def estimator(path):
+    return sntp.DriftEstimator(
+        str(path), 7 * DAY, 6 * HOUR, 30 * DAY, 1000, 12 * HOUR, 100
+    )
+
+
+@pytest.fixture
+def state(tmp_path):
+    return tmp_path / "ntp_state.json"
+
+
+def test_measures_drift(state):
+    drift = estimator(state)
+    drift.update(0, 0)
+    # 86.4 ms behind after a day: the RTC runs 1 ppm slow.
+    assert drift.update(86.4, DAY) == pytest.approx(-1.0)
+    # 1000 ms of error at 1 ppm takes 10**6 s.
+    assert drift.next_interval() == 1_000_000
+
+
+def test_short_spans_add_up(state):
+    drift = estimator(state)
+    drift.update(0, 0)
+    # Six-hour syncs keep the span start until the span is long enough to
+    # measure, then carry on from there.
+    for step in range(1, 4):
+        drift.update(-10, step * 6 * HOUR)
+    assert drift.last_sync == 12 * HOUR
+    assert drift.drift_ppm == pytest.approx(20 * 1000 / (12 * HOUR))
+    assert drift.pending_offset_ms == -10
+
+
+def test_dst_step_is_not_drift(state):
+    # An RTC on local time jumps an hour at the transition; the next sync
+    # sees a 3600 s offset. It must not become the drift estimate.
+    zone = tz.get_zone("Europe/Lviv")
+    _, fall_back = zone.transitions(2026)
+    drift = estimator(state)
+    drift.update(0, fall_back - 2 * DAY)
+    drift.update(-40, fall_back - DAY)
+    good = drift.drift_ppm
+    assert good == pytest.approx(40 * 1000 / DAY)
+    drift.update(HOUR * 1000, fall_back + 6 * HOUR)
+    assert drift.drift_ppm == good
+    assert drift.last_sync == fall_back + 6 * HOUR
+    assert drift.next_interval() > 6 * HOUR
+    # Measuring resumes from the step.
+    drift.update(-40, fall_back + 6 * HOUR + DAY)
+    assert drift.drift_ppm == pytest.approx(good)
+
+
+def test_state_survives_reload(state):
+    drift = estimator(state)
+    drift.update(0, 0)
+    drift.update(-5, 6 * HOUR)
+    reloaded = estimator(state)
+    assert reloaded.last_sync == 0
+    assert reloaded.pending_offset_ms == -5
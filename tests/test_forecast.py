@@ -0,0 +1,39 @@
+import asyncio
+import calendar
+
+import forecast
+import tz
+import wi_fi
+from config import FORECAST_DAILY_VARIABLES, FORECAST_DAYS
+
+
+def test_api_timezone_follows_config():
+    assert forecast.api_timezone("Europe/Berlin") == "Europe/Berlin"
+    # Not in the IANA database; same rules as Kyiv.
+    assert forecast.api_timezone("Europe/Lviv") == "Europe/Kyiv"
+    assert forecast.api_timezone("EET-2EEST,M3.5.0/3,M10.5.0/4") == "GMT"
+    for name in tz.IANA_NAMES.values():
+        assert name in tz.ZONES
+
+
+def test_date_key_uses_the_api_zone(monkeypatch):
+    # 22:30 UTC on Oct 18 is already Oct 19 in Kyiv, still Oct 18 in GMT.
+    timestamp = calendar.timegm((2026, 10, 18, 22, 30, 0))
+    monkeypatch.setattr(forecast, "_forecast_zone", tz.get_zone("Europe/Kyiv"))
+    assert forecast.date_key(timestamp) == "2026-10-19"
+    monkeypatch.setattr(forecast, "_forecast_zone", tz.get_zone("GMT"))
+    assert forecast.date_key(timestamp) == "2026-10-18"
+
+
+def test_fetch_reads_the_requested_days(world):
+    asyncio.run(wi_fi.manager.connect())
+    daily = asyncio.run(forecast.fetch_daily_forecast(49.84, 24.03))
+    assert len(daily) == FORECAST_DAYS
+    for row in daily.values():
+        assert len(row) == len(FORECAST_DAILY_VARIABLES)
+
+
+def test_oversized_response_is_discarded(world, monkeypatch):
+    asyncio.run(wi_fi.manager.connect())
+    monkeypatch.setattr(forecast, "_body_buffer", bytearray(64))
+    assert asyncio.run(forecast.fetch_daily_forecast(49.84, 24.03)) is None
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from history import CHANNELS, WeatherHistory
+
+
+def least_squares_slope(samples, index):
+    n = len(samples)
+    mean_t = sum(sample[0] for sample in samples) / n
+    mean_y = sum(sample[index] for sample in samples) / n
+    numerator = sum(
+        (sample[0] - mean_t) * (sample[index] - mean_y) for sample in samples
+    )
+    denominator = sum((sample[0] - mean_t) ** 2 for sample in samples)
+    return numerator / denominator
+
+
+@pytest.mark.parametrize("capacity", [8, 36, 100])
+def test_slope_matches_brute_force(capacity):
+    rng = random.Random(capacity)
+    history = WeatherHistory(capacity)
+    timestamp = 1_000_000
+    # Several laps of the ring, so eviction, rebasing and the periodic
+    # rebuild of the sums all run.
+    for _ in range(capacity * 5 + 3):
+        timestamp += rng.randint(30, 600)
+        history.append(
+            timestamp,
+            1013 + rng.uniform(-5, 5),
+            20 + rng.uniform(-3, 3),
+            45 + rng.uniform(-10, 10),
+        )
+        samples = list(history.samples())
+        if len(samples) < 2:
+            continue
+        for index, name in enumerate(CHANNELS, 1):
+            assert history.slope(name) == pytest.approx(
+                least_squares_slope(samples, index), rel=1e-3, abs=1e-7
+            )
+
+
+def test_slope_after_expire():
+    history = WeatherHistory(64)
+    for step in range(40):
+        history.append(step * 300, 1000 + step * 0.5, 20.0, 50.0)
+    history.expire(20 * 300)
+    assert len(history) == 20
+    assert history.slope_per_hour("pressure") == pytest.approx(6.0, rel=1e-4)
+    assert history.slope("temperature") == pytest.approx(0.0, abs=1e-9)
+
+
+def test_slope_needs_two_samples():
+    history = WeatherHistory(4)
+    assert history.slope("pressure") is None
+    history.append(0, 1000.0, 20.0, 50.0)
+    assert history.slope("pressure") is None
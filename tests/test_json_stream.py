@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+import json_stream
+
+BODY = json.dumps(
+    {
+        "latitude": 49.84,
+        "note": 'quoted "text", a \\ backslash and é',
+        "hourly": {"time": ["2026-10-18T00:00"], "skip": [[1, 2], {"a": None}]},
+        "daily": {
+            "time": ["2026-10-18", "2026-10-19", "2026-10-20"],
+            "weather_code": [3, 61, 0],
+            "temperature_2m_max": [12.5, -1.25e1, 0.0],
+            "flags": [True, False, None],
+        },
+    },
+    indent=1,
+).encode()
+PATHS = [
+    ("daily", "time"),
+    ("daily", "weather_code"),
+    ("daily", "temperature_2m_max"),
+    ("daily", "flags"),
+    ("note",),
+]
+
+
+class ReadOnly:
+    # A stream without readinto(), like some socket wrappers.
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def read(self, size):
+        return self.data.read(size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 128])
+@pytest.mark.parametrize("stream_type", [io.BytesIO, ReadOnly])
+def test_extract_across_chunk_boundaries(chunk_size, stream_type):
+    expected = json.loads(BODY)
+    values = json_stream.extract(stream_type(BODY), PATHS, chunk_size)
+    for path in PATHS:
+        value = expected
+        for key in path:
+            value = value[key]
+        assert values[path] == value
+
+
+def test_missing_path_is_absent():
+    values = json_stream.extract(io.BytesIO(BODY), [("daily", "nothing")])
+    assert values == {}
+
+
+def test_stops_reading_once_found():
+    stream = io.BytesIO(b'{"a": 1, "b": [' + b"0, " * 1000 + b"0]}")
+    assert json_stream.extract(stream, [("a",)], 16) == {("a",): 1}
+    assert stream.tell() < 64
+
+
+def test_truncated_body_raises():
+    with pytest.raises(json_stream.JSONStreamError):
+        json_stream.extract(io.BytesIO(BODY[: len(BODY) // 2]), PATHS, 8)
+
+
+@pytest.mark.parametrize("buffer_type", [bytes, bytearray, memoryview])
+def test_extract_from_buffer(buffer_type):
+    values = json_stream.extract(buffer_type(BODY), PATHS)
+    assert values[("daily", "weather_code")] == [3, 61, 0]
+    assert values[("note",)] == json.loads(BODY)["note"]
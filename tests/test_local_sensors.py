@@ -0,0 +1,19 @@
+import local_sensors
+from config import DS18X20_PIN
+
+
+def test_empty_scan_is_retried(world, monkeypatch):
+    bus = world.onewire_bus(DS18X20_PIN)
+    probes = list(bus.probes)
+    monkeypatch.setattr(local_sensors, "_ds_roms", None)
+    monkeypatch.setattr(local_sensors, "_ds_attempts_without_roms", 0)
+    monkeypatch.setattr(bus, "probes", [])
+    scans = local_sensors.bus_stats["onewire_scan"]["count"]
+    for _ in range(local_sensors.DS18X20_RESCAN_EVERY - 1):
+        assert not local_sensors.start_ds_conversion()
+    assert local_sensors.bus_stats["onewire_scan"]["count"] == scans + 1
+    # The probe is plugged in; the next rescan finds it.
+    bus.probes.extend(probes)
+    assert local_sensors.start_ds_conversion()
+    assert local_sensors.bus_stats["onewire_scan"]["count"] == scans + 2
+    assert local_sensors.scan_ds_roms() == [probe.rom for probe in probes]
@@ -0,0 +1,21 @@
+import log
+
+
+def test_prints_is_narrower_than_enabled(monkeypatch):
+    monkeypatch.setattr(log, "_ring_level", log.INFO)
+    logger = log.Logger("Test", log.WARNING)
+    # INFO only reaches the ring, so it is enabled but not printed.
+    assert logger.enabled(log.INFO)
+    assert not logger.prints(log.INFO)
+    assert logger.prints(log.WARNING)
+    assert not logger.enabled(log.DEBUG)
+
+
+def test_ring_keeps_what_is_not_printed(monkeypatch, capsys):
+    monkeypatch.setattr(log, "_ring_level", log.INFO)
+    log.clear()
+    logger = log.Logger("Test", log.WARNING)
+    logger.info("stored %s", 1)
+    logger.debug("dropped")
+    assert capsys.readouterr().out == ""
+    assert [entry[3] for entry in log.entries()] == ["stored %s"]
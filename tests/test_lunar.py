@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from lunar import PHASE_EVENTS, LunarTable, build_table, phase_name
+from tools.bench_lunar import REFERENCE_FILE, load_reference, table_error_minutes
+from tools.build_lunar_table import lunations
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = os.path.join(str(tmp_path_factory.mktemp("lunar")), "moon.bin")
+    with open(path, "wb") as f:
+        f.write(build_table(lunations(2000, 2030)))
+    return LunarTable(path)
+
+
+def test_matches_reference_phases(table):
+    reference = load_reference(REFERENCE_FILE)
+    assert reference
+    for seconds, phase in reference:
+        assert table.covers(seconds)
+        assert abs(table_error_minutes(table, seconds, phase)) < 3
+
+
+def test_phase_is_exact_at_principal_phases(table):
+    seconds = load_reference(REFERENCE_FILE)[0][0]
+    events = table.lunation(seconds)
+    for quarter, name in enumerate(PHASE_EVENTS):
+        phase, _, _, _ = table.phase(events[quarter])
+        assert phase == quarter / 4
+        assert phase_name(phase) == name
+    _, _, next_name, next_time = table.phase(events[0])
+    assert (next_name, next_time) == ("first-quarter", events[1])
+
+
+def test_lookups_in_one_lunation_reuse_the_record(table):
+    seconds = load_reference(REFERENCE_FILE)[-1][0]
+    table.lunation(seconds)
+    reads = table.stats["reads"]
+    for hour in range(24):
+        table.lunation(seconds + hour * 3600)
+    assert table.stats["reads"] == reads
+
+
+def test_outside_table(table):
+    assert not table.covers(table.last)
+    with pytest.raises(ValueError):
+        table.lunation(table.last)
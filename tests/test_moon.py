@@ -0,0 +1,36 @@
+import pytest
+
+# moon reads the clock through time_service, which needs the RTC driver.
+pytest.importorskip("machine")
+
+import moon  # noqa: E402
+import time_service  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    state = {"day": 20261018, "utc": 1_000_000}
+    monkeypatch.setattr(time_service, "day_key", lambda: state["day"])
+    monkeypatch.setattr(time_service, "utc_now", lambda: state["utc"])
+    monkeypatch.setitem(moon._cache, "day", None)
+    return state
+
+
+def test_computed_once_per_day(clock, monkeypatch):
+    computed = []
+    compute = moon._compute
+    monkeypatch.setattr(moon, "_compute", lambda t: computed.append(t) or compute(t))
+    first = moon.moon_info()
+    clock["utc"] += 3600
+    assert moon.moon_info() is first
+    assert computed == [1_000_000]
+    clock["day"] += 1
+    clock["utc"] += 86400
+    moon.moon_info()
+    assert computed == [1_000_000, 1_000_000 + 3600 + 86400]
+
+
+def test_explicit_timestamp_bypasses_cache(clock):
+    cached = moon.moon_info()
+    assert moon.moon_info(1_000_000) == cached
+    assert moon.moon_info(1_000_000 + 15 * 86400) != cached
@@ -0,0 +1,77 @@
+import struct
+
+import pytest
+
+from obslog import (EPOCH_YEAR, HEADER_FORMAT, HEADER_SIZE, MAGIC, RECORD_SIZE,
+                    VERSION, ObservationLog, read_segment)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "obs")
+
+
+def test_round_trip_with_missing_values(directory):
+    log = ObservationLog(directory, 3, 8, 4)
+    log.append(1000, -12.34, 21.5, None, 1013.2)
+    log.append(1060, None, 21.56, 45.5, None)
+    log.flush()
+    assert list(log.records()) == [
+        (1000, -12.34, 21.5, None, 1013.2),
+        (1060, None, 21.56, 45.5, None),
+    ]
+
+
+def test_pending_records_are_included(directory):
+    log = ObservationLog(directory, 3, 8, 4)
+    for step in range(6):
+        log.append(step * 60, 1.0, 20.0, 50.0, 1000.0)
+    # Four are on flash, two still in RAM.
+    assert len(list(read_segment(log.segment_path(0)))) == 4
+    assert [record[0] for record in log.records()] == [
+        step * 60 for step in range(6)
+    ]
+    assert [record[0] for record in log.records(since=180)] == [180, 240, 300]
+
+
+def test_rotation_keeps_the_newest_segments(directory):
+    log = ObservationLog(directory, 3, 8, 4)
+    for step in range(40):
+        log.append(step, 1.0, 20.0, 50.0, 1000.0)
+    log.flush()
+    # Three segments of eight: the ring holds the newest two full segments
+    # and the one being filled.
+    assert [record[0] for record in log.records()] == list(range(16, 40))
+    assert log.stats["rotations"] == 4
+
+
+def test_reopen_appends_to_newest_segment(directory):
+    log = ObservationLog(directory, 3, 8, 4)
+    for step in range(20):
+        log.append(step, 1.0, 20.0, 50.0, 1000.0)
+    log.flush()
+    reopened = ObservationLog(directory, 3, 8, 4)
+    assert (reopened.current_index, reopened.current_count) == (
+        log.current_index,
+        log.current_count,
+    )
+    for step in range(20, 24):
+        reopened.append(step, 1.0, 20.0, 50.0, 1000.0)
+    reopened.flush()
+    assert [record[0] for record in reopened.records()] == list(range(24))
+
+
+def test_segments_record_their_epoch(directory):
+    log = ObservationLog(directory, 3, 8, 4)
+    with open(log.segment_path(0), "rb") as f:
+        header = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+    assert header == (MAGIC, VERSION, RECORD_SIZE, EPOCH_YEAR)
+
+
+def test_truncated_record_is_ignored(directory):
+    log = ObservationLog(directory, 3, 8, 2)
+    log.append(0, 1.0, 20.0, 50.0, 1000.0)
+    log.append(60, 1.0, 20.0, 50.0, 1000.0)
+    with open(log.segment_path(0), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert [record[0] for record in read_segment(log.segment_path(0))] == [0, 60]
@@ -0,0 +1,54 @@
+import struct
+
+import sntp
+
+# LI 0, version 4, mode 4 (server)
+SERVER_HEADER = 0x24
+
+
+def reply(sent, t2, t3, header=SERVER_HEADER, stratum=2):
+    return struct.pack(
+        "!BBbb11I", header, stratum, 0, 0, 0, 0, 0, 0, 0,
+        *sent, *sntp._to_ntp(t2), *sntp._to_ntp(t3),
+    )
+
+
+def test_offset_and_delay():
+    t1 = 800_000_000_000
+    sent = sntp._to_ntp(t1)
+    # Server 500 ms ahead, 20 ms out, 5 ms to answer, 20 ms back.
+    t2 = t1 + 20 + 500
+    t3 = t2 + 5
+    t4 = t1 + 45
+    sample = sntp._parse("a", reply(sent, t2, t3), sent, t1, t4)
+    # Fractions are truncated to whole milliseconds on the way in and out.
+    assert 499 <= sample.offset_ms <= 500
+    assert (sample.delay_ms, sample.stratum) == (40, 2)
+
+
+def test_ntp_timestamps_round_trip():
+    for ms in (0, 999, 800_000_000_123):
+        assert ms - 1 <= sntp._from_ntp(*sntp._to_ntp(ms)) <= ms
+
+
+def test_rejects_bad_replies():
+    t1 = 800_000_000_000
+    sent = sntp._to_ntp(t1)
+    good = reply(sent, t1, t1)
+    assert sntp._parse("a", good, sent, t1, t1) is not None
+    assert sntp._parse("a", good[:40], sent, t1, t1) is None
+    assert sntp._parse("a", good, sntp._to_ntp(t1 + 1), t1, t1) is None
+    # Kiss-o'-death, unsynchronized, and a client packet echoed back.
+    assert sntp._parse("a", reply(sent, t1, t1, stratum=0), sent, t1, t1) is None
+    assert sntp._parse("a", reply(sent, t1, t1, header=0xE4), sent, t1, t1) is None
+    assert sntp._parse("a", reply(sent, t1, t1, header=0x23), sent, t1, t1) is None
+
+
+def test_best_sample_has_the_shortest_round_trip():
+    samples = [
+        sntp.Sample("a", 1, 10, 80),
+        sntp.Sample("b", 3, -5, 20),
+        sntp.Sample("c", 2, 0, 20),
+    ]
+    assert sntp.best_sample(samples).server == "c"
+    assert sntp.best_sample([]) is None
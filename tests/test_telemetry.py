@@ -0,0 +1,131 @@
+import asyncio
+import struct
+
+import pytest
+
+import telemetry
+import wi_fi
+from config import (TELEMETRY_BATCH_SIZE, TELEMETRY_QUEUE_LENGTH,
+                    TELEMETRY_SAMPLE_SECONDS)
+from local_sensors import SensorSnapshot
+from obslog import EPOCH_YEAR, HEADER_FORMAT, HEADER_SIZE, RECORD_SIZE
+
+
+@pytest.fixture
+def broker(world):
+    asyncio.run(wi_fi.manager.connect())
+    telemetry._client.close()
+    del telemetry._queue[:]
+    telemetry._batch_count = 0
+    telemetry._last_sampled_ms = None
+    for key in telemetry.stats:
+        telemetry.stats[key] = 0
+    world.mqtt.messages.clear()
+    world.mqtt.refuse = False
+    return world.mqtt
+
+
+def snapshot(timestamp, inside=22.0):
+    return SensorSnapshot(timestamp, 5.0, (5.0,), inside, 45.0, 1013.2, 760.0)
+
+
+def add_samples(world, count, start=1_000_000):
+    for index in range(count):
+        assert telemetry.add_snapshot(snapshot(start + index * 60, 20 + index % 10))
+        world.clock.ticks_offset_ms += TELEMETRY_SAMPLE_SECONDS * 1000
+
+
+def observation_payloads(broker):
+    return [
+        (payload, dup)
+        for topic, payload, _, dup in broker.messages
+        if topic == telemetry.OBSERVATIONS_TOPIC
+    ]
+
+
+def test_samples_are_spaced_on_ticks(world, broker):
+    assert telemetry.add_snapshot(snapshot(1_000_000))
+    assert not telemetry.add_snapshot(snapshot(1_000_100))
+    world.clock.ticks_offset_ms += TELEMETRY_SAMPLE_SECONDS * 1000
+    # The clock was stepped back by an NTP sync; the sample is still due.
+    assert telemetry.add_snapshot(snapshot(999_000))
+
+
+def test_batches_publish_in_order(world, broker):
+    add_samples(world, 2 * TELEMETRY_BATCH_SIZE)
+    assert len(telemetry._queue) == 2
+    asyncio.run(telemetry.publish())
+    assert telemetry._queue == []
+    assert telemetry.stats["published"] == 2
+    payloads = observation_payloads(broker)
+    assert len(payloads) == 2
+    _, _, record_size, epoch = struct.unpack_from(HEADER_FORMAT, payloads[0][0])
+    assert (record_size, epoch) == (RECORD_SIZE, EPOCH_YEAR)
+    assert len(payloads[0][0]) == HEADER_SIZE + TELEMETRY_BATCH_SIZE * RECORD_SIZE
+    timestamps = [record[0] for record in broker.records()]
+    assert timestamps == [
+        1_000_000 + index * 60 for index in range(2 * TELEMETRY_BATCH_SIZE)
+    ]
+
+
+def test_full_queue_drops_oldest(world, broker):
+    broker.refuse = True
+    add_samples(world, (TELEMETRY_QUEUE_LENGTH + 2) * TELEMETRY_BATCH_SIZE)
+    assert len(telemetry._queue) == TELEMETRY_QUEUE_LENGTH
+    assert telemetry.stats["dropped"] == 2
+    asyncio.run(telemetry.publish())
+    assert telemetry.stats["errors"] == 1
+    assert len(telemetry._queue) == TELEMETRY_QUEUE_LENGTH
+    broker.refuse = False
+    asyncio.run(telemetry.publish())
+    # The first two batches are gone; the third is now the oldest.
+    assert broker.records()[0][0] == 1_000_000 + 2 * TELEMETRY_BATCH_SIZE * 60
+
+
+def test_lost_puback_is_retried_as_duplicate(world, broker, monkeypatch):
+    packet_ids = []
+    handle = broker._handle
+
+    class NoReply:
+        def sendall(self, data):
+            pass
+
+    def lose_first_puback(conn, header, body):
+        if header & 0xF0 == 0x30 and header & 0x06:
+            topic_length = struct.unpack("!H", body[:2])[0]
+            packet_ids.append(body[2 + topic_length : 4 + topic_length])
+            if len(packet_ids) == 1:
+                # Received, but the PUBACK never makes it back.
+                handle(NoReply(), header, body)
+                return False
+        return handle(conn, header, body)
+
+    monkeypatch.setattr(broker, "_handle", lose_first_puback)
+    add_samples(world, TELEMETRY_BATCH_SIZE)
+    asyncio.run(telemetry.publish())
+    assert telemetry.stats["errors"] == 1
+    assert len(telemetry._queue) == 1
+    asyncio.run(telemetry.publish())
+    assert telemetry._queue == []
+    assert telemetry.stats["retries"] == 1
+    payloads = observation_payloads(broker)
+    assert [dup for _, dup in payloads] == [False, True]
+    assert payloads[0][0] == payloads[1][0]
+    assert packet_ids[0] == packet_ids[1]
+
+
+def test_partial_batch_goes_out_with_the_next_publish(world, broker):
+    add_samples(world, TELEMETRY_BATCH_SIZE + 3)
+    asyncio.run(telemetry.publish())
+    assert telemetry._batch_count == 0
+    payloads = observation_payloads(broker)
+    assert len(payloads[1][0]) == HEADER_SIZE + 3 * RECORD_SIZE
+    assert len(broker.records()) == TELEMETRY_BATCH_SIZE + 3
+
+
+def test_power_save_disconnects_after_publishing(world, broker, monkeypatch):
+    monkeypatch.setattr(telemetry, "NETWORK_POWER_SAVE", True)
+    add_samples(world, TELEMETRY_BATCH_SIZE)
+    asyncio.run(telemetry.publish())
+    assert telemetry.stats["published"] == 1
+    assert not telemetry._client.is_connected()
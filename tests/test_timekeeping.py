@@ -0,0 +1,23 @@
+import os
+
+import timekeeping
+import tz
+from config import RTC_UTC_MARKER_FILE
+
+
+def test_local_rtc_is_converted_once(world):
+    zone = tz.get_zone("Europe/Lviv")
+    utc = int(world.rtc.now())
+    os.remove(RTC_UTC_MARKER_FILE)
+    try:
+        # Left on local time by older firmware.
+        world.rtc._set(zone.to_local(utc))
+        assert timekeeping.migrate_rtc_to_utc("Europe/Lviv")
+        assert abs(world.rtc.now() - utc) < 2
+        os.stat(RTC_UTC_MARKER_FILE)
+        assert not timekeeping.migrate_rtc_to_utc("Europe/Lviv")
+        assert abs(world.rtc.now() - utc) < 2
+    finally:
+        world.rtc._set(utc)
+        with open(RTC_UTC_MARKER_FILE, "w") as f:
+            f.write("1\n")
@@ -0,0 +1,61 @@
+import calendar
+
+import tz
+
+
+def utc(*fields):
+    return calendar.timegm(fields + (0, 0, 0))
+
+
+def test_eu_transitions():
+    zone = tz.get_zone("Europe/Lviv")
+    # Last Sundays of March and October, at 01:00 UTC.
+    assert zone.transitions(2026) == (
+        utc(2026, 3, 29, 1, 0, 0),
+        utc(2026, 10, 25, 1, 0, 0),
+    )
+
+
+def test_offset_changes_at_transition():
+    zone = tz.get_zone("Europe/Lviv")
+    start, end = zone.transitions(2026)
+    assert zone.utcoffset(start - 1) == 2 * 3600
+    assert zone.utcoffset(start) == 3 * 3600
+    assert zone.utcoffset(end - 1) == 3 * 3600
+    assert zone.utcoffset(end) == 2 * 3600
+    assert zone.tzname(start) == "EEST"
+
+
+def test_to_utc_round_trip_and_repeated_hour():
+    zone = tz.get_zone("Europe/Lviv")
+    end = int(zone.transitions(2026)[1])
+    for when in range(end - 7200, end + 7200, 900):
+        local = zone.to_local(when)
+        # 03:00-04:00 local happens twice; it resolves to the DST pass.
+        if end <= when < end + 3600:
+            assert zone.to_utc(local) == when - 3600
+        else:
+            assert zone.to_utc(local) == when
+
+
+def test_us_rules_by_default():
+    zone = tz.get_zone("EST5EDT")
+    assert zone.transitions(2026) == (
+        utc(2026, 3, 8, 7, 0, 0),
+        utc(2026, 11, 1, 6, 0, 0),
+    )
+
+
+def test_southern_hemisphere():
+    zone = tz.get_zone("AEST-10AEDT,M10.1.0,M4.1.0/3")
+    assert zone.is_dst(utc(2026, 1, 15, 0, 0, 0))
+    assert not zone.is_dst(utc(2026, 7, 15, 0, 0, 0))
+
+
+def test_next_transition():
+    zone = tz.get_zone("Europe/Lviv")
+    start, end = zone.transitions(2026)
+    assert zone.next_transition(start - 1) == start
+    assert zone.next_transition(start) == end
+    assert zone.next_transition(end) == zone.transitions(2027)[0]
+    assert tz.get_zone("UTC").next_transition(start) is None
@@ -0,0 +1,150 @@
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import log
+import tz
+from config import TIME_RESYNC_SECONDS, TIMEZONE
+from timekeeping import get_rtc_time
+
+# UTC seconds read from the DS3231, and the ticks_ms value at the moment it
+# was read. "Now" is the anchor plus the monotonic time since, so answering
+# it costs no I2C and no network traffic. Local time is derived from it.
+_anchor = {"seconds": None, "ticks": 0}
+
+RTC_ALIGN_TIMEOUT_MS = 3000
+# While aligning, the RTC is read every RTC_ALIGN_POLL_MS with the event
+# loop free in between, and back to back only from RTC_ALIGN_SPIN_MS before
+# the earliest moment the next second can start.
+RTC_ALIGN_POLL_MS = 50
+RTC_ALIGN_SPIN_MS = 10
+
+stats = {"syncs": 0, "errors": 0, "reads": 0}
+_log = log.get("Time")
+
+
+def _set_anchor(reading, ticks):
+    year, month, day, hour, minute, second, _ = reading
+    _anchor["ticks"] = ticks
+    _anchor["seconds"] = time.mktime((year, month, day, hour, minute, second, 0, 0, -1))
+    stats["syncs"] += 1
+
+
+def sync():
+    try:
+        reading = get_rtc_time()
+    except Exception as e:
+        stats["errors"] += 1
+        _log.error("Error reading RTC: %s", e)
+        return False
+    _set_anchor(reading, time.ticks_ms())
+    return True
+
+
+async def sync_aligned():
+    # Anchors on the moment the RTC's seconds register rolls over, so the
+    # anchor is exact to a few milliseconds instead of to one second; NTP
+    # syncs use it. Coarse polls find which RTC_ALIGN_POLL_MS the current
+    # second started in; the loop is then left to other tasks until just
+    # before the next rollover, which is caught by a short tight poll. Falls
+    # back to an unaligned anchor after RTC_ALIGN_TIMEOUT_MS.
+    deadline = time.ticks_add(time.ticks_ms(), RTC_ALIGN_TIMEOUT_MS)
+    try:
+        reading = get_rtc_time()
+        # Last time the current second was seen, and the earliest the next
+        # one can start (None until a rollover has been seen).
+        seen = time.ticks_ms()
+        next_edge = None
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            if next_edge is None:
+                await asyncio.sleep(RTC_ALIGN_POLL_MS / 1000)
+            else:
+                wait_ms = time.ticks_diff(next_edge, time.ticks_ms())
+                if wait_ms > RTC_ALIGN_SPIN_MS:
+                    await asyncio.sleep((wait_ms - RTC_ALIGN_SPIN_MS) / 1000)
+            tight = next_edge is not None
+            polls = 0
+            while True:
+                latest = get_rtc_time()
+                now = time.ticks_ms()
+                polls += 1
+                if latest[5] != reading[5]:
+                    break
+                seen = now
+                if not tight or time.ticks_diff(deadline, now) <= 0:
+                    break
+                time.sleep_ms(2)
+            if latest[5] == reading[5]:
+                continue
+            if tight and polls > 1:
+                _set_anchor(latest, now)
+                return True
+            # Caught in a coarse poll, or the wait overshot the edge: the new
+            # second started between `seen` and now, so the next one starts
+            # no earlier than a second after `seen`. A wide window (another
+            # task held the loop) would make the tight poll long; keep
+            # polling coarsely for a better one instead.
+            if time.ticks_diff(now, seen) <= 2 * RTC_ALIGN_POLL_MS:
+                next_edge = time.ticks_add(seen, 1000)
+            else:
+                next_edge = None
+            reading = latest
+            seen = now
+        _set_anchor(reading, seen)
+    except Exception as e:
+        stats["errors"] += 1
+        _log.error("Error reading RTC: %s", e)
+        return False
+    return True
+
+
+def _elapsed_ms():
+    return time.ticks_diff(time.ticks_ms(), _anchor["ticks"])
+
+
+def utc_now():
+    # Re-anchor well before ticks_diff() runs out of range, and pick up any
+    # drift correction written to the RTC by an NTP sync in the meantime.
+    if _anchor["seconds"] is None or _elapsed_ms() > TIME_RESYNC_SECONDS * 1000:
+        if not sync() and _anchor["seconds"] is None:
+            return time.time()
+    stats["reads"] += 1
+    return _anchor["seconds"] + _elapsed_ms() // 1000
+
+
+def utc_now_ms():
+    seconds = utc_now()
+    if _anchor["seconds"] is None:
+        return int(seconds) * 1000
+    return int(_anchor["seconds"]) * 1000 + _elapsed_ms()
+
+
+def now():
+    # Local wall-clock seconds in the configured zone.
+    return tz.get_zone(TIMEZONE).to_local(utc_now())
+
+
+def now_ms():
+    utc_ms = utc_now_ms()
+    return int(tz.get_zone(TIMEZONE).to_local(utc_ms // 1000)) * 1000 + utc_ms % 1000
+
+
+def localtime():
+    return time.localtime(now())
+
+
+def day_key(timestamp=None):
+    if timestamp is None:
+        timestamp = now()
+    year, month, day = time.localtime(timestamp)[:3]
+    return year * 10000 + month * 100 + day
+
+
+def print_stats():
+    print(
+        f"[Time] syncs={stats['syncs']} errors={stats['errors']} "
+        f"reads={stats['reads']}"
+    )
@@ -1,97 +1,165 @@
-import socket
-import struct
+import os
 import time
 
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import machine
 import urtc
-from machine import Pin, SoftI2C
 
-I2C_RTC = SoftI2C(scl=Pin(19), sda=Pin(18))
-NTP_SERVER = "pool.ntp.org"
-LVIV_TIMEZONE_OFFSET_SECONDS_STANDARD = 2 * 3600
-LVIV_TIMEZONE_OFFSET_SECONDS_DST = 3 * 3600
+import buses
+import log
+import sntp
+import tz
+from config import (NTP_MAX_DRIFT_PPM, NTP_MAX_ERROR_MS,
+                    NTP_MAX_INTERVAL_SECONDS, NTP_MIN_DRIFT_SPAN_SECONDS,
+                    NTP_MIN_INTERVAL_SECONDS, NTP_SERVERS, NTP_STATE_FILE,
+                    NTP_SYNC_INTERVAL_SECONDS, NTP_TIMEOUT_MS,
+                    RTC_UTC_MARKER_FILE)
+
+I2C_RTC = buses.get("rtc")
 
 rtc = urtc.DS3231(I2C_RTC)
+# The wait for the next whole NTP second leaves the event loop to other
+# tasks until this close to the edge, then holds it for the rest.
+RTC_WRITE_SPIN_MS = 20
 _rtc_updated_this_session = False
+_log = log.get("Timekeeping")
+
+ntp_drift = sntp.DriftEstimator(
+    NTP_STATE_FILE,
+    NTP_SYNC_INTERVAL_SECONDS,
+    NTP_MIN_INTERVAL_SECONDS,
+    NTP_MAX_INTERVAL_SECONDS,
+    NTP_MAX_ERROR_MS,
+    NTP_MIN_DRIFT_SPAN_SECONDS,
+    NTP_MAX_DRIFT_PPM,
+)
+
+
+async def get_ntp_sample(clock_ms):
+    samples = await sntp.query(NTP_SERVERS, clock_ms, NTP_TIMEOUT_MS)
+    for sample in samples:
+        _log.debug("NTP %s", sample)
+    return sntp.best_sample(samples)
+
+
+async def get_ntp_time_utc():
+    sample = await get_ntp_sample(_rtc_clock_ms)
+    if sample is None:
+        return None
+    return (_rtc_clock_ms() + sample.offset_ms) // 1000
+
+
+def _rtc_clock_ms():
+    # UTC from the DS3231 alone, to the second. Pass a finer clock (e.g.
+    # time_service.utc_now_ms after an aligned sync) when there is one.
+    year, month, day, hour, minute, second, _ = get_rtc_time()
+    return int(time.mktime((year, month, day, hour, minute, second, 0, 0, -1))) * 1000
+
+
+def _write_rtc_utc(utc_timestamp):
+    # The DS3231 keeps UTC: local time would jump an hour at every DST change
+    # and the next NTP sync would read that step as drift.
+    utc_time = time.gmtime(utc_timestamp)
+    rtc_time_tuple = (
+        utc_time[0],
+        utc_time[1],
+        utc_time[2],
+        utc_time[6] + 1,  # weekday (Mon=0, Sun=6) -> urtc (Mon=1, Sun=7)
+        utc_time[3],
+        utc_time[4],
+        utc_time[5],
+        0,
+    )
+    rtc.datetime(rtc_time_tuple)
 
 
-def is_lviv_dst(utc_timestamp):
-    year = time.localtime(utc_timestamp)[0]
-    first_of_march = time.mktime((year, 3, 1, 0, 0, 0, 0, 0, -1))
-    weekday_first_march = time.localtime(first_of_march)[6]
-    days_to_last_sunday_march = (6 - weekday_first_march + 7) % 7
-    dst_start_day = 31 - days_to_last_sunday_march
-    dst_start_timestamp_utc = time.mktime((year, 3, dst_start_day, 3, 0, 0, 0, 0, 0))
-
-    first_of_october = time.mktime((year, 10, 1, 0, 0, 0, 0, 0, -1))
-    weekday_first_october = time.localtime(first_of_october)[6]
-    days_to_last_sunday_october = (6 - weekday_first_october + 7) % 7
-    dst_end_day = 31 - days_to_last_sunday_october
-    dst_end_timestamp_utc = time.mktime((year, 10, dst_end_day, 4, 0, 0, 0, 0, 0))
-
-    return dst_start_timestamp_utc <= utc_timestamp < dst_end_timestamp_utc
-
-
-def get_ntp_time_utc():
-    addr = socket.getaddrinfo(NTP_SERVER, 123)[0][-1]
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.settimeout(2)
-    ntp_utc_timestamp = None
+def migrate_rtc_to_utc(timezone_str):
+    # Firmware before the RTC held UTC left it on local time. Convert it
+    # once, then leave the marker so later boots trust the RTC as UTC.
     try:
-        s.connect(addr)
-        s.send(b"\x1b" + 47 * b"\x00")
-        data = s.recv(48)
-        if data:
-            ntp_time = struct.unpack("!12I", data)[10]
-            ntp_utc_timestamp = ntp_time - 2208988800
-            print(
-                f"[Timekeeping] Received NTP time (UTC timestamp): {ntp_utc_timestamp}"
-            )
-            return ntp_utc_timestamp
-    except OSError as e:
-        print(f"[Timekeeping] Error getting NTP time: {e}")
-    finally:
-        s.close()
-    return None
+        os.stat(RTC_UTC_MARKER_FILE)
+        return False
+    except OSError:
+        pass
+    try:
+        local = _rtc_clock_ms() // 1000
+        _write_rtc_utc(tz.get_zone(timezone_str).to_utc(local))
+        with open(RTC_UTC_MARKER_FILE, "w") as f:
+            f.write("1\n")
+    except Exception as e:
+        _log.error("Error converting the RTC to UTC: %s", e)
+        return False
+    _log.warning("Converted the RTC from %s local time to UTC.", timezone_str)
+    return True
+
+
+def _log_rtc_time():
+    # Reading the RTC is an I2C transaction; skip it unless it is printed.
+    if _log.prints(log.INFO):
+        _log.info("Current RTC time: %s", rtc.datetime())
+
+
+async def _next_ntp_second(clock_ms, offset_ms):
+    # Returns once the next whole NTP second starts, and that second. The
+    # edge is found once, on ticks, since clock_ms() may only count whole
+    # seconds. If another task holds the loop past it, the wait moves on
+    # to the following second.
+    target_ms = clock_ms() + offset_ms
+    wait_ms = 1000 - target_ms % 1000
+    edge = time.ticks_add(time.ticks_ms(), wait_ms)
+    second = (target_ms + wait_ms) // 1000
+    while True:
+        remaining = time.ticks_diff(edge, time.ticks_ms())
+        if remaining < 0:
+            edge = time.ticks_add(edge, 1000)
+            second += 1
+        elif remaining > RTC_WRITE_SPIN_MS:
+            await asyncio.sleep((remaining - RTC_WRITE_SPIN_MS) / 1000)
+        else:
+            time.sleep_ms(remaining)
+            return second
 
 
-def sync_rtc_from_ntp(timezone_str):
+async def sync_rtc_from_ntp(timezone_str, clock_ms=None):
     global _rtc_updated_this_session
-    print("[Timekeeping] Attempting to sync RTC from NTP...")
+    _log.info("Attempting to sync RTC from NTP...")
+    if clock_ms is None:
+        clock_ms = _rtc_clock_ms
     try:
-        utc_timestamp = get_ntp_time_utc()
-        if utc_timestamp is not None:
-            if is_lviv_dst(utc_timestamp):
-                timezone_offset_seconds = LVIV_TIMEZONE_OFFSET_SECONDS_DST
-                dst_active = True
-            else:
-                timezone_offset_seconds = LVIV_TIMEZONE_OFFSET_SECONDS_STANDARD
-                dst_active = False
-
-            local_time = time.localtime(utc_timestamp + timezone_offset_seconds)
-            rtc_time_tuple = (
-                local_time[0],
-                local_time[1],
-                local_time[2],
-                (
-                    local_time[6] + 1 if local_time[6] < 6 else 0
-                ),  # weekday (Mon=0, Sun=6) -> urtc (Mon=1, Sun=7)
-                local_time[3],
-                local_time[4],
-                local_time[5],
-                0,
-            )
-            rtc.datetime(rtc_time_tuple)
+        sample = await get_ntp_sample(clock_ms)
+        if sample is not None:
+            zone = tz.get_zone(timezone_str)
+            # Writing the seconds register restarts the DS3231's divider, so
+            # wait for the next whole NTP second and write it exactly then.
+            utc_timestamp = await _next_ntp_second(clock_ms, sample.offset_ms)
+            _write_rtc_utc(utc_timestamp)
             _rtc_updated_this_session = True
-            print(f"[Timekeeping] NTP sync successful. RTC set to: {rtc.datetime()}")
-            print(f"[Timekeeping] DST active in Lviv: {dst_active}")
+            drift_ppm = ntp_drift.update(sample.offset_ms, utc_timestamp)
+            sync_system_clock()
+            if _log.prints(log.INFO):
+                _log.info("NTP sync successful. RTC set to: %s", rtc.datetime())
+            _log.info(
+                "Offset %sms via %s, drift %s ppm, next sync in %ss",
+                sample.offset_ms,
+                sample.server,
+                drift_ppm,
+                ntp_drift.next_interval(),
+            )
+            _log.info(
+                "DST active in %s: %s", timezone_str, zone.is_dst(utc_timestamp)
+            )
             return True
         else:
-            print("[Timekeeping] NTP sync failed.")
-            print(f"[Timekeeping] Current RTC time: {rtc.datetime()}")
+            _log.warning("NTP sync failed.")
+            _log_rtc_time()
             return False
     except Exception as e:
-        print(f"[Timekeeping] Error during NTP sync and RTC update: {e}")
-        print(f"[Timekeeping] Current RTC time: {rtc.datetime()}")
+        _log.error("Error during NTP sync and RTC update: %s", e)
+        _log_rtc_time()
         return False
 
 
@@ -109,6 +177,18 @@ def get_rtc_time():
     )
 
 
+def sync_system_clock():
+    # Seed the MCU clock from the battery-backed DS3231 so time.time() is
+    # UTC and stays comparable across reboots and DST changes.
+    try:
+        year, month, day, hour, minute, second, weekday = get_rtc_time()
+        machine.RTC().datetime((year, month, day, weekday, hour, minute, second, 0))
+        return True
+    except Exception as e:
+        _log.error("Error setting system clock from RTC: %s", e)
+        return False
+
+
 def set_rtc_time(year, month, day, hour, minute, second, weekday):
     rtc.datetime((year, month, day, weekday + 1, hour, minute, second, 0))
 
@@ -119,11 +199,12 @@ def set_rtc_time(year, month, day, hour, minute, second, weekday):
 #
 #     print("[Timekeeping - Test] Current RTC time:", rtc_test.datetime())
 #     print("[Timekeeping - Test] Attempting NTP sync...")
-#     if sync_rtc_from_ntp("Europe/Lviv"):
+#     if asyncio.run(sync_rtc_from_ntp("Europe/Lviv")):
 #         print("[Timekeeping - Test] RTC time after sync:", rtc_test.datetime())
 #     else:
 #         print("[Timekeeping - Test] NTP sync failed, RTC time unchanged.")
 #
 #     utc_now = time.time()
 #     print(f"[Timekeeping - Test] UTC Timestamp: {utc_now}")
-#     print(f"[Timekeeping - Test] Is DST in Lviv now? {is_lviv_dst(utc_now)}")
+#     zone = tz.get_zone("Europe/Lviv")
+#     print(f"[Timekeeping - Test] Is DST in Lviv now? {zone.is_dst(utc_now)}")
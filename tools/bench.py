@@ -0,0 +1,168 @@
+# Runs benchmarks.py on the simulator or on a board and writes the results as
+# JSON, tagged with the commit, for comparing across changes:
+#   python tools/bench.py sim --out before.json
+#   mpremote cp benchmarks.py :benchmarks.py
+#   python tools/bench.py device --port /dev/ttyACM0 --out device.json
+#   python tools/bench.py capture serial.log --out device.json
+#   python tools/bench.py compare before.json after.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_DIR)
+
+RESULT_MARKER = "BENCH-RESULT "
+COMPARED_METRICS = (
+    "median_us",
+    "max_us",
+    "peak_heap_bytes",
+    "display_bytes",
+    "rtc_bytes",
+    "bme280_bytes",
+    "sensor_reads",
+)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def parse_capture(lines):
+    # The last result line wins: a capture may hold several runs.
+    result = None
+    for line in lines:
+        index = line.find(RESULT_MARKER)
+        if index >= 0:
+            result = json.loads(line[index + len(RESULT_MARKER) :])
+    return result
+
+
+def run_sim(iterations, scenario):
+    import sim
+
+    world = sim.install(scenario)
+    import benchmarks
+
+    result = benchmarks.run(iterations)
+    # What actually crossed the simulated wires, next to the app's own counts.
+    result["sim_wire"] = {
+        f"i2c_{scl}_{sda}": dict(bus.stats)
+        for (scl, sda), bus in world.i2c_buses.items()
+    }
+    result["sim_wire"].update(
+        {f"onewire_{pin}": dict(bus.stats) for pin, bus in world.onewire_buses.items()}
+    )
+    return result
+
+
+def run_device(port, iterations):
+    command = ["mpremote"]
+    if port:
+        command += ["connect", port]
+    command += ["exec", f"import benchmarks; benchmarks.main({iterations})"]
+    lines = []
+    with subprocess.Popen(command, stdout=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            sys.stdout.write(line)
+            lines.append(line)
+    if process.returncode:
+        raise SystemExit(f"mpremote failed with exit code {process.returncode}")
+    return parse_capture(lines)
+
+
+def write_result(result, target, args):
+    if result is None:
+        raise SystemExit("No benchmark result found in the output.")
+    result = dict(
+        result,
+        target=target,
+        commit=git_commit(),
+        label=args.label,
+        created=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    )
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.out}")
+    else:
+        print(text)
+
+
+def compare(base, new):
+    print(f"base: {base.get('commit')} ({base.get('target')})")
+    print(f"new:  {new.get('commit')} ({new.get('target')})")
+    for case, new_metrics in new["cases"].items():
+        base_metrics = base["cases"].get(case)
+        if base_metrics is None:
+            print(f"{case}: new case")
+            continue
+        print(case)
+        for metric in COMPARED_METRICS:
+            if metric not in new_metrics or metric not in base_metrics:
+                continue
+            before, after = base_metrics[metric], new_metrics[metric]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"  {metric:<16} {before:>12.1f} {after:>12.1f} {change:>8}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="tools/bench.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("sim", "device", "capture"):
+        command = commands.add_parser(name)
+        command.add_argument("--out", help="JSON results file")
+        command.add_argument("--label", help="free-form note stored with the results")
+        if name != "capture":
+            command.add_argument("--iterations", type=int, default=20)
+    commands.choices["sim"].add_argument("--scenario", help="simulator scenario")
+    commands.choices["device"].add_argument("--port", help="serial port for mpremote")
+    commands.choices["capture"].add_argument("log", help="saved serial output")
+    compare_command = commands.add_parser("compare")
+    compare_command.add_argument("base")
+    compare_command.add_argument("new")
+    args = parser.parse_args(argv[1:])
+
+    if args.command == "compare":
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        compare(base, new)
+    elif args.command == "sim":
+        scenario = os.path.abspath(args.scenario) if args.scenario else None
+        out = os.path.abspath(args.out) if args.out else None
+        result = run_sim(args.iterations, scenario)
+        args.out = out
+        write_result(result, "sim", args)
+    elif args.command == "device":
+        write_result(run_device(args.port, args.iterations), "device", args)
+    else:
+        with open(args.log, errors="replace") as f:
+            write_result(parse_capture(f), "device", args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
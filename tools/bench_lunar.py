@@ -0,0 +1,105 @@
+# Compares the packed lunar table against the old mean-synodic-month model:
+# accuracy against tools/lunar_reference.csv and lookup speed.
+#   python tools/build_lunar_table.py 2000 2100 moon.bin
+#   python tools/bench_lunar.py moon.bin
+import calendar
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lunar import (PHASE_EVENTS, SYNODIC_MONTH_DAYS, LunarTable,  # noqa: E402
+                   mean_phase)
+
+EPOCH_2000_OFFSET = 946684800
+REFERENCE_FILE = os.path.join(os.path.dirname(__file__), "lunar_reference.csv")
+SPEED_SAMPLES = 20000
+
+
+def load_reference(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith("time,"):
+                continue
+            stamp, phase = line.split(",")
+            parsed = time.strptime(stamp, "%Y-%m-%d %H:%M")
+            events.append((calendar.timegm(parsed) - EPOCH_2000_OFFSET, phase))
+    return events
+
+
+def table_error_minutes(table, seconds, phase):
+    # Nearest table instant of the same phase, looked up from half a
+    # lunation either side so events near a lunation boundary still match.
+    quarter = PHASE_EVENTS.index(phase)
+    candidates = []
+    for probe in (seconds - 15 * 86400, seconds, seconds + 15 * 86400):
+        if table.covers(probe):
+            candidates.append(table.lunation(probe)[quarter])
+    return min((candidate - seconds for candidate in candidates), key=abs) / 60
+
+
+def mean_error_minutes(seconds, phase):
+    target = PHASE_EVENTS.index(phase) / 4
+    offset = (mean_phase(seconds)[0] - target + 0.5) % 1 - 0.5
+    return -offset * SYNODIC_MONTH_DAYS * 1440
+
+
+def summarize(label, errors):
+    absolute = sorted(abs(error) for error in errors)
+    mean = sum(absolute) / len(absolute)
+    print(
+        f"{label}: n={len(absolute)} mean={mean:.1f} min "
+        f"median={absolute[len(absolute) // 2]:.1f} min max={absolute[-1]:.1f} min"
+    )
+
+
+def time_lookups(label, func, samples):
+    started = time.perf_counter()
+    for seconds in samples:
+        func(seconds)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed / len(samples) * 1e6:.2f} us/lookup")
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(f"Usage: {argv[0]} <lunar table>", file=sys.stderr)
+        return 2
+
+    table = LunarTable(argv[1])
+    reference = load_reference(REFERENCE_FILE)
+    covered = [event for event in reference if table.covers(event[0])]
+
+    print(f"Reference events: {len(reference)} ({len(covered)} inside the table)")
+    summarize(
+        "table",
+        [table_error_minutes(table, seconds, phase) for seconds, phase in covered],
+    )
+    summarize(
+        "mean synodic month",
+        [mean_error_minutes(seconds, phase) for seconds, phase in reference],
+    )
+
+    span = table.last - table.first
+    step = span // SPEED_SAMPLES
+    sequential = [table.first + i * step for i in range(SPEED_SAMPLES)]
+    scattered = [
+        table.first + (i * 7919 % SPEED_SAMPLES) * step for i in range(SPEED_SAMPLES)
+    ]
+    daily = [table.first + i * 86400 for i in range(SPEED_SAMPLES // 10)]
+
+    time_lookups("mean model", mean_phase, sequential)
+    time_lookups("table, scattered dates", table.phase, scattered)
+    time_lookups("table, one lookup per day", table.phase, daily)
+    print(
+        f"table reads: {table.stats['reads']} for {table.stats['lookups']} lookups "
+        f"({table.count} records)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,43 @@
+# Packs images/*.pbm into a single indexed bundle for the device:
+#   python tools/build_assets.py images assets.bin
+#   mpremote cp assets.bin :/assets.bin
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from asset_bundle import build_bundle, parse_pbm  # noqa: E402
+
+
+def load_icons(directory):
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".pbm"):
+            continue
+        with open(os.path.join(directory, filename), "rb") as f:
+            data = f.read()
+        width, height, offset, size = parse_pbm(data)
+        yield filename[:-4], width, height, data[offset : offset + size]
+
+
+def main(argv):
+    if len(argv) != 3:
+        print(f"Usage: {argv[0]} <images directory> <output file>", file=sys.stderr)
+        return 2
+
+    icons = list(load_icons(argv[1]))
+    bundle = build_bundle(icons)
+    with open(argv[2], "wb") as f:
+        f.write(bundle)
+
+    source_bytes = sum(
+        os.path.getsize(os.path.join(argv[1], f"{name}.pbm")) for name, *_ in icons
+    )
+    print(
+        f"Packed {len(icons)} icons into {argv[2]}: "
+        f"{len(bundle)} bytes ({source_bytes} bytes of PBM files)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,209 @@
+# Generates the lunar phase table for the device from Meeus, "Astronomical
+# Algorithms" (2nd ed.), chapter 49. Runs on the host in double precision:
+#   python tools/build_lunar_table.py 2000 2100 moon.bin
+#   mpremote cp moon.bin :/moon.bin
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from lunar import build_table  # noqa: E402
+
+# Julian Day of 2000-01-01 00:00 UTC, the epoch the table is stored against.
+JD_2000 = 2451544.5
+
+# Periodic terms as (coefficient, power of E, M, M', F, Omega multipliers).
+NEW_MOON_TERMS = (
+    (-0.40720, 0, 0, 1, 0, 0),
+    (0.17241, 1, 1, 0, 0, 0),
+    (0.01608, 0, 0, 2, 0, 0),
+    (0.01039, 0, 0, 0, 2, 0),
+    (0.00739, 1, -1, 1, 0, 0),
+    (-0.00514, 1, 1, 1, 0, 0),
+    (0.00208, 2, 2, 0, 0, 0),
+    (-0.00111, 0, 0, 1, -2, 0),
+    (-0.00057, 0, 0, 1, 2, 0),
+    (0.00056, 1, 1, 2, 0, 0),
+    (-0.00042, 0, 0, 3, 0, 0),
+    (0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 1, 1, 0, -2, 0),
+    (-0.00024, 1, -1, 2, 0, 0),
+    (-0.00017, 0, 0, 0, 0, 1),
+    (-0.00007, 0, 2, 1, 0, 0),
+    (0.00004, 0, 0, 2, -2, 0),
+    (0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0),
+    (0.00003, 0, 0, 2, 2, 0),
+    (-0.00003, 0, 1, 1, 2, 0),
+    (0.00003, 0, -1, 1, 2, 0),
+    (-0.00002, 0, -1, 1, -2, 0),
+    (-0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0, 0, 4, 0, 0),
+)
+
+FULL_MOON_TERMS = (
+    (-0.40614, 0, 0, 1, 0, 0),
+    (0.17302, 1, 1, 0, 0, 0),
+    (0.01614, 0, 0, 2, 0, 0),
+    (0.01043, 0, 0, 0, 2, 0),
+    (0.00734, 1, -1, 1, 0, 0),
+    (-0.00515, 1, 1, 1, 0, 0),
+    (0.00209, 2, 2, 0, 0, 0),
+) + NEW_MOON_TERMS[7:]
+
+QUARTER_TERMS = (
+    (-0.62801, 0, 0, 1, 0, 0),
+    (0.17172, 1, 1, 0, 0, 0),
+    (-0.01183, 1, 1, 1, 0, 0),
+    (0.00862, 0, 0, 2, 0, 0),
+    (0.00804, 0, 0, 0, 2, 0),
+    (0.00454, 1, -1, 1, 0, 0),
+    (0.00204, 2, 2, 0, 0, 0),
+    (-0.00180, 0, 0, 1, -2, 0),
+    (-0.00070, 0, 0, 1, 2, 0),
+    (-0.00040, 0, 0, 3, 0, 0),
+    (-0.00034, 1, -1, 2, 0, 0),
+    (0.00032, 1, 1, 0, 2, 0),
+    (0.00032, 1, 1, 0, -2, 0),
+    (-0.00028, 2, 2, 1, 0, 0),
+    (0.00027, 1, 1, 2, 0, 0),
+    (-0.00017, 0, 0, 0, 0, 1),
+    (-0.00005, 0, -1, 1, -2, 0),
+    (0.00004, 0, 0, 2, 2, 0),
+    (-0.00004, 0, 1, 1, 2, 0),
+    (0.00004, 0, -2, 1, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0),
+    (0.00003, 0, 3, 0, 0, 0),
+    (0.00002, 0, 0, 2, -2, 0),
+    (0.00002, 0, -1, 1, 2, 0),
+    (-0.00002, 0, 1, 3, 0, 0),
+)
+
+# Planetary arguments A1..A14: (constant, rate per lunation, coefficient).
+PLANETARY_TERMS = (
+    (251.88, 0.016321, 0.000165),
+    (251.83, 26.651886, 0.000164),
+    (349.42, 36.412478, 0.000126),
+    (84.66, 18.206239, 0.000110),
+    (141.74, 53.303771, 0.000062),
+    (207.14, 2.453732, 0.000060),
+    (154.84, 7.306860, 0.000056),
+    (34.52, 27.261239, 0.000047),
+    (207.19, 0.121824, 0.000042),
+    (291.34, 1.844379, 0.000040),
+    (161.72, 24.198154, 0.000037),
+    (239.56, 25.513099, 0.000035),
+    (331.55, 3.592518, 0.000023),
+)
+
+
+def delta_t(year):
+    # TT - UT in seconds (Espenak & Meeus polynomial fits).
+    if year < 2005:
+        t = year - 2000
+        return 63.86 + 0.3345 * t - 0.060374 * t**2 + 0.0017275 * t**3
+    if year < 2050:
+        t = year - 2000
+        return 62.92 + 0.32217 * t + 0.005589 * t**2
+    u = (year - 1820) / 100
+    return -20 + 32 * u**2 - 0.5628 * (2150 - year)
+
+
+def phase_jde(k):
+    # k is the lunation number since the 2000-01-06 new moon; its fractional
+    # part selects the phase (.0 new, .25 first quarter, .5 full, .75 last).
+    t = k / 1236.85
+    jde = (
+        2451550.09766
+        + 29.530588861 * k
+        + 0.00015437 * t**2
+        - 0.000000150 * t**3
+        + 0.00000000073 * t**4
+    )
+    e = 1 - 0.002516 * t - 0.0000074 * t**2
+    m = math.radians(2.5534 + 29.10535670 * k - 0.0000014 * t**2 - 0.00000011 * t**3)
+    mp = math.radians(
+        201.5643
+        + 385.81693528 * k
+        + 0.0107582 * t**2
+        + 0.00001238 * t**3
+        - 0.000000058 * t**4
+    )
+    f = math.radians(
+        160.7108
+        + 390.67050284 * k
+        - 0.0016118 * t**2
+        - 0.00000227 * t**3
+        + 0.000000011 * t**4
+    )
+    omega = math.radians(
+        124.7746 - 1.56375588 * k + 0.0020672 * t**2 + 0.00000215 * t**3
+    )
+
+    fraction = round((k % 1) * 4) % 4
+    terms = (NEW_MOON_TERMS, QUARTER_TERMS, FULL_MOON_TERMS, QUARTER_TERMS)[fraction]
+    for coefficient, e_power, cm, cmp, cf, comega in terms:
+        angle = cm * m + cmp * mp + cf * f + comega * omega
+        jde += coefficient * e**e_power * math.sin(angle)
+
+    if fraction in (1, 3):
+        w = (
+            0.00306
+            - 0.00038 * e * math.cos(m)
+            + 0.00026 * math.cos(mp)
+            - 0.00002 * math.cos(mp - m)
+            + 0.00002 * math.cos(mp + m)
+            + 0.00002 * math.cos(2 * f)
+        )
+        jde += w if fraction == 1 else -w
+
+    jde += 0.000325 * math.sin(math.radians(299.77 + 0.107408 * k - 0.009173 * t**2))
+    for constant, rate, coefficient in PLANETARY_TERMS:
+        jde += coefficient * math.sin(math.radians(constant + rate * k))
+    return jde
+
+
+def phase_seconds(k):
+    # Seconds since 2000-01-01 00:00 UTC.
+    jde = phase_jde(k)
+    year = 2000 + (jde - JD_2000) / 365.25
+    return round((jde - JD_2000) * 86400 - delta_t(year))
+
+
+def lunations(first_year, last_year):
+    first_k = math.floor((first_year - 2000) * 12.3685)
+    last_k = math.ceil((last_year + 1 - 2000) * 12.3685)
+    rows = []
+    for k in range(first_k, last_k):
+        rows.append(tuple(phase_seconds(k + quarter / 4) for quarter in range(4)))
+    closing = phase_seconds(last_k)
+    rows.append((closing, closing, closing, closing))
+    return rows
+
+
+def main(argv):
+    if len(argv) != 4:
+        print(
+            f"Usage: {argv[0]} <first year> <last year> <output file>",
+            file=sys.stderr,
+        )
+        return 2
+
+    first_year, last_year = int(argv[1]), int(argv[2])
+    if first_year < 2000:
+        print("The table stores seconds since 2000; start at 2000.", file=sys.stderr)
+        return 2
+    rows = lunations(first_year, last_year)
+    table = build_table(rows)
+    with open(argv[3], "wb") as f:
+        f.write(table)
+    print(
+        f"Wrote {len(rows) - 1} lunations ({first_year}-{last_year}) "
+        f"to {argv[3]}: {len(table)} bytes"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
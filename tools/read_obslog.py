@@ -0,0 +1,78 @@
+# Host-side reader for the observation log segments. Copy the log directory
+# off the Pico first, e.g.:
+#   mpremote cp -r :/log .
+#   python tools/read_obslog.py log > observations.csv
+# Timestamps are printed as Unix time and the datetime column is UTC. Pass
+# --tz NAME (a tz.ZONES name or POSIX TZ string) to add local time.
+import calendar
+import os
+import sys
+import time
+
+# tz does its calendar arithmetic with time.mktime() and localtime(), which
+# have no zone on the device; give the host's the same behaviour.
+os.environ["TZ"] = "UTC"
+if hasattr(time, "tzset"):
+    time.tzset()
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tz  # noqa: E402
+from obslog import read_header, read_records  # noqa: E402
+
+
+def read_directory(directory):
+    records = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("obs_") and name.endswith(".bin"):
+            with open(os.path.join(directory, name), "rb") as f:
+                epoch = read_header(f)
+                if epoch is None:
+                    continue
+                # Timestamps count from Jan 1 of the header's epoch year.
+                offset = calendar.timegm((epoch, 1, 1, 0, 0, 0))
+                for record in read_records(f):
+                    records.append((record[0] + offset,) + record[1:])
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def format_value(value):
+    return "" if value is None else f"{value:g}"
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp))
+
+
+def main(argv):
+    zone = None
+    if "--tz" in argv[:-1]:
+        index = argv.index("--tz")
+        zone = tz.get_zone(argv[index + 1])
+        argv = argv[:index] + argv[index + 2 :]
+    if len(argv) != 2:
+        print(f"Usage: {argv[0]} [--tz NAME] <log directory>", file=sys.stderr)
+        return 2
+
+    records = read_directory(argv[1])
+    columns = "timestamp,datetime_utc,"
+    if zone is not None:
+        columns += "datetime_local,"
+    print(columns + "outside_temp_C,inside_temp_C,humidity,pressure_hPa")
+    for timestamp, outside, inside, humidity, pressure in records:
+        fields = [str(timestamp), format_time(timestamp)]
+        if zone is not None:
+            fields.append(format_time(zone.to_local(timestamp)))
+        fields += [
+            format_value(outside),
+            format_value(inside),
+            format_value(humidity),
+            format_value(pressure),
+        ]
+        print(",".join(fields))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
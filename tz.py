@@ -0,0 +1,259 @@
+import time
+
+# POSIX TZ strings for the zones we deploy to. A zone not listed here can be
+# configured as a raw POSIX string, e.g. TIMEZONE = "EET-2EEST,M3.5.0/3,M10.5.0/4".
+ZONES = {
+    "UTC": "UTC0",
+    "GMT": "GMT0",
+    "Europe/Kyiv": "EET-2EEST,M3.5.0/3,M10.5.0/4",
+    "Europe/Kiev": "EET-2EEST,M3.5.0/3,M10.5.0/4",
+    "Europe/Lviv": "EET-2EEST,M3.5.0/3,M10.5.0/4",
+    "Europe/Warsaw": "CET-1CEST,M3.5.0,M10.5.0/3",
+    "Europe/Berlin": "CET-1CEST,M3.5.0,M10.5.0/3",
+    "Europe/Prague": "CET-1CEST,M3.5.0,M10.5.0/3",
+    "Europe/London": "GMT0BST,M3.5.0/1,M10.5.0",
+    "Europe/Lisbon": "WET0WEST,M3.5.0/1,M10.5.0",
+    "Europe/Helsinki": "EET-2EEST,M3.5.0/3,M10.5.0/4",
+    "Europe/Istanbul": "<+03>-3",
+    "America/New_York": "EST5EDT,M3.2.0,M11.1.0",
+    "America/Chicago": "CST6CDT,M3.2.0,M11.1.0",
+    "America/Denver": "MST7MDT,M3.2.0,M11.1.0",
+    "America/Los_Angeles": "PST8PDT,M3.2.0,M11.1.0",
+    "Australia/Sydney": "AEST-10AEDT,M10.1.0,M4.1.0/3",
+    "Asia/Tokyo": "JST-9",
+}
+
+# Names in ZONES that the IANA database does not have, mapped to the IANA
+# zone with the same rules, for services that take IANA names.
+IANA_NAMES = {"Europe/Lviv": "Europe/Kyiv"}
+
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Transition instants are computed once per year and kept for the current
+# and adjacent years only.
+YEAR_CACHE_SIZE = 3
+
+
+def _is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _month_start(year, month):
+    # Day of the year (0-based) on which `month` starts.
+    days = sum(_MONTH_DAYS[: month - 1])
+    if month > 2 and _is_leap(year):
+        days += 1
+    return days
+
+
+def _month_length(year, month):
+    if month == 2 and _is_leap(year):
+        return 29
+    return _MONTH_DAYS[month - 1]
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def peek(self):
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def name(self):
+        if self.peek() == "<":
+            end = self.text.index(">", self.pos)
+            name = self.text[self.pos + 1 : end]
+            self.pos = end + 1
+            return name
+        start = self.pos
+        while self.peek().isalpha():
+            self.pos += 1
+        if self.pos - start < 3:
+            raise ValueError(f"bad zone name in {self.text!r}")
+        return self.text[start : self.pos]
+
+    def number(self):
+        start = self.pos
+        while self.peek().isdigit():
+            self.pos += 1
+        if start == self.pos:
+            raise ValueError(f"expected a number in {self.text!r}")
+        return int(self.text[start : self.pos])
+
+    def duration(self):
+        # [+-]hh[:mm[:ss]] in seconds.
+        sign = 1
+        if self.peek() in "+-":
+            sign = -1 if self.peek() == "-" else 1
+            self.pos += 1
+        seconds = self.number() * 3600
+        if self.peek() == ":":
+            self.pos += 1
+            seconds += self.number() * 60
+            if self.peek() == ":":
+                self.pos += 1
+                seconds += self.number()
+        return sign * seconds
+
+    def rule(self):
+        # Mm.w.d, Jn or n, optionally followed by /time (default 02:00).
+        if self.peek() == "M":
+            self.pos += 1
+            month = self.number()
+            self.pos += 1
+            week = self.number()
+            self.pos += 1
+            weekday = self.number()
+            rule = ("M", month, week, weekday)
+        elif self.peek() == "J":
+            self.pos += 1
+            rule = ("J", self.number())
+        else:
+            rule = ("D", self.number())
+        at = 2 * 3600
+        if self.peek() == "/":
+            self.pos += 1
+            at = self.duration()
+        return rule, at
+
+
+class TimeZone:
+    def __init__(self, posix):
+        self.posix = posix
+        parser = _Parser(posix)
+        self.std_name = parser.name()
+        # POSIX offsets count hours west of Greenwich; store seconds east.
+        self.std_offset = -parser.duration()
+        self.dst_name = None
+        self.dst_offset = self.std_offset
+        self.start_rule = self.end_rule = None
+        if parser.peek():
+            self.dst_name = parser.name()
+            self.dst_offset = self.std_offset + 3600
+            if parser.peek() not in ("", ","):
+                self.dst_offset = -parser.duration()
+            if parser.peek() != ",":
+                # No rules given: the POSIX default is the US rules.
+                parser = _Parser(",M3.2.0,M11.1.0")
+            parser.pos += 1
+            self.start_rule = parser.rule()
+            parser.pos += 1
+            self.end_rule = parser.rule()
+        self._years = {}
+        self._order = []
+        self._current = None
+
+    def _year_start(self, year):
+        return time.mktime((year, 1, 1, 0, 0, 0, 0, 0, -1))
+
+    def _rule_day(self, year, rule, jan1_weekday):
+        kind = rule[0]
+        if kind == "J":
+            day = rule[1] - 1
+            if _is_leap(year) and rule[1] >= 60:
+                day += 1
+            return day
+        if kind == "D":
+            return rule[1]
+        _, month, week, weekday = rule
+        first = _month_start(year, month)
+        # POSIX weekdays count from Sunday; time.localtime from Monday.
+        first_weekday = (jan1_weekday + 1 + first) % 7
+        day = (weekday - first_weekday) % 7 + (week - 1) * 7
+        while day >= _month_length(year, month):
+            day -= 7
+        return first + day
+
+    def _compute_year(self, year):
+        start = self._year_start(year)
+        end = self._year_start(year + 1)
+        entry = [start, end, None, None]
+        if self.start_rule is not None:
+            jan1_weekday = time.localtime(start)[6]
+            rule, at = self.start_rule
+            # The switch to DST happens at a standard-time wall clock, the
+            # switch back at a DST wall clock.
+            entry[2] = (
+                start
+                + self._rule_day(year, rule, jan1_weekday) * 86400
+                + at
+                - self.std_offset
+            )
+            rule, at = self.end_rule
+            entry[3] = (
+                start
+                + self._rule_day(year, rule, jan1_weekday) * 86400
+                + at
+                - self.dst_offset
+            )
+        return entry
+
+    def _year_entry(self, utc):
+        current = self._current
+        if current is not None and current[0] <= utc < current[1]:
+            return current
+        year = time.localtime(utc)[0]
+        entry = self._years.get(year)
+        if entry is None:
+            entry = self._compute_year(year)
+            self._years[year] = entry
+            self._order.append(year)
+            if len(self._order) > YEAR_CACHE_SIZE:
+                del self._years[self._order.pop(0)]
+        self._current = entry
+        return entry
+
+    def transitions(self, year):
+        # (DST start, DST end) as UTC timestamps, or None without DST.
+        if self.start_rule is None:
+            return None
+        entry = self._year_entry(self._year_start(year))
+        return entry[2], entry[3]
+
+    def next_transition(self, utc):
+        # UTC of the first change of offset after utc, or None without DST.
+        if self.start_rule is None:
+            return None
+        year = time.localtime(utc)[0]
+        for when in sorted(self.transitions(year) + self.transitions(year + 1)):
+            if when > utc:
+                return when
+
+    def is_dst(self, utc):
+        if self.start_rule is None:
+            return False
+        _, _, start, end = self._year_entry(utc)
+        if start < end:
+            return start <= utc < end
+        # Southern hemisphere: DST spans the new year.
+        return not (end <= utc < start)
+
+    def utcoffset(self, utc):
+        return self.dst_offset if self.is_dst(utc) else self.std_offset
+
+    def tzname(self, utc):
+        return self.dst_name if self.is_dst(utc) else self.std_name
+
+    def to_local(self, utc):
+        return utc + self.utcoffset(utc)
+
+    def to_utc(self, local):
+        # Wall-clock times repeated at the end of DST resolve to DST, and
+        # skipped ones at its start to standard time.
+        if self.start_rule is not None:
+            utc = local - self.dst_offset
+            if self.is_dst(utc):
+                return utc
+        return local - self.std_offset
+
+
+_zones = {}
+
+
+def get_zone(name):
+    zone = _zones.get(name)
+    if zone is None:
+        zone = TimeZone(ZONES.get(name, name))
+        _zones[name] = zone
+    return zone
@@ -1,102 +1,100 @@
-from local_sensors import get_latest_observation
-
-weather_history = []
-MAX_HISTORY = 36
-
-
-def clean(val):
-    if isinstance(val, str):
-        cleaned_value = "".join(c for c in val if c.isdigit() or c == "." or c == "-")
-        try:
-            return float(cleaned_value)
-        except ValueError:
-            return None
-    try:
-        return float(val)
-    except (TypeError, ValueError):
-        return None
-
-
-def average(values):
-    clean_vals = [clean(v) for v in values if clean(v) is not None]
-    return sum(clean_vals) / len(clean_vals) if clean_vals else None
-
-
-def check_weather_change():
-    observation = get_latest_observation()
-    if not observation:
+import log
+import observation_bus
+from config import (HUM_CHANGE_THRESHOLDS, PRESSURE_CHANGE_THRESHOLDS,
+                    TEMP_CHANGE_THRESHOLDS, TENDENCY_BUCKET_SECONDS,
+                    TENDENCY_MIN_SPAN_SECONDS, TENDENCY_WINDOW_SECONDS)
+from local_sensors import hpa_to_mmhg
+from tendency import TendencyEngine
+
+tendency = TendencyEngine(
+    TENDENCY_WINDOW_SECONDS, TENDENCY_BUCKET_SECONDS, TENDENCY_MIN_SPAN_SECONDS
+)
+weather_history = tendency.history
+
+_last_snapshot = None
+_last_result = ([], 0)
+_log = log.get("Weather")
+
+
+def check_weather_change(snapshot=None):
+    global _last_snapshot, _last_result
+    if snapshot is None:
+        snapshot = observation_bus.latest_snapshot()
+    if snapshot is None:
         return [], 0
 
-    required_keys = ["pressure_mmHg", "inside_temp_C", "humidity_%"]
-    if not all(
-        key in observation and observation[key] is not None for key in required_keys
+    # The bus hands out the same snapshot until a new sample is taken; only
+    # new samples go into the history.
+    if snapshot is _last_snapshot:
+        return _last_result
+    _last_snapshot = snapshot
+    _last_result = _compare_with_history(snapshot)
+    return _last_result
+
+
+def warm_start(records):
+    restored = 0
+    for timestamp, _, inside_temp, humidity, pressure_hPa in records:
+        if inside_temp is None or humidity is None or pressure_hPa is None:
+            continue
+        tendency.add(timestamp, hpa_to_mmhg(pressure_hPa), inside_temp, humidity)
+        restored += 1
+    _log.info("Restored %d samples from the observation log.", restored)
+    return restored
+
+
+def classify_change(diff, thresholds):
+    minor, major = thresholds
+    if abs(diff) >= major:
+        return 2
+    if abs(diff) >= minor:
+        return 1
+    return 0
+
+
+def _compare_with_history(snapshot):
+    if (
+        snapshot.pressure_mmHg is None
+        or snapshot.inside_temp_C is None
+        or snapshot.humidity is None
     ):
-        print("Warning: Incomplete observation data received.")
-        if weather_history:
-            weather_history.append(observation)
-            if len(weather_history) > MAX_HISTORY:
-                weather_history.pop(0)
+        _log.warning("Incomplete observation data received.")
         return [], 0
 
-    weather_history.append(observation)
-    if len(weather_history) > MAX_HISTORY:
-        weather_history.pop(0)
+    tendency.add(
+        snapshot.timestamp,
+        snapshot.pressure_mmHg,
+        snapshot.inside_temp_C,
+        snapshot.humidity,
+    )
 
-    if len(weather_history) < 2:
+    if not tendency.ready():
         return [], 0
 
-    first_observation = weather_history[0]
-
-    if any(
-        first_observation.get(key) is None or clean(first_observation[key]) is None
-        for key in required_keys
-    ) or any(
-        observation.get(key) is None or clean(observation[key]) is None
-        for key in required_keys
-    ):
-        print("Warning: Could not clean all observation values for comparison.")
+    pressure_diff = tendency.change("pressure")
+    temp_diff = tendency.change("temperature")
+    hum_diff = tendency.change("humidity")
+    if pressure_diff is None or temp_diff is None or hum_diff is None:
         return [], 0
 
-    pressure_diff = clean(observation["pressure_mmHg"]) - clean(
-        first_observation["pressure_mmHg"]
-    )
-    temp_diff = clean(observation["inside_temp_C"]) - clean(
-        first_observation["inside_temp_C"]
-    )
-    hum_diff = clean(observation["humidity_%"]) - clean(first_observation["humidity_%"])
-
-    print(
-        f"Temp diff: {temp_diff:.1f}°C, Hum diff: {hum_diff:.1f}%, Pressure diff: {pressure_diff:.1f} mmHg"
+    _log.debug(
+        "Temp diff: %.1f°C, Hum diff: %.1f%%, Pressure diff: %.1f mmHg",
+        temp_diff,
+        hum_diff,
+        pressure_diff,
     )
 
     changes = []
     significant_level = 0
 
-    if abs(temp_diff) >= 5:
-        temp_str = f"{temp_diff:+.0f}"
-        changes.append((temp_str, "temp_in"))
-        significant_level = max(significant_level, 2)
-    elif abs(temp_diff) >= 3:
-        temp_str = f"{temp_diff:+.0f}"
-        changes.append((temp_str, "temp_in"))
-        significant_level = max(significant_level, 1)
-
-    if abs(hum_diff) >= 15:
-        hum_str = f"{hum_diff:+.0f}"
-        changes.append((hum_str, "hum"))
-        significant_level = max(significant_level, 2)
-    elif abs(hum_diff) >= 10:
-        hum_str = f"{hum_diff:+.0f}"
-        changes.append((hum_str, "hum"))
-        significant_level = max(significant_level, 1)
-
-    if abs(pressure_diff) >= 10:
-        press_str = f"{pressure_diff:+.0f}"
-        changes.append((press_str, "pres"))
-        significant_level = max(significant_level, 2)
-    elif abs(pressure_diff) >= 5:
-        press_str = f"{pressure_diff:+.0f}"
-        changes.append((press_str, "pres"))
-        significant_level = max(significant_level, 1)
+    for diff, thresholds, icon in (
+        (temp_diff, TEMP_CHANGE_THRESHOLDS, "temp_in"),
+        (hum_diff, HUM_CHANGE_THRESHOLDS, "hum"),
+        (pressure_diff, PRESSURE_CHANGE_THRESHOLDS, "pres"),
+    ):
+        level = classify_change(diff, thresholds)
+        if level:
+            changes.append((f"{diff:+.0f}", icon))
+            significant_level = max(significant_level, level)
 
     return changes, significant_level
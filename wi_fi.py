@@ -1,75 +1,331 @@
+import random
 import time
 
 import network
 
+import log
+import time_service
 
-def read_credentials():
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+from config import (WIFI_BACKOFF_BASE_MS, WIFI_BACKOFF_MAX_MS,
+                    WIFI_CONNECT_TIMEOUT_MS, WIFI_CREDENTIALS_FILE,
+                    WIFI_LINK_CHECK_MS)
+
+_STAT_WRONG_PASSWORD = getattr(network, "STAT_WRONG_PASSWORD", -3)
+_STAT_NO_AP_FOUND = getattr(network, "STAT_NO_AP_FOUND", -2)
+_STAT_CONNECT_FAIL = getattr(network, "STAT_CONNECT_FAIL", -1)
+_FAILED_STATES = (_STAT_WRONG_PASSWORD, _STAT_NO_AP_FOUND, _STAT_CONNECT_FAIL)
+_log = log.get("Wi-Fi")
+
+
+def _apply_setting(entry, key, value):
+    if key == "PASSWORD":
+        entry[2] = value
+    elif key == "PRIORITY":
+        try:
+            entry[0] = int(value)
+        except ValueError:
+            _log.error("Invalid priority '%s'.", value)
+
+
+def read_credentials(path=WIFI_CREDENTIALS_FILE):
+    # Returns [(priority, ssid, password), ...], best first. Every SSID= line
+    # starts a new network; PASSWORD= and an optional PRIORITY= (higher wins)
+    # apply to the SSID above them. Without PRIORITY, earlier entries win.
+    # Settings above the first SSID= line, as single-network files could
+    # have them, belong to the first network.
+    networks = []
+    leading = []
     try:
-        with open("credentials.txt", "r") as f:
+        with open(path, "r") as f:
             lines = f.readlines()
-
-            if len(lines) < 2:
-                print("Error [Wi-Fi]: File does not contain both SSID and PASSWORD.")
-                return None, None
-
-            ssid_line = next((line for line in lines if "SSID=" in line), None)
-            password_line = next((line for line in lines if "PASSWORD=" in line), None)
-
-            if ssid_line and password_line:
-                ssid = ssid_line.strip().split("=")[1].strip()
-                password = password_line.strip().split("=")[1].strip()
-                if ssid and password:
-                    return ssid, password
-                else:
-                    print("Error [Wi-Fi]: Invalid SSID or password format.")
-                    return None, None
-            else:
-                print("Error [Wi-Fi]: SSID or PASSWORD not found in credentials.txt.")
-                return None, None
     except Exception as e:
-        print(f"Error [Wi-Fi] reading credentials: {e}")
-        return None, None
+        _log.error("Error reading credentials: %s", e)
+        return networks
 
+    for line in lines:
+        line = line.strip()
+        if "=" not in line or line.startswith("#"):
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip().upper()
+        value = value.strip()
+        if key == "SSID":
+            networks.append([-len(networks), value, None])
+            if len(networks) == 1:
+                for setting in leading:
+                    _apply_setting(networks[0], *setting)
+        elif not networks:
+            leading.append((key, value))
+        else:
+            _apply_setting(networks[-1], key, value)
 
-def connect_wifi():
-    ssid, password = read_credentials()
+    valid = []
+    for priority, ssid, password in networks:
+        if ssid and password:
+            valid.append((priority, ssid, password))
+        else:
+            _log.error("Invalid SSID or password format for '%s'.", ssid)
+    valid.sort(key=lambda entry: -entry[0])
+    if not valid:
+        _log.error("No usable networks in %s.", path)
+    return valid
 
-    if ssid is None or password is None:
-        print("Error [Wi-Fi]: Cannot retrieve credentials, proceeding without Wi-Fi.")
-        return False
 
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    if not wlan.isconnected():
-        print(f"Attempting to connect to Wi-Fi: SSID='{ssid}'")
+class WiFiManager:
+    # Owns the station interface: connects to the best known network, backs
+    # off exponentially (with jitter) while nothing is reachable, and keeps
+    # watching the link afterwards so a dropped connection is noticed and
+    # re-established. is_connected() is a dict lookup, cheap enough to call
+    # before every network job.
+
+    def __init__(self, credentials_path=WIFI_CREDENTIALS_FILE):
+        self.networks = read_credentials(credentials_path)
+        self.wlan = None
+        self.link = {"up": False, "ssid": None, "ip": None, "since_ms": 0}
+        self.stats = {
+            "attempts": 0,
+            "connects": 0,
+            "reconnects": 0,
+            "drops": 0,
+            "failures": 0,
+            "last_connect_ms": 0,
+            "max_connect_ms": 0,
+            "total_connect_ms": 0,
+        }
+        # Radio-on time is the energy proxy: the CYW43 draws tens of mA while
+        # active, next to nothing once powered down.
+        self.radio = {
+            "on": False,
+            "mark_ms": 0,
+            "on_ms": 0,
+            "wakeups": 0,
+            "day": None,
+            "today_ms": 0,
+            "yesterday_ms": 0,
+        }
+        self._failures_in_row = 0
+        self._dropped = False
+
+    def _account_radio(self):
+        # Called often enough (every link check, every power change) that
+        # ticks_diff never spans more than a few minutes.
+        radio = self.radio
+        now = time.ticks_ms()
+        day = time_service.day_key()
+        if radio["day"] != day:
+            if radio["day"] is not None:
+                radio["yesterday_ms"] = radio["today_ms"]
+            radio["today_ms"] = 0
+            radio["day"] = day
+        if radio["on"]:
+            elapsed = time.ticks_diff(now, radio["mark_ms"])
+            radio["on_ms"] += elapsed
+            radio["today_ms"] += elapsed
+        radio["mark_ms"] = now
+
+    def _power_on(self, wlan):
+        if not self.radio["on"]:
+            self._account_radio()
+            self.radio["on"] = True
+            self.radio["wakeups"] += 1
+        wlan.active(True)
+
+    def power_down(self):
+        # Deliberate shutdown between network jobs: not counted as a drop.
+        if self.wlan is None or not self.radio["on"]:
+            return
+        self.link["up"] = False
+        self.link["ip"] = None
+        try:
+            self.wlan.disconnect()
+            self.wlan.active(False)
+        except Exception as e:
+            _log.error("Error powering down: %s", e)
+        self._account_radio()
+        self.radio["on"] = False
+
+    def radio_on_seconds(self):
+        self._account_radio()
+        return self.radio["on_ms"] // 1000
+
+    def _interface(self):
+        if self.wlan is None:
+            self.wlan = network.WLAN(network.STA_IF)
+        return self.wlan
+
+    def is_connected(self):
+        return self.link["up"]
+
+    def _set_down(self):
+        if self.link["up"]:
+            self.stats["drops"] += 1
+            self._dropped = True
+            _log.warning("Link to '%s' lost.", self.link["ssid"])
+        self.link["up"] = False
+        self.link["ip"] = None
+
+    def _candidates(self, wlan):
+        # Only try networks that are actually in range, best priority first
+        # and strongest signal among equals. If the scan fails, try them all.
+        try:
+            visible = {}
+            for entry in wlan.scan():
+                ssid = entry[0].decode() if isinstance(entry[0], bytes) else entry[0]
+                visible[ssid] = max(entry[3], visible.get(ssid, -1000))
+        except Exception as e:
+            _log.warning("Scan failed: %s", e)
+            return list(self.networks)
+        in_range = [entry for entry in self.networks if entry[1] in visible]
+        in_range.sort(key=lambda entry: (-entry[0], -visible[entry[1]]))
+        return in_range
+
+    async def _join(self, wlan, ssid, password):
+        self.stats["attempts"] += 1
+        started = time.ticks_ms()
         wlan.connect(ssid, password)
+        while time.ticks_diff(time.ticks_ms(), started) < WIFI_CONNECT_TIMEOUT_MS:
+            if wlan.isconnected():
+                elapsed = time.ticks_diff(time.ticks_ms(), started)
+                self.stats["last_connect_ms"] = elapsed
+                self.stats["total_connect_ms"] += elapsed
+                if elapsed > self.stats["max_connect_ms"]:
+                    self.stats["max_connect_ms"] = elapsed
+                return True
+            status = wlan.status()
+            if status in _FAILED_STATES:
+                _log.warning("'%s' refused the connection (status %s).", ssid, status)
+                break
+            await asyncio.sleep(0.25)
+        try:
+            wlan.disconnect()
+        except Exception:
+            pass
+        return False
+
+    async def connect(self):
+        # One pass over the known networks. Returns True once linked.
+        if not self.networks:
+            return False
+        wlan = self._interface()
+        self._power_on(wlan)
+        if wlan.isconnected():
+            if not self.link["up"]:
+                self._set_up(wlan, self.link["ssid"])
+            return True
+
+        for _, ssid, password in self._candidates(wlan):
+            _log.info("Attempting to connect to Wi-Fi: SSID='%s'", ssid)
+            try:
+                if await self._join(wlan, ssid, password):
+                    self._set_up(wlan, ssid)
+                    return True
+            except Exception as e:
+                _log.error("Error connecting to '%s': %s", ssid, e)
+        self.stats["failures"] += 1
+        return False
+
+    def _set_up(self, wlan, ssid):
+        if not self.link["up"]:
+            # Waking up after power_down() is not a reconnect; recovering
+            # from a lost link is.
+            if self._dropped:
+                self.stats["reconnects"] += 1
+                self._dropped = False
+            self.stats["connects"] += 1
+        self.link["up"] = True
+        self.link["ssid"] = ssid
+        self.link["ip"] = wlan.ifconfig()[0]
+        self.link["since_ms"] = time.ticks_ms()
+        self._failures_in_row = 0
+        _log.info("Connected to '%s' on %s", ssid, self.link["ip"])
 
-        attempt = 0
-        while not wlan.isconnected():
-            print(f"[Wi-Fi] Attempt {attempt}: Connection status: {wlan.status()}")
-            if attempt >= 10:  # Increased retry within this function
-                print(
-                    "[Wi-Fi] Failed to connect after multiple attempts within connect_wifi."
-                )
+    def next_backoff_ms(self):
+        # Exponential backoff with "equal jitter": half the delay is fixed,
+        # the other half random, so units that lost the same AP do not all
+        # retry in lockstep.
+        exponent = min(self._failures_in_row, 16)
+        self._failures_in_row += 1
+        delay = min(WIFI_BACKOFF_MAX_MS, WIFI_BACKOFF_BASE_MS << exponent)
+        half = delay // 2
+        return half + (random.getrandbits(16) * half >> 16)
+
+    async def ensure_connected(self):
+        # Keeps trying with backoff until linked.
+        while not await self.connect():
+            if not self.networks:
                 return False
-            attempt += 1
-            time.sleep(2)
-            if attempt > 0 and attempt % 5 == 0:
-                if wlan.status() == network.STAT_IDLE:
-                    print("[Wi-Fi] Re-attempting connection.")
-                    wlan.connect(ssid, password)
-
-        ip = wlan.ifconfig()[0]
-        print(f"[Wi-Fi] Connected on {ip}")
+            delay = self.next_backoff_ms()
+            _log.info("No connection, retrying in %d ms.", delay)
+            await asyncio.sleep(delay / 1000)
         return True
-    else:
-        print("[Wi-Fi] Already connected.")
-        print(f"[Wi-Fi] IP address: {wlan.ifconfig()[0]}")
+
+    async def wait_connected(self, timeout_ms):
+        # For callers that want the first connection before going on; the
+        # connecting itself is left to run().
+        started = time.ticks_ms()
+        while not self.link["up"]:
+            if time.ticks_diff(time.ticks_ms(), started) >= timeout_ms:
+                return False
+            await asyncio.sleep(0.25)
         return True
 
+    async def run(self):
+        # Supervisor task: connect, then poll the link state and reconnect
+        # (with backoff) whenever it drops.
+        while self.networks:
+            if not self.link["up"]:
+                await self.ensure_connected()
+            await asyncio.sleep(WIFI_LINK_CHECK_MS / 1000)
+            self._account_radio()
+            try:
+                if not self.wlan.isconnected():
+                    self._set_down()
+            except Exception as e:
+                _log.error("Error checking link: %s", e)
+                self._set_down()
+
+    def print_stats(self):
+        stats = self.stats
+        average = (
+            stats["total_connect_ms"] // stats["connects"] if stats["connects"] else 0
+        )
+        up_s = (
+            time.ticks_diff(time.ticks_ms(), self.link["since_ms"]) // 1000
+            if self.link["up"]
+            else 0
+        )
+        print(
+            f"[Wi-Fi] up={self.link['up']} ssid={self.link['ssid']} "
+            f"uptime={up_s}s connects={stats['connects']} "
+            f"reconnects={stats['reconnects']} drops={stats['drops']} "
+            f"failures={stats['failures']} attempts={stats['attempts']} "
+            f"connect avg={average}ms max={stats['max_connect_ms']}ms "
+            f"last={stats['last_connect_ms']}ms"
+        )
+        radio = self.radio
+        self._account_radio()
+        print(
+            f"[Wi-Fi] radio on={radio['on']} total={radio['on_ms'] // 1000}s "
+            f"today={radio['today_ms'] // 1000}s "
+            f"yesterday={radio['yesterday_ms'] // 1000}s wakeups={radio['wakeups']}"
+        )
+
+
+manager = WiFiManager()
+
+
+def is_connected():
+    return manager.is_connected()
+
 
 if __name__ == "__main__":
-    if connect_wifi():
+    if asyncio.run(manager.connect()):
         print("[Wi-Fi] Wi-Fi connection test successful.")
     else:
         print("[Wi-Fi] Wi-Fi connection test failed.")
+    manager.print_stats()